@@ -14,6 +14,13 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    if app.config["TOKEN_REVOCATION_BACKEND"] == "memory" and app.config["WEB_CONCURRENCY"] > 1:
+        app.logger.warning(
+            "TOKEN_REVOCATION_BACKEND=memory with WEB_CONCURRENCY=%s: a token revoked in one "
+            "worker stays valid in the others; set REDIS_URL or TOKEN_REVOCATION_BACKEND=redis",
+            app.config["WEB_CONCURRENCY"]
+        )
+
     # init extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -21,9 +28,15 @@ def create_app():
     api.init_app(app)
 
     # Register CLI commands
-    from .commands import start_server, create_admin
+    from .commands import start_server, create_admin, import_members, report_worker, attendance_partitions
+    from .commands import search_reindex, attendance_rollup
     app.cli.add_command(start_server)
     app.cli.add_command(create_admin)
+    app.cli.add_command(import_members)
+    app.cli.add_command(report_worker)
+    app.cli.add_command(attendance_partitions)
+    app.cli.add_command(search_reindex)
+    app.cli.add_command(attendance_rollup)
 
     # register apis
     api.add_namespace(auth_ns, path="/auth")
@@ -15,8 +15,116 @@ def start_server():
 def create_admin():
     """Create an admin user"""
     from app.models.user import User
+    from app.services.search_service import SearchService
     admin = User(name="Admin", email="admin@gymly.com", role="admin")
     admin.set_password("admin123")
     db.session.add(admin)
+    db.session.flush()
+    SearchService.index_user(admin)
     db.session.commit()
     click.echo("Admin created!")
+
+@click.command("import-members")
+@click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--report", "report_path", type=click.Path(dir_okay=False), help="Write every row's outcome to this CSV")
+@click.option("--batch-size", type=int, default=None, help="Rows per transaction (default IMPORT_BATCH_SIZE)")
+@click.option("--workers", type=int, default=None, help="Password hashing processes (default PASSWORD_POOL_WORKERS)")
+@with_appcontext
+def import_members(csv_path, report_path, batch_size, workers):
+    """Bulk-import members and gym enrollments from a CSV file"""
+    from app.services.member_import_service import MemberImportService
+    from app.utils.password_pool import get_password_pool, reset_password_pool
+
+    if workers is not None:
+        current_app.config["PASSWORD_POOL_WORKERS"] = workers
+        reset_password_pool()
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+
+    try:
+        get_password_pool(current_app.config).warm_up()
+        if report_path:
+            summary, error = MemberImportService.import_file(csv_path, report_path, batch_size)
+        else:
+            def echo_error(number, email, status, detail):
+                if status == "error":
+                    click.echo(f"row {number} ({email or '-'}): {detail}", err=True)
+
+            with open(csv_path, newline="", encoding="utf-8-sig") as source:
+                summary, error = MemberImportService.import_csv(source, batch_size, on_row=echo_error)
+    finally:
+        reset_password_pool()
+
+    if error:
+        raise click.ClickException(error)
+    click.echo(", ".join(f"{status}: {count}" for status, count in sorted(summary.items())) or "No rows")
+
+@click.command("report-worker")
+@with_appcontext
+def report_worker():
+    """Run a background worker for queued report jobs"""
+    from app.jobs.broker import get_broker
+    from app.jobs.worker import run_worker
+
+    broker_name = current_app.config["JOB_BROKER"]
+    if broker_name == "memory":
+        click.echo("JOB_BROKER=memory runs jobs inside the web process; use sqlite or rabbitmq here")
+        return
+    click.echo(f"Waiting for report jobs on {broker_name}...")
+    run_worker(current_app._get_current_object(), get_broker(current_app.config))
+
+@click.command("attendance-partitions")
+@click.option("--ahead", default=3, show_default=True, help="Months of future partitions to keep ready")
+@click.option("--retain-months", type=int, default=None, help="Detach partitions older than this many months")
+@click.option("--archive-schema", default=None, help="Move detached partitions into this schema")
+@click.option("--drop", is_flag=True, help="Drop detached partitions instead of keeping them")
+@with_appcontext
+def attendance_partitions(ahead, retain_months, archive_schema, drop):
+    """Create upcoming monthly attendance partitions and retire old ones"""
+    from app.services.partition_service import PartitionService
+
+    if not PartitionService.is_supported():
+        click.echo("Attendance partitioning needs PostgreSQL; nothing to do")
+        return
+
+    for name in PartitionService.ensure_future_partitions(ahead):
+        click.echo(f"Created {name}")
+
+    if retain_months is not None:
+        for name in PartitionService.retire_partitions(retain_months, archive_schema, drop):
+            action = "dropped" if drop else f"archived to {archive_schema}" if archive_schema else "detached"
+            click.echo(f"Retired {name} ({action})")
+
+@click.command("search-reindex")
+@click.option("--kind", type=click.Choice(["gym", "user", "all"]), default="all", show_default=True)
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Rows per transaction")
+@with_appcontext
+def search_reindex(kind, batch_size):
+    """Rebuild the gym/member search index from the gyms and users tables"""
+    from app.services.search_service import SearchService, GYM, USER
+
+    for k in ([GYM, USER] if kind == "all" else [kind]):
+        click.echo(f"{k}: {SearchService.reindex(k, batch_size)} indexed")
+
+@click.command("attendance-rollup")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="First day (default: the first check-in)")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Last day (default: today, UTC)")
+@click.option("--chunk-days", type=int, default=7, show_default=True, help="Days per transaction")
+@click.option("--dry-run", is_flag=True, help="Only report the gym-days that are out of date")
+@with_appcontext
+def attendance_rollup(start, end, chunk_days, dry_run):
+    """Backfill or reconcile the daily attendance rollup from the attendance table"""
+    from app.services.rollup_service import RollupService
+
+    def progress(chunk_start, chunk_end, written, removed):
+        if written or removed:
+            click.echo(f"{chunk_start}..{chunk_end}: {written} out of date, {removed} stale")
+
+    summary, error = RollupService.rebuild(
+        start.date() if start else None, end.date() if end else None, chunk_days, dry_run, on_chunk=progress
+    )
+    if error:
+        raise click.ClickException(error)
+    verb = "would write" if dry_run else "wrote"
+    click.echo(f"{summary['days']} days, {summary['rows']} gym-days: {verb} {summary['written']}, "
+               f"{'would remove' if dry_run else 'removed'} {summary['removed']}")
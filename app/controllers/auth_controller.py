@@ -11,6 +11,15 @@ class AuthController:
         )
         return user, error
 
+    @staticmethod
+    def signup_gym_owner(data):
+        user, error = AuthService.signup_gym_owner(
+            name=data["name"],
+            email=data["email"],
+            password=data["password"]
+        )
+        return user, error
+
     @staticmethod
     def login(data):
         response, error = AuthService.login(
@@ -18,3 +27,10 @@ class AuthController:
             password=data["password"]
         )
         return response, error
+
+    @staticmethod
+    def refresh(data):
+        response, error = AuthService.refresh(
+            refresh_token=data["refresh_token"]
+        )
+        return response, error
@@ -0,0 +1,162 @@
+import queue
+import sqlite3
+import threading
+import time
+
+
+class Broker:
+    """
+    Delivers job ids from the web process to workers.
+    Job state itself lives in the `report_jobs` table; brokers only carry ids.
+    """
+
+    def publish(self, job_id):
+        raise NotImplementedError
+
+    def consume(self, handler, stop_event=None):
+        """Block and call `handler(job_id)` for each delivered job until `stop_event` is set."""
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """Process-local queue, drained by a worker thread in the same process."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def publish(self, job_id):
+        self.queue.put(job_id)
+
+    def consume(self, handler, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                job_id = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                handler(job_id)
+            finally:
+                self.queue.task_done()
+
+
+class SQLiteBroker(Broker):
+    """
+    Durable local queue in a SQLite file, shared by every process on the host.
+    Lets `flask report-worker` run next to the dev server without RabbitMQ.
+    """
+
+    def __init__(self, path, poll_interval=0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_queue ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, claimed_at REAL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def publish(self, job_id):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO job_queue (job_id) VALUES (?)", (job_id,))
+
+    def _claim(self, conn):
+        # BEGIN IMMEDIATE takes the write lock, so two workers can't claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, job_id FROM job_queue WHERE claimed_at IS NULL ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE job_queue SET claimed_at = ? WHERE id = ?", (time.time(), row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def consume(self, handler, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        conn = self._connect()
+        try:
+            while not stop_event.is_set():
+                row = self._claim(conn)
+                if not row:
+                    stop_event.wait(self.poll_interval)
+                    continue
+                try:
+                    handler(row[1])
+                finally:
+                    conn.execute("DELETE FROM job_queue WHERE id = ?", (row[0],))
+        finally:
+            conn.close()
+
+
+class RabbitMQBroker(Broker):
+    """Durable `report_jobs` queue on the broker at Config.RABBIT_URL."""
+
+    QUEUE = "report_jobs"
+
+    def __init__(self, url):
+        self.url = url
+
+    def _channel(self):
+        import pika
+
+        connection = pika.BlockingConnection(pika.URLParameters(self.url))
+        channel = connection.channel()
+        channel.queue_declare(queue=self.QUEUE, durable=True)
+        return connection, channel
+
+    def publish(self, job_id):
+        import pika
+
+        connection, channel = self._channel()
+        try:
+            channel.basic_publish(
+                exchange="",
+                routing_key=self.QUEUE,
+                body=job_id.encode(),
+                properties=pika.BasicProperties(delivery_mode=2),  # persistent
+            )
+        finally:
+            connection.close()
+
+    def consume(self, handler, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        connection, channel = self._channel()
+        channel.basic_qos(prefetch_count=1)
+        try:
+            while not stop_event.is_set():
+                method, _, body = channel.basic_get(queue=self.QUEUE)
+                if not method:
+                    connection.sleep(0.5)
+                    continue
+                try:
+                    handler(body.decode())
+                finally:
+                    channel.basic_ack(delivery_tag=method.delivery_tag)
+        finally:
+            connection.close()
+
+
+_brokers = {}
+_lock = threading.Lock()
+
+
+def get_broker(config):
+    """Return the broker selected by `JOB_BROKER`, one instance per process."""
+    name = config.get("JOB_BROKER", "memory")
+    with _lock:
+        if name not in _brokers:
+            if name == "memory":
+                _brokers[name] = InMemoryBroker()
+            elif name == "sqlite":
+                _brokers[name] = SQLiteBroker(config["JOB_SQLITE_PATH"])
+            elif name == "rabbitmq":
+                _brokers[name] = RabbitMQBroker(config["RABBIT_URL"])
+            else:
+                raise ValueError(f"Unknown JOB_BROKER: {name}")
+        return _brokers[name]
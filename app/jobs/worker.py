@@ -0,0 +1,52 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Expired report files are swept when a worker starts and then at most this often
+SWEEP_INTERVAL_SECONDS = 300
+
+_local_worker = None
+_local_lock = threading.Lock()
+
+
+def run_worker(app, broker, stop_event=None):
+    """Consume job ids from `broker` and run each one inside an app context."""
+    from app.services.report_job_service import ReportJobService
+
+    last_sweep = [None]
+
+    def sweep():
+        if last_sweep[0] is not None and time.monotonic() - last_sweep[0] < SWEEP_INTERVAL_SECONDS:
+            return
+        last_sweep[0] = time.monotonic()
+        try:
+            removed = ReportJobService.sweep_artifacts()
+            if removed:
+                logger.info("Removed %d expired report file(s)", removed)
+        except Exception:
+            logger.exception("Report file sweep failed")
+
+    def handle(job_id):
+        with app.app_context():
+            try:
+                ReportJobService.run_job(job_id)
+            except Exception:
+                logger.exception("Report job %s crashed", job_id)
+            sweep()
+
+    with app.app_context():
+        sweep()
+    broker.consume(handle, stop_event)
+
+
+def ensure_local_worker(app, broker):
+    """Start the in-process worker thread used by the "memory" broker (once per process)."""
+    global _local_worker
+    with _local_lock:
+        if _local_worker is None or not _local_worker.is_alive():
+            _local_worker = threading.Thread(
+                target=run_worker, args=(app, broker), name="report-worker", daemon=True
+            )
+            _local_worker.start()
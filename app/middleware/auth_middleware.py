@@ -1,31 +1,80 @@
-from flask import request, jsonify
-from app.models.user import User
-from app.services.jwt_service import JWTService
+from flask import request
+from app.services.jwt_service import JWTService, ACCESS
+from app.services.principal_service import PrincipalService
 from functools import wraps
-from jwt import ExpiredSignatureError, InvalidTokenError
 
-def token_required(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"error": "Authorization required"}), 401
 
-        token = auth_header.split(" ")[1]
+class AuthContext:
+    """
+    Outcome of authenticating the current request: decoded claims and the cached
+    principal, or the (message, status) that rejected it. Built once per request
+    and shared by every auth decorator stacked on a view.
+    """
 
-        try:
-            data = JWTService.decode_token(token)
-            user = User.query.get(data.get("user_id"))
-            if not user:
-                return jsonify({"error": "User not found"}), 404
-        except ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
+    def __init__(self, claims=None, user=None, error=None, status=None):
+        self.claims = claims
+        self.user = user
+        self.error = error
+        self.status = status
 
-        # Attach user to request for downstream use
-        request.current_user = user
 
-        return fn(*args, **kwargs)
+def _authenticate():
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return AuthContext(error="Authorization required", status=401)
 
-    return wrapper
+    token = auth_header.split(" ")[1]
+    claims, error = JWTService.verify_token(token)
+    if error:
+        return AuthContext(error=error, status=401)
+
+    if claims.get("typ") != ACCESS:
+        # Only access tokens authenticate requests: not refresh tokens, nor
+        # tokens without a typ, which nothing issues any more
+        return AuthContext(error="Invalid token", status=401)
+    # Self-contained token: trust its claims unless revoked since it was issued
+    if JWTService.is_revoked(claims):
+        return AuthContext(error="Token revoked", status=401)
+    return AuthContext(claims=claims, user=PrincipalService.from_claims(claims))
+
+
+def get_auth_context():
+    """Authenticate the current request on first use; later calls reuse the result."""
+    ctx = getattr(request, "auth_context", None)
+    if ctx is None:
+        ctx = request.auth_context = _authenticate()
+        if ctx.user is not None:
+            # Attach the (read-only, cached) user snapshot for downstream use
+            request.current_user = ctx.user
+    return ctx
+
+
+def auth_required(*policies):
+    """
+    Authenticate the request, then apply each policy in order.
+    A policy takes the AuthContext and returns None to allow the request or
+    (message, status) to reject it. Stacking several of these decorators on one
+    view still decodes the token and loads the user only once.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            ctx = get_auth_context()
+            if ctx.error:
+                return {"error": ctx.error}, ctx.status
+
+            for policy in policies:
+                denied = policy(ctx)
+                if denied:
+                    message, status = denied
+                    return {"error": message}, status
+
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+token_required = auth_required()
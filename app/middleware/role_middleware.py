@@ -1,27 +1,20 @@
-from functools import wraps
-from flask import request, jsonify
-from app.middleware.auth_middleware import token_required
+from app.middleware.auth_middleware import auth_required
 
-def require_role(role):
-    """
-    Decorator to restrict access to users with a specific role.
-    Works with token_required to ensure authentication first.
-    """
-
-    def decorator(fn):
-        @wraps(fn)
-        @token_required  # ensure user is authenticated
-        def wrapper(*args, **kwargs):
-            user = getattr(request, "current_user", None)
 
-            if not user:
-                return jsonify({"error": "Authentication required"}), 401
+def role_policy(role):
+    """Policy allowing only users whose role is `role`."""
 
-            if user.role != role:
-                return jsonify({"error": "Access denied"}), 403
+    def policy(ctx):
+        if ctx.user.role != role:
+            return "Access denied", 403
+        return None
 
-            return fn(*args, **kwargs)
+    return policy
 
-        return wrapper
 
-    return decorator
+def require_role(role):
+    """
+    Decorator to restrict access to users with a specific role.
+    Authenticates the request itself, sharing the result with token_required.
+    """
+    return auth_required(role_policy(role))
@@ -1,47 +1,36 @@
-from functools import wraps
-from flask import request
 from datetime import datetime
+from app.extensions import db
+from app.middleware.auth_middleware import auth_required
 from app.models.user import User
 from app.services.jwt_service import JWTService
+from app.services.principal_service import PrincipalService
+from app.services.version_service import user_key
+from app.utils.response_cache import invalidate_on_commit
 
-def subscription_required(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
 
-        # 1. Read token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return {"error": "Missing or invalid authorization token"}, 401
+def subscription_policy(ctx):
+    """Policy allowing only gym owners with an active subscription or running trial."""
+    user = ctx.user
 
-        token = auth_header.split(" ")[1]
+    # Only gym owners can require subscription
+    if user.role != "gym_owner":
+        return "Only gym owners have subscriptions", 403
 
-        # 2. Decode JWT
-        payload = JWTService.decode_access_token(token)
-        if not payload:
-            return {"error": "Invalid or expired token"}, 401
+    # Auto-expire trial if needed (only update if still marked active)
+    if user.trial_ends_at and datetime.utcnow() > user.trial_ends_at and user.is_subscription_active:
+        db.session.query(User).filter(
+            User.id == user.id, User.is_subscription_active.is_(True)
+        ).update({User.is_subscription_active: False}, synchronize_session=False)
+        invalidate_on_commit(db.session, user_key(user.id))
+        db.session.commit()
+        PrincipalService.invalidate(user.id)
+        JWTService.revoke_user_tokens(user.id)
+        return "Subscription inactive. Please subscribe to continue", 403
 
-        user = User.query.get(payload.get("user_id"))
-        if not user:
-            return {"error": "User not found"}, 404
+    if not user.is_subscription_active:
+        return "Subscription inactive. Please subscribe to continue", 403
 
-        # 3. Only gym owners can require subscription
-        if user.role != "gym_owner":
-            return {"error": "Only gym owners have subscriptions"}, 403
+    return None
 
-        # 4. Auto-expire trial if needed
-        if user.trial_ends_at and datetime.utcnow() > user.trial_ends_at:
-            if user.is_subscription_active:  # only update if still marked active
-                user.is_subscription_active = False
-                from app.extensions import db
-                db.session.commit()
 
-        # 5. Check subscription status
-        if not user.is_subscription_active:
-            return {"error": "Subscription inactive. Please subscribe to continue"}, 403
-
-        # Attach user to request for convenience
-        request.current_user = user
-
-        return fn(*args, **kwargs)
-
-    return wrapper
+subscription_required = auth_required(subscription_policy)
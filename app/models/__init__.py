@@ -3,3 +3,7 @@ from .gym import Gym
 from .subscription import Subscription
 from .attendance import Attendance
 from .booking import Booking
+from .report_job import ReportJob
+from .search import SearchTerm, SearchFuzzyKey
+from .resource_version import ResourceVersion
+from .attendance_rollup import AttendanceDailyRollup
@@ -1,5 +1,5 @@
 from app.extensions import db
-from datetime import datetime,date
+from datetime import datetime
 
 class Attendance(db.Model):
     __tablename__ = "attendance"
@@ -7,7 +7,8 @@ class Attendance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     gym_id = db.Column(db.Integer, db.ForeignKey("gyms.id"))
-    date = db.Column(db.Date, default=date.today, nullable=False)
+    # UTC day of `timestamp`; the unique key and, on Postgres, the monthly partition key
+    date = db.Column(db.Date, default=lambda: datetime.utcnow().date(), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship("User", back_populates="attendance_records")
@@ -16,4 +17,7 @@ class Attendance(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'gym_id', 'date', name='unique_daily_attendance'),
+        # Gym and member timelines are read newest first, keyset-paged on (timestamp, id)
+        db.Index('ix_attendance_gym_id_timestamp', 'gym_id', 'timestamp', 'id'),
+        db.Index('ix_attendance_user_id_timestamp', 'user_id', 'timestamp', 'id'),
     )
\ No newline at end of file
@@ -0,0 +1,29 @@
+from app.extensions import db
+
+HOURS = range(24)
+HOUR_COLUMNS = [f"hour_{hour:02d}" for hour in HOURS]
+
+
+class AttendanceDailyRollup(db.Model):
+    """
+    Check-ins per gym per UTC day, kept in step with `attendance` by the
+    check-in paths (see RollupService). unique_daily_attendance makes every
+    attendance row a distinct member-day, so unique_users equals checkins for
+    a single day; it is stored so multi-day sums keep their meaning.
+    hour_00 .. hour_23 histogram the check-ins by UTC hour.
+    """
+
+    __tablename__ = "attendance_daily_rollup"
+
+    gym_id = db.Column(db.Integer, db.ForeignKey("gyms.id", ondelete="CASCADE"), primary_key=True,
+                       autoincrement=False)
+    date = db.Column(db.Date, primary_key=True)
+    checkins = db.Column(db.Integer, nullable=False, default=0)
+    unique_users = db.Column(db.Integer, nullable=False, default=0)
+
+    def hours(self):
+        return [getattr(self, name) for name in HOUR_COLUMNS]
+
+
+for _name in HOUR_COLUMNS:
+    setattr(AttendanceDailyRollup, _name, db.Column(_name, db.Integer, nullable=False, default=0))
@@ -13,3 +13,8 @@ class Booking(db.Model):
 
     user = db.relationship("User", back_populates="bookings")
     gym = db.relationship("Gym", back_populates="bookings")
+
+    __table_args__ = (
+        db.Index('ix_bookings_gym_id_booking_date', 'gym_id', 'booking_date'),
+        db.Index('ix_bookings_user_id_booking_date', 'user_id', 'booking_date'),
+    )
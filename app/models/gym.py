@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils import geo
 # Association table for gym members
 
 
@@ -8,11 +9,21 @@ class Gym(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     location = db.Column(db.String(255), nullable=False)
-    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+
+    # Coordinates (WGS84 degrees) and their geohash; the indexed hash backs
+    # radius search with plain range scans (see app.utils.geo)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)
 
     # Relationships
-    owner = db.relationship("User", back_populates="gyms")
+    owner = db.relationship("User", back_populates="gyms_owned")
     bookings = db.relationship("Booking", back_populates="gym")
     attendance_records = db.relationship("Attendance", back_populates="gym")
     enrollments = db.relationship("GymEnrollment", back_populates="gym")
 
+    def set_coordinates(self, latitude, longitude):
+        self.latitude, self.longitude = latitude, longitude
+        self.geohash = geo.encode(latitude, longitude) if latitude is not None else None
+
@@ -17,3 +17,14 @@ class GymEnrollment(db.Model):
     user = db.relationship("User", back_populates="enrollments")
     gym = db.relationship("Gym", back_populates="enrollments")
 
+    __table_args__ = (
+        # Check-in enrollment test: only active rows matter
+        db.Index(
+            'ix_gym_enrollments_active_user_gym', 'user_id', 'gym_id',
+            postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')
+        ),
+        # Member lists per gym and "my gyms" per user, keyset-paged on id
+        db.Index('ix_gym_enrollments_gym_id_id', 'gym_id', 'id'),
+        db.Index('ix_gym_enrollments_user_id_id', 'user_id', 'id'),
+    )
+
@@ -0,0 +1,35 @@
+from app.extensions import db
+from datetime import datetime
+import uuid
+
+
+class ReportJob(db.Model):
+    __tablename__ = "report_jobs"
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind = db.Column(db.String(50), nullable=False)  # attendance_pdf
+    params = db.Column(db.JSON, nullable=False)
+
+    # Hash of kind + params; cleared once the job can no longer be reused
+    dedupe_key = db.Column(db.String(64), unique=True, nullable=True)
+
+    status = db.Column(db.String(20), default="queued", nullable=False)  # queued, running, done, failed
+    artifact_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    requested_by = db.Column(db.Integer, db.ForeignKey("users.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,16 @@
+from datetime import datetime
+from app.extensions import db
+
+
+class ResourceVersion(db.Model):
+    """
+    Change counter for a cacheable resource ("gyms", "gym:42"): bumped in the
+    transaction that changes it, read to build ETag/Last-Modified validators
+    without touching the resource's own rows.
+    """
+
+    __tablename__ = "resource_versions"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
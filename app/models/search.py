@@ -0,0 +1,33 @@
+from app.extensions import db
+
+# Byte-order comparisons on Postgres, so prefix ranges (token >= 'mar' AND
+# token < 'mas') hit the B-tree whatever the database collation is
+Token = db.String(64).with_variant(db.String(64, collation="C"), "postgresql")
+
+
+class SearchTerm(db.Model):
+    """Posting: `entity_id` of `kind` ("gym" or "user") contains `token`."""
+
+    __tablename__ = "search_terms"
+
+    kind = db.Column(db.String(10), primary_key=True)
+    token = db.Column(Token, primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    __table_args__ = (
+        # Re-indexing one entity and the per-term EXISTS probes of multi-word queries
+        db.Index('ix_search_terms_entity', 'kind', 'entity_id', 'token'),
+    )
+
+
+class SearchFuzzyKey(db.Model):
+    """
+    Typo index over name/location words: each word's first few characters and
+    their one-character deletions (see app.utils.text_search.fuzzy_keys).
+    """
+
+    __tablename__ = "search_fuzzy_keys"
+
+    kind = db.Column(db.String(10), primary_key=True)
+    key = db.Column(db.String(8).with_variant(db.String(8, collation="C"), "postgresql"), primary_key=True)
+    token = db.Column(Token, primary_key=True)
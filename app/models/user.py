@@ -1,7 +1,14 @@
 from datetime import datetime
-from passlib.hash import pbkdf2_sha256 as hasher
+from flask import current_app, has_app_context
 from app.extensions import db
 from app.models.gym_enrollment import GymEnrollment
+from app.utils import hash as password_hash
+
+
+def _hash_rounds():
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_ROUNDS", password_hash.DEFAULT_ROUNDS)
+    return password_hash.DEFAULT_ROUNDS
 
 
 class User(db.Model):
@@ -33,12 +40,12 @@ class User(db.Model):
     bookings = db.relationship("Booking", back_populates="user")
     attendance_records = db.relationship("Attendance", back_populates="user")
 
-    # Password helpers
+    # Password helpers (synchronous; request handlers go through HashService)
     def set_password(self, password):
-        self.password = hasher.hash(password)
+        self.password = password_hash.hash_password(password, _hash_rounds())
 
     def check_password(self, password):
-        return hasher.verify(password, self.password)
+        return password_hash.verify_password(password, self.password, _hash_rounds())
 
     # Serialize user safely
     def to_dict(self):
@@ -1,8 +1,12 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request, make_response
+from flask import request, Response, stream_with_context, send_file
 from app.services.attendance_service import AttendanceService
+from app.services.analytics_service import AnalyticsService
+from app.services.report_job_service import ReportJobService
+from app.services.rollup_service import RollupService
 from app.middleware.auth_middleware import token_required
 from app.middleware.role_middleware import require_role
+from app.utils.pagination import pagination_args
 from datetime import datetime
 
 attendance_ns = Namespace("Attendance", description="User attendance APIs")
@@ -12,6 +16,16 @@ attendance_model = attendance_ns.model("AttendanceModel", {
     "gym_id": fields.Integer(required=True)
 })
 
+check_in_model = attendance_ns.model("CheckInModel", {
+    "user_id": fields.Integer(required=True),
+    "gym_id": fields.Integer(required=True),
+    "timestamp": fields.DateTime(required=False, description="When the member tapped in (defaults to now)")
+})
+
+batch_check_in_model = attendance_ns.model("BatchCheckInModel", {
+    "check_ins": fields.List(fields.Nested(check_in_model), required=True)
+})
+
 # ------------------ USER ROUTES ------------------
 @attendance_ns.route("/record")
 class RecordAttendanceAPI(Resource):
@@ -36,15 +50,27 @@ class MyAttendanceAPI(Resource):
     def get(self):
         """Get paginated attendance records for the current user"""
         user = getattr(request, "current_user")
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        result, error = AttendanceService.get_attendance(user.id, page, per_page)
+        result, error = AttendanceService.get_attendance(user.id, **pagination_args(request.args))
         if error:
             return {"error": error}, 400
         return result, 200
 
 
 # ------------------ GYM OWNER ROUTES ------------------
+@attendance_ns.route("/record/batch")
+class BatchRecordAttendanceAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    @attendance_ns.expect(batch_check_in_model)
+    def post(self):
+        """Record a batch of buffered kiosk/turnstile check-ins for the owner's gyms"""
+        data = request.get_json() or {}
+        owner = getattr(request, "current_user")
+        result, error = AttendanceService.record_attendance_batch(owner.id, data.get("check_ins"))
+        if error:
+            return {"error": error}, 400
+        return result, 200
+
 @attendance_ns.route("/gym/<int:gym_id>/attendance")
 class GymAttendanceAPI(Resource):
     @token_required
@@ -55,12 +81,13 @@ class GymAttendanceAPI(Resource):
         Optional query params:
         - page: page number
         - per_page: items per page
+        - cursor: next_cursor from the previous page (faster than page for deep pages)
+        - include_total: set to false to skip counting the total
+        - count: how to compute the total (auto, exact, cached, estimate, none)
         - user_id: filter by a specific user
         - start_date: filter from this date (YYYY-MM-DD)
         - end_date: filter until this date (YYYY-MM-DD)
         """
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
         user_id = request.args.get("user_id", type=int)
         start_date = request.args.get("start_date")
         end_date = request.args.get("end_date")
@@ -72,10 +99,71 @@ class GymAttendanceAPI(Resource):
             end_date = datetime.strptime(end_date, fmt)
 
         result, error = AttendanceService.get_gym_attendance(
-            gym_id, page, per_page, user_id, start_date, end_date
+            gym_id, user_id=user_id, start_date=start_date, end_date=end_date,
+            **pagination_args(request.args)
         )
         if error:
-            return {"error": error}, 404
+            return {"error": error}, 404 if error == "Gym not found" else 400
+        return result, 200
+
+
+@attendance_ns.route("/gym/<int:gym_id>/attendance/daily")
+class GymDailyAttendanceAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    def get(self, gym_id):
+        """
+        Daily check-ins with hourly histograms for one of your gyms.
+        Optional query params:
+        - start_date: first day (YYYY-MM-DD, default 29 days before end_date)
+        - end_date: last day (YYYY-MM-DD, default today)
+        """
+        owner = getattr(request, "current_user")
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+
+        fmt = "%Y-%m-%d"
+        try:
+            start_date = datetime.strptime(start_date, fmt) if start_date else None
+            end_date = datetime.strptime(end_date, fmt) if end_date else None
+        except ValueError:
+            return {"error": "Dates must be YYYY-MM-DD"}, 400
+
+        result, error = RollupService.get_gym_daily(gym_id, owner.id, start_date, end_date)
+        if error:
+            if error == "Gym not found":
+                return {"error": error}, 404
+            return {"error": error}, 403 if error.startswith("Access denied") else 400
+        return result, 200
+
+
+@attendance_ns.route("/gym/<int:gym_id>/attendance/trends")
+class GymAttendanceTrendsAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    def get(self, gym_id):
+        """
+        Busiest hours and attendance trends for one of your gyms.
+        Optional query params:
+        - start_date: first day (YYYY-MM-DD, default 27 days before end_date)
+        - end_date: last day (YYYY-MM-DD, default today)
+        """
+        owner = getattr(request, "current_user")
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+
+        fmt = "%Y-%m-%d"
+        try:
+            start_date = datetime.strptime(start_date, fmt) if start_date else None
+            end_date = datetime.strptime(end_date, fmt) if end_date else None
+        except ValueError:
+            return {"error": "Dates must be YYYY-MM-DD"}, 400
+
+        result, error = AnalyticsService.get_gym_trends(gym_id, owner.id, start_date, end_date)
+        if error:
+            if error == "Gym not found":
+                return {"error": error}, 404
+            return {"error": error}, 403 if error.startswith("Access denied") else 400
         return result, 200
 
 
@@ -101,15 +189,68 @@ class GymAttendancePDFAPI(Resource):
         if end_date:
             end_date = datetime.strptime(end_date, fmt)
 
-        pdf_data, error = AttendanceService.generate_pdf(gym_id, user_id, start_date, end_date)
+        chunks, error = AttendanceService.stream_pdf(gym_id, user_id, start_date, end_date)
         if error:
             return {"error": error}, 404
 
-        # Return PDF as downloadable file
-        response = make_response(pdf_data)
-        response.headers['Content-Type'] = 'application/pdf'
+        # Stream the PDF page by page as a downloadable file
+        response = Response(stream_with_context(chunks), mimetype="application/pdf")
         response.headers['Content-Disposition'] = f'attachment; filename=gym_{gym_id}_attendance.pdf'
-        return response, 200
+        return response
+
+
+@attendance_ns.route("/gym/<int:gym_id>/attendance/pdf/jobs")
+class GymAttendancePDFJobAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    def post(self, gym_id):
+        """
+        Queue a PDF report of gym attendance for a background worker.
+        Takes the same query params as the PDF route. Identical requests
+        share one job while it is pending or its file is still fresh.
+        """
+        owner = getattr(request, "current_user")
+        user_id = request.args.get("user_id", type=int)
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+
+        fmt = "%Y-%m-%d"
+        if start_date:
+            start_date = datetime.strptime(start_date, fmt)
+        if end_date:
+            end_date = datetime.strptime(end_date, fmt)
+
+        job, error = ReportJobService.submit_attendance_pdf(owner.id, gym_id, user_id, start_date, end_date)
+        if error:
+            return {"error": error}, 404 if error == "Gym not found" else 403
+        return job, 202
+
+
+@attendance_ns.route("/jobs/<string:job_id>")
+class ReportJobStatusAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    def get(self, job_id):
+        """Poll a report job's status"""
+        owner = getattr(request, "current_user")
+        job, error = ReportJobService.get_status(job_id, owner.id)
+        if error:
+            return {"error": error}, 404
+        return job, 200
+
+
+@attendance_ns.route("/jobs/<string:job_id>/download")
+class ReportJobDownloadAPI(Resource):
+    @token_required
+    @require_role("gym_owner")
+    def get(self, job_id):
+        """Download a finished report"""
+        owner = getattr(request, "current_user")
+        path, error = ReportJobService.get_artifact(job_id, owner.id)
+        if error:
+            return {"error": error}, 404
+        return send_file(path, mimetype="application/pdf", as_attachment=True,
+                         download_name=f"attendance_{job_id}.pdf")
 
 # ------------------ COMMENTS ------------------
 """
@@ -117,7 +258,21 @@ User Routes:
 - POST /attendance/record → Record attendance for today
 - GET  /attendance/my-attendance → Paginated attendance records for current user
 
+List routes accept page/per_page, or cursor (the next_cursor of the previous page) for
+constant-cost deep paging; include_total=false skips the total count.
+
 Gym Owner Routes:
+- POST /attendance/record/batch → Replay buffered kiosk check-ins; per-item status
+  (recorded, duplicate, not_enrolled, forbidden, out_of_window, invalid); timestamps must fall
+  within CHECKIN_REPLAY_WINDOW_DAYS before now and CHECKIN_CLOCK_SKEW_SECONDS after it
 - GET  /attendance/gym/<gym_id>/attendance → Get paginated attendance for gym (filters: user_id, start_date, end_date)
+- GET  /attendance/gym/<gym_id>/attendance/daily → Per-day check-ins, unique members and 24 hourly counts
+  for start_date..end_date (default last 30 days, max 731), read from attendance_daily_rollup
+- GET  /attendance/gym/<gym_id>/attendance/trends → Weekday x hour heatmap (totals, per-day averages, peak),
+  daily check-ins with trailing 7/28-day averages and week-over-week deltas (7-day blocks ending on
+  end_date) for start_date..end_date (default last 28 days), computed with NumPy over the daily rollup
 - GET  /attendance/gym/<gym_id>/attendance/pdf → Download attendance report as PDF (filters: user_id, start_date, end_date)
+- POST /attendance/gym/<gym_id>/attendance/pdf/jobs → Queue the same report in the background (202 + job)
+- GET  /attendance/jobs/<job_id> → Job status: queued, running, done, failed
+- GET  /attendance/jobs/<job_id>/download → Finished report file
 """
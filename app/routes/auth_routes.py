@@ -1,6 +1,8 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from app.controllers.auth_controller import AuthController
+from app.services.auth_service import AUTH_BUSY, AUTH_BUSY_RETRY_AFTER_SECONDS
+from app.utils.rate_limit import rate_limit
 
 auth_ns = Namespace("Auth", description="Authentication APIs")
 
@@ -17,11 +19,22 @@ signup_gym_owner_model = auth_ns.model("SignupGymOwnerModel", {
     "password": fields.String(required=True, description="Password")
 })
 
+refresh_model = auth_ns.model("RefreshModel", {
+    "refresh_token": fields.String(required=True, description="Refresh token from login or a previous refresh")
+})
+
 login_model = auth_ns.model("LoginModel", {
     "email": fields.String(required=True, description="Email address"),
     "password": fields.String(required=True, description="User password")
 })
 
+def _auth_error(error, status):
+    """Error response; a saturated password pool is a 503 the client may retry."""
+    if error == AUTH_BUSY:
+        return {"error": error}, 503, {"Retry-After": str(AUTH_BUSY_RETRY_AFTER_SECONDS)}
+    return {"error": error}, status
+
+
 # ----------------------------------------------------------
 # SIGNUP (Regular User)
 # ----------------------------------------------------------
@@ -30,12 +43,17 @@ class SignupAPI(Resource):
     @auth_ns.expect(signup_model)
     @auth_ns.response(201, "User created successfully")
     @auth_ns.response(400, "Validation error")
+    @auth_ns.response(429, "Too many attempts (see Retry-After)")
+    @auth_ns.response(503, "Password hashing pool saturated (see Retry-After)")
+    @rate_limit("signup", ip="RATE_LIMIT_SIGNUP_PER_IP", email="RATE_LIMIT_SIGNUP_PER_EMAIL")
     def post(self):
         data = request.get_json()
+        if not isinstance(data, dict):
+            return {"error": "Request body must be a JSON object"}, 400
         user, error = AuthController.signup(data)
 
         if error:
-            return {"error": error}, 400
+            return _auth_error(error, 400)
 
         return {"message": "User created successfully"}, 201
 
@@ -48,12 +66,17 @@ class SignupGymOwnerAPI(Resource):
     @auth_ns.expect(signup_gym_owner_model)
     @auth_ns.response(201, "Gym owner created successfully")
     @auth_ns.response(400, "Validation error")
+    @auth_ns.response(429, "Too many attempts (see Retry-After)")
+    @auth_ns.response(503, "Password hashing pool saturated (see Retry-After)")
+    @rate_limit("signup", ip="RATE_LIMIT_SIGNUP_PER_IP", email="RATE_LIMIT_SIGNUP_PER_EMAIL")
     def post(self):
         data = request.get_json()
+        if not isinstance(data, dict):
+            return {"error": "Request body must be a JSON object"}, 400
         user, error = AuthController.signup_gym_owner(data)
 
         if error:
-            return {"error": error}, 400
+            return _auth_error(error, 400)
 
         return {"message": "Gym owner created successfully"}, 201
 
@@ -66,10 +89,35 @@ class LoginAPI(Resource):
     @auth_ns.expect(login_model)
     @auth_ns.response(200, "Login successful")
     @auth_ns.response(401, "Invalid email or password")
+    @auth_ns.response(429, "Too many attempts (see Retry-After)")
+    @auth_ns.response(503, "Password hashing pool saturated (see Retry-After)")
+    @rate_limit("login", ip="RATE_LIMIT_LOGIN_PER_IP", email="RATE_LIMIT_LOGIN_PER_EMAIL")
     def post(self):
         data = request.get_json()
+        if not isinstance(data, dict):
+            return {"error": "Request body must be a JSON object"}, 400
         response, error = AuthController.login(data)
 
+        if error:
+            return _auth_error(error, 401)
+
+        return response, 200
+
+
+# ----------------------------------------------------------
+# REFRESH
+# ----------------------------------------------------------
+@auth_ns.route("/refresh")
+class RefreshAPI(Resource):
+    @auth_ns.expect(refresh_model)
+    @auth_ns.response(200, "New access/refresh token pair")
+    @auth_ns.response(401, "Invalid, expired or revoked refresh token")
+    def post(self):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data.get("refresh_token"):
+            return {"error": "refresh_token is required"}, 400
+
+        response, error = AuthController.refresh(data)
         if error:
             return {"error": error}, 401
 
@@ -1,16 +1,25 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from app.services.gym_service import GymService
-from app.middleware.auth_middleware import token_required
-from app.middleware.role_middleware import require_role
-from app.middleware.subscription_middleware import subscription_required
+from app.services.dashboard_service import DashboardService
+from app.services.search_service import SearchService
+from app.middleware.auth_middleware import token_required, auth_required
+from app.middleware.role_middleware import require_role, role_policy
+from app.middleware.subscription_middleware import subscription_policy
+from app.utils.http_cache import cache_headers, not_modified
+from app.utils.pagination import pagination_args
 
 gym_ns = Namespace("Gyms", description="Gym management APIs")
 
+# Gym owner with an active subscription or trial; one token decode, one user lookup
+owner_with_subscription = auth_required(role_policy("gym_owner"), subscription_policy)
+
 # ------------------ MODELS ------------------
 gym_model = gym_ns.model("GymModel", {
     "name": fields.String(required=True),
-    "location": fields.String(required=True)
+    "location": fields.String(required=True),
+    "latitude": fields.Float(required=False, description="WGS84 degrees; send with longitude"),
+    "longitude": fields.Float(required=False, description="WGS84 degrees; send with latitude")
 })
 
 enroll_model = gym_ns.model("EnrollModel", {
@@ -21,27 +30,70 @@ enroll_model = gym_ns.model("EnrollModel", {
 @gym_ns.route("/all")
 class AllGymsAPI(Resource):
     def get(self):
-        """Get all gyms (public) with pagination"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        gyms = GymService.get_all_gyms(page, per_page)
+        """Get all gyms (public) with pagination; honours If-None-Match / If-Modified-Since"""
+        args = pagination_args(request.args)
+        etag, last_modified = GymService.all_gyms_validators(**args)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
+        gyms, error = GymService.get_all_gyms(**args)
+        if error:
+            return {"error": error}, 400
+        return gyms, 200, cache_headers(etag, last_modified)
+
+@gym_ns.route("/nearby")
+class NearbyGymsAPI(Resource):
+    @gym_ns.doc(params={
+        "lat": "Latitude (required)",
+        "lon": "Longitude (required)",
+        "radius": "Search radius in km (default 10, max 200)",
+        "limit": "Max results (default 20, max 100)",
+    })
+    def get(self):
+        """Gyms near a point (public), nearest first"""
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+        if lat is None or lon is None:
+            return {"error": "lat and lon are required numbers"}, 400
+        radius = request.args.get("radius", 10, type=float)
+        limit = request.args.get("limit", 20, type=int)
+
+        gyms, error = GymService.get_nearby_gyms(lat, lon, radius, limit)
+        if error:
+            return {"error": error}, 400
+        return gyms, 200
+
+@gym_ns.route("/search")
+class GymSearchAPI(Resource):
+    @gym_ns.doc(params={
+        "q": "Words or prefixes of the gym's name/location; one typo allowed per 5+ letter word",
+        "limit": "Max results (default 20, max 50)",
+    })
+    def get(self):
+        """Search gyms by name or location (public)"""
+        limit = request.args.get("limit", 20, type=int)
+        gyms, error = SearchService.search_gyms(request.args.get("q", ""), limit)
+        if error:
+            return {"error": error}, 400
         return gyms, 200
 
 @gym_ns.route("/<int:gym_id>")
 class GymDetailAPI(Resource):
     def get(self, gym_id):
-        """Get gym details by ID"""
+        """Get gym details by ID; honours If-None-Match / If-Modified-Since"""
+        etag, last_modified = GymService.gym_validators(gym_id)
+        cached = not_modified(etag, last_modified)
+        if cached:
+            return cached
         gym, error = GymService.get_gym_by_id(gym_id)
         if error:
             return {"error": error}, 404
-        return gym, 200
+        return gym, 200, cache_headers(etag, last_modified)
 
 # ------------------ GYM OWNER ROUTES ------------------
 @gym_ns.route("/")
 class GymListAPI(Resource):
-    @token_required
-    @require_role("gym_owner")
-    @subscription_required
+    @owner_with_subscription
     @gym_ns.expect(gym_model)
     def post(self):
         """Create a new gym (Owner only, subscription required)"""
@@ -51,37 +103,55 @@ class GymListAPI(Resource):
             return {"error": error}, 400
         return {"message": "Gym created", "gym_id": gym.id}, 201
 
-    @token_required
-    @require_role("gym_owner")
-    @subscription_required
+    @owner_with_subscription
     def get(self):
         """Get all gyms owned by the current owner with pagination"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
         owner = getattr(request, "current_user")
-        query = Gym.query.filter_by(owner_id=owner.id)
-        gyms = GymService.get_all_gyms(page, per_page)  # We can reuse the same pagination
+        gyms, error = GymService.get_owner_gyms(owner.id, **pagination_args(request.args))
+        if error:
+            return {"error": error}, 400
         return gyms, 200
 
+@gym_ns.route("/dashboard")
+class GymDashboardAPI(Resource):
+    @owner_with_subscription
+    def get(self):
+        """Members, check-ins and booking revenue for each of your gyms, plus totals"""
+        owner = getattr(request, "current_user")
+        dashboard, error = DashboardService.get_owner_dashboard(owner.id)
+        if error:
+            return {"error": error}, 400
+        return dashboard, 200
+
 @gym_ns.route("/<int:gym_id>/members")
 class GymMembersAPI(Resource):
-    @token_required
-    @require_role("gym_owner")
-    @subscription_required
+    @owner_with_subscription
     def get(self, gym_id):
         """Get all members enrolled in a gym with pagination"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        members, error = GymService.get_gym_members(gym_id, page, per_page)
+        members, error = GymService.get_gym_members(gym_id, **pagination_args(request.args))
         if error:
             return {"error": error}, 400
         return members, 200
 
+@gym_ns.route("/<int:gym_id>/members/search")
+class GymMemberSearchAPI(Resource):
+    @owner_with_subscription
+    @gym_ns.doc(params={
+        "q": "Words or prefixes of a member's name, email or phone",
+        "limit": "Max results (default 20, max 50)",
+    })
+    def get(self, gym_id):
+        """Search the members of one of your gyms"""
+        owner = getattr(request, "current_user")
+        limit = request.args.get("limit", 20, type=int)
+        members, error = SearchService.search_gym_members(gym_id, owner.id, request.args.get("q", ""), limit)
+        if error:
+            return {"error": error}, 404 if error == "Gym not found" else 400
+        return members, 200
+
 @gym_ns.route("/<int:gym_id>")
 class GymModifyAPI(Resource):
-    @token_required
-    @require_role("gym_owner")
-    @subscription_required
+    @owner_with_subscription
     @gym_ns.expect(gym_model)
     def put(self, gym_id):
         """Update a gym (Owner only)"""
@@ -91,9 +161,7 @@ class GymModifyAPI(Resource):
             return {"error": error}, 400
         return {"message": "Gym updated successfully"}, 200
 
-    @token_required
-    @require_role("gym_owner")
-    @subscription_required
+    @owner_with_subscription
     def delete(self, gym_id):
         """Delete a gym (Owner only)"""
         response, error = GymService.delete_gym(gym_id)
@@ -134,9 +202,7 @@ class MyGymsAPI(Resource):
     @require_role("user")
     def get(self):
         """Get all gyms the current user is enrolled in with pagination"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        gyms, error = GymService.get_my_gyms(page, per_page)
+        gyms, error = GymService.get_my_gyms(**pagination_args(request.args))
         if error:
             return {"error": error}, 400
         return gyms, 200
@@ -154,28 +220,63 @@ PUBLIC GYM ROUTES (No authentication required)
 
 2. GET /gyms/<gym_id>
    - Purpose: Get details of a single gym by ID
-   - Response: Gym info: id, name, location, owner_id, owner_name
+   - Response: Gym info: id, name, location, latitude, longitude, owner_id, owner_name
+
+3. GET /gyms/nearby?lat=<lat>&lon=<lon>&radius=<km>&limit=<n>
+   - Purpose: Gyms within radius km (default 10, max 200), nearest first
+   - Response: { "gyms": [... + "distance_km"], "count": n, "radius_km": r }
+   - Only gyms with coordinates are found (set latitude/longitude on create/update)
+
+   /gyms/all and /gyms/<gym_id> send ETag, Last-Modified (once the gym or listing
+   has changed since the resource_versions table was added) and
+   Cache-Control: public, max-age=HTTP_CACHE_MAX_AGE_SECONDS, stale-while-revalidate=...
+   Revalidating with If-None-Match (or If-Modified-Since) answers 304 from one
+   primary-key read of resource_versions, without querying gyms. Versions are
+   bumped by gym create/update/delete and by owner renames.
+
+4. GET /gyms/search?q=<text>&limit=<n>
+   - Purpose: Gyms whose name/location words match every word of q, best first:
+     whole words, then prefixes ("pow gy"), then one typo per 5+ letter word
+   - Response: { "gyms": [id, name, location, latitude, longitude, owner_id, owner_name], "count": n }
 
 GYM OWNER ROUTES (Authentication + Subscription required)
 ---------------------------------------------------------
 Middleware:
-- token_required (auth)
-- require_role("gym_owner") (role check)
-- subscription_required (active subscription check)
+- owner_with_subscription = auth_required(role_policy("gym_owner"), subscription_policy)
+  (one token decode + one cached user lookup, then role and subscription checks)
 
 1. POST /gyms/
    - Purpose: Create a new gym
-   - Body: { "name": "Gym Name", "location": "Location" }
+   - Body: { "name": "Gym Name", "location": "Location", "latitude": <opt>, "longitude": <opt> }
    - Response: { "message": "Gym created", "gym_id": <id> }
 
 2. GET /gyms/
    - Purpose: List gyms owned by current owner
    - Pagination: page, per_page (optional)
-   - Response: Paginated list of gyms
+   - Response: Paginated list of the owner's gyms, same fields as /gyms/all
+
+   GET /gyms/dashboard
+   - Purpose: Per-gym figures for every gym the owner has, plus their sums
+   - Response:
+     {
+       "as_of": "2025-11-26",
+       "gyms": [
+         {
+           "id": 1, "name": "Power Gym", "location": "New York",
+           "active_members": 120, "total_members": 150,
+           "checkins_today": 35, "checkins_7d": 410, "checkins_30d": 1630,
+           "revenue_30d": 4200.0, "revenue_total": 51800.0
+         }
+       ],
+       "summary": { "gyms": 1, "active_members": 120, ... same metrics summed }
+     }
+   - Days are UTC; 7d/30d windows include today. Members are distinct users per
+     gym (active = an active enrollment, as for check-in); revenue counts bookings
+     with status "success". Four grouped queries whatever the number of gyms.
 
 3. PUT /gyms/<gym_id>
    - Purpose: Update gym details
-   - Body: { "name": "New Name", "location": "New Location" }
+   - Body: { "name": "New Name", "location": "New Location", "latitude": <opt>, "longitude": <opt> }
    - Response: { "message": "Gym updated successfully" }
 
 4. DELETE /gyms/<gym_id>
@@ -199,11 +300,18 @@ Middleware:
          }
        ],
        "total": <total_members>,
+       "total_is_exact": true,
        "total_pages": <total_pages>,
        "page": <current_page>,
-       "per_page": <per_page>
+       "per_page": <per_page>,
+       "next_cursor": "<opaque token or null>",
+       "has_next": true
      }
 
+6. GET /gyms/<gym_id>/members/search?q=<text>&limit=<n>
+   - Purpose: Find members of your gym by name, email (or its prefix) or phone digits
+   - Response: { "members": [same fields as /members], "count": n }
+
 USER ROUTES (Authentication required)
 -------------------------------------
 Middleware:
@@ -240,16 +348,21 @@ Middleware:
        "total": 20,
        "total_pages": 2,
        "page": 1,
-       "per_page": 10
+       "per_page": 10,
+       "next_cursor": "<opaque token or null>",
+       "has_next": true
      }
 
 PAGINATION PARAMETERS (Optional for all list endpoints)
 -------------------------------------------------------
 - page: integer (default 1)
 - per_page: integer (default 20)
+- cursor: next_cursor from the previous response; seeks instead of OFFSET, page is ignored
+- include_total: false to skip the total count (total/total_pages come back null)
 
 EXAMPLE:
 GET /gyms/all?page=2&per_page=10
+GET /gyms/all?per_page=10&cursor=WzEwXQ&include_total=false
 GET /gyms/123/members?page=1&per_page=50
 GET /gyms/my-gyms?page=1&per_page=10
 """
@@ -1,8 +1,14 @@
+from datetime import datetime
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import current_app, request, send_file
+from app.services.member_import_service import MemberImportService
+from app.services.report_job_service import ReportJobService
+from app.services.search_service import SearchService
 from app.services.user_service import UserService
 from app.middleware.auth_middleware import token_required
 from app.middleware.role_middleware import require_role
+from app.utils.pagination import pagination_args
+from app.utils.response_cache import get_response_cache
 
 user_ns = Namespace("Users", description="User profile APIs")
 enroll_ns = Namespace("Enrollments", description="Gym enrollment management APIs")
@@ -63,12 +69,68 @@ class UsersListAPI(Resource):
     @token_required
     @require_role("admin")
     def get(self):
-        """Get paginated list of all users"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        result = UserService.get_all_users_paginated(page, per_page)
+        """
+        Get paginated list of all users
+        Optional query params:
+        - page, per_page, cursor, include_total: see other list endpoints
+        - role: only users with this role (user, gym_owner, admin)
+        - is_active: true/false
+        - created_from: joined on or after this date (YYYY-MM-DD)
+        - created_to: joined before this date (YYYY-MM-DD)
+        """
+        is_active = request.args.get("is_active")
+        if is_active is not None:
+            is_active = is_active.lower() in ("1", "true", "yes")
+
+        fmt = "%Y-%m-%d"
+        try:
+            created_from = request.args.get("created_from")
+            created_to = request.args.get("created_to")
+            if created_from:
+                created_from = datetime.strptime(created_from, fmt)
+            if created_to:
+                created_to = datetime.strptime(created_to, fmt)
+        except ValueError:
+            return {"error": "Dates must be YYYY-MM-DD"}, 400
+
+        result, error = UserService.get_all_users_paginated(
+            role=request.args.get("role"), is_active=is_active,
+            created_from=created_from, created_to=created_to,
+            **pagination_args(request.args)
+        )
+        if error:
+            return {"error": error}, 400
         return result, 200
 
+@user_ns.route("/search")
+class UserSearchAPI(Resource):
+
+    @token_required
+    @require_role("admin")
+    @user_ns.doc(params={
+        "q": "Words or prefixes of name, email or phone; one typo allowed per 5+ letter name word",
+        "limit": "Max results (default 20, max 50)",
+    })
+    def get(self):
+        """Search all users by name, email or phone"""
+        limit = request.args.get("limit", 20, type=int)
+        result, error = SearchService.search_users(request.args.get("q", ""), limit)
+        if error:
+            return {"error": error}, 400
+        return result, 200
+
+@user_ns.route("/cache-stats")
+class ResponseCacheStatsAPI(Resource):
+
+    @token_required
+    @require_role("admin")
+    def get(self):
+        """Response cache hits/misses/hit ratio per resource kind (this process)"""
+        return {
+            "backend": current_app.config["RESPONSE_CACHE_BACKEND"],
+            "resources": get_response_cache(current_app.config).stats()
+        }, 200
+
 @user_ns.route("/<int:user_id>/status")
 class UserStatusAPI(Resource):
 
@@ -95,6 +157,52 @@ class UserDeleteAPI(Resource):
             return {"error": error}, 404
         return result, 200
 
+@user_ns.route("/import")
+class MemberImportAPI(Resource):
+
+    @token_required
+    @require_role("admin")
+    @user_ns.response(202, "Import queued")
+    def post(self):
+        """
+        Queue a bulk member import. Send the CSV as a multipart "file" field or as
+        a text/csv body; columns: name, email, and optionally password, phone,
+        gym_id, enrolled_at, valid_till (one row per enrollment).
+        """
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        admin = getattr(request, "current_user")
+        job, error = MemberImportService.submit(stream, admin.id)
+        if error:
+            return {"error": error}, 400
+        job.pop("params", None)
+        return job, 202
+
+@user_ns.route("/import/<string:job_id>")
+class MemberImportStatusAPI(Resource):
+
+    @token_required
+    @require_role("admin")
+    def get(self, job_id):
+        """Poll an import job; includes per-status row counts once done"""
+        status, error = MemberImportService.get_status(job_id)
+        if error:
+            return {"error": error}, 404
+        return status, 200
+
+@user_ns.route("/import/<string:job_id>/report")
+class MemberImportReportAPI(Resource):
+
+    @token_required
+    @require_role("admin")
+    def get(self, job_id):
+        """Download the per-row results (row, email, status, detail) of a finished import"""
+        path, error = ReportJobService.get_artifact(job_id, kind="member_import")
+        if error:
+            return {"error": error}, 404
+        return send_file(path, mimetype="text/csv", as_attachment=True,
+                         download_name=f"member_import_{job_id}.csv")
+
 # -------------------- GYM OWNER ENROLLMENT ROUTES --------------------
 @enroll_ns.route("/gym/<int:gym_id>/user/<int:user_id>/status")
 class EnrollmentStatusAPI(Resource):
@@ -117,11 +225,9 @@ class GymMembersAPI(Resource):
     @require_role("gym_owner")
     def get(self, gym_id):
         """Get paginated list of members for a gym"""
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
-        result, error = UserService.get_gym_members(gym_id, page, per_page)
+        result, error = UserService.get_gym_members(gym_id, **pagination_args(request.args))
         if error:
-            return {"error": error}, 404
+            return {"error": error}, 404 if error == "Gym not found" else 400
         return result, 200
 
 @enroll_ns.route("/gym/<int:gym_id>/user/<int:user_id>/unenroll")
@@ -179,6 +285,30 @@ ADMIN USER MANAGEMENT ROUTES
    - Middleware: token_required + require_role("admin")
    - Response: { "message": "User <id> deleted successfully" }
 
+4. POST /users/import
+   - Purpose: Queue a bulk member/enrollment import from CSV (multipart "file" or text/csv body)
+   - Middleware: token_required + require_role("admin")
+   - Columns: name, email, [password, phone, gym_id, enrolled_at, valid_till]
+   - Response: 202 + job (job_id, status)
+
+5. GET /users/import/<job_id>
+   - Purpose: Import job status; "summary" counts rows per status once done
+   - Middleware: token_required + require_role("admin")
+
+6. GET /users/import/<job_id>/report
+   - Purpose: Per-row outcomes CSV (row, email, status, detail)
+   - Middleware: token_required + require_role("admin")
+
+7. GET /users/search?q=<text>&limit=<n>
+   - Purpose: Find users by name words, email (or its prefix) or phone digits, best first
+   - Middleware: token_required + require_role("admin")
+   - Response: { "users": [id, name, email, phone, role, is_active], "count": n }
+
+8. GET /users/cache-stats
+   - Purpose: Response cache counters of the serving process, per resource kind
+     (gyms, gym, user): hits, misses, waits (answered by a concurrent miss), hit_ratio
+   - Middleware: token_required + require_role("admin")
+
 GYM OWNER ENROLLMENT MANAGEMENT ROUTES
 --------------------------------------
 1. POST /enrollments/gym/<gym_id>/user/<user_id>/status
@@ -207,7 +337,9 @@ GYM OWNER ENROLLMENT MANAGEMENT ROUTES
        "total": <total_members>,
        "total_pages": <total_pages>,
        "page": <current_page>,
-       "per_page": <per_page>
+       "per_page": <per_page>,
+       "next_cursor": "<opaque token or null>",
+       "has_next": true
      }
 
 3. POST /enrollments/gym/<gym_id>/user/<user_id>/unenroll
@@ -219,6 +351,8 @@ PAGINATION PARAMETERS (Optional for list endpoints)
 ---------------------------------------------------
 - page: integer (default 1)
 - per_page: integer (default 20)
+- cursor: next_cursor from the previous response (constant cost for deep pages)
+- include_total: false to skip the total count
 
 EXAMPLES:
 GET /enrollments/gym/1/members?page=2&per_page=50
@@ -0,0 +1,125 @@
+import numpy as np
+from datetime import timedelta
+from app.extensions import db
+from app.models.attendance_rollup import AttendanceDailyRollup, HOURS, HOUR_COLUMNS
+from app.services.rollup_service import RollupService
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+ROLLING_WINDOWS = (7, 28)
+DEFAULT_TREND_DAYS = 28
+
+
+def hour_matrix(gym_id, start, end):
+    """(days, 24) int64 array of the gym's check-ins per UTC hour for start..end; missing days are zeros."""
+    rows = db.session.query(
+        AttendanceDailyRollup.date, *[getattr(AttendanceDailyRollup, name) for name in HOUR_COLUMNS]
+    ).filter(
+        AttendanceDailyRollup.gym_id == gym_id,
+        AttendanceDailyRollup.date >= start, AttendanceDailyRollup.date <= end
+    ).all()
+    matrix = np.zeros(((end - start).days + 1, len(HOURS)), dtype=np.int64)
+    if rows:
+        offsets = np.fromiter(((r[0] - start).days for r in rows), dtype=np.intp, count=len(rows))
+        matrix[offsets] = np.array([r[1:] for r in rows], dtype=np.int64)
+    return matrix
+
+
+def _rounded(values):
+    return np.round(values, 2).tolist()
+
+
+class AnalyticsService:
+    """
+    Busy-hour and trend analytics over attendance_daily_rollup. The period
+    (plus the history its rolling windows need) is loaded as one days x 24
+    matrix and every figure is a vectorized NumPy reduction over it, so the
+    cost follows the number of days, not of check-ins.
+    """
+
+    @staticmethod
+    def get_gym_trends(gym_id, owner_id, start_date=None, end_date=None):
+        """
+        For one of the owner's gyms over start..end (default: the last 28 days):
+        a weekday x hour heatmap (totals and per-day averages) with its peak,
+        daily check-ins with trailing 7/28-day averages, and 7-day blocks
+        ending on end_date compared with the block before each.
+        """
+        error = RollupService.check_gym_owner(gym_id, owner_id)
+        if error:
+            return None, error
+        start, end, error = RollupService.resolve_period(start_date, end_date, DEFAULT_TREND_DAYS)
+        if error:
+            return None, error
+
+        days = (end - start).days + 1
+        weeks = -(-days // 7)
+        # Days before start needed by the longest rolling window and the first week's predecessor
+        history = max(max(ROLLING_WINDOWS) - 1, (weeks + 1) * 7 - days)
+        first = start - timedelta(days=history)
+        matrix = hour_matrix(gym_id, first, end)
+        daily = matrix.sum(axis=1)
+        period = matrix[history:]
+
+        # Weekday x hour heatmap
+        weekday = (start.weekday() + np.arange(days)) % 7
+        heatmap = np.zeros((7, len(HOURS)), dtype=np.int64)
+        np.add.at(heatmap, weekday, period)
+        occurrences = np.bincount(weekday, minlength=7)
+        average = heatmap / np.maximum(occurrences, 1)[:, None]
+        peak = None
+        if heatmap.any():
+            peak_day, peak_hour = np.unravel_index(np.argmax(heatmap), heatmap.shape)
+            peak = {
+                "weekday": WEEKDAYS[peak_day],
+                "hour": int(peak_hour),
+                "checkins": int(heatmap[peak_day, peak_hour]),
+                "average": round(float(average[peak_day, peak_hour]), 2)
+            }
+
+        # Trailing averages: differences of the running total
+        running = np.concatenate(([0], np.cumsum(daily)))
+        ends = np.arange(history + 1, len(daily) + 1)
+        rolling = {window: (running[ends] - running[ends - window]) / window for window in ROLLING_WINDOWS}
+        counts = daily[history:].tolist()
+        averages = {window: _rounded(values) for window, values in rolling.items()}
+        daily_rows = [
+            {
+                "date": (start + timedelta(days=i)).isoformat(),
+                "checkins": counts[i],
+                **{f"avg_{window}d": averages[window][i] for window in ROLLING_WINDOWS}
+            }
+            for i in range(days)
+        ]
+
+        # Week over week: 7-day blocks ending on `end`, each after the block before it
+        blocks = daily[len(daily) - (weeks + 1) * 7:].reshape(weeks + 1, 7).sum(axis=1)
+        previous, current = blocks[:-1], blocks[1:]
+        delta = current - previous
+        delta_pct = np.where(previous > 0, delta / np.maximum(previous, 1) * 100, np.nan)
+        week_rows = [
+            {
+                "week_start": (end - timedelta(days=7 * (weeks - i) - 1)).isoformat(),
+                "week_end": (end - timedelta(days=7 * (weeks - i - 1))).isoformat(),
+                "checkins": int(current[i]),
+                "previous": int(previous[i]),
+                "delta": int(delta[i]),
+                "delta_pct": None if np.isnan(delta_pct[i]) else round(float(delta_pct[i]), 2)
+            }
+            for i in range(weeks)
+        ]
+
+        return {
+            "gym_id": gym_id,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "checkins": int(period.sum()),
+            "heatmap": {
+                "weekdays": list(WEEKDAYS),
+                "hours": list(HOURS),
+                "checkins": heatmap.tolist(),
+                "average": _rounded(average)
+            },
+            "peak": peak,
+            "daily": daily_rows,
+            "weeks": week_rows
+        }, None
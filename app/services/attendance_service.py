@@ -1,176 +1,274 @@
-from flask import request
-from datetime import datetime
-from io import BytesIO
-from fpdf import FPDF
+from flask import current_app, request
+from datetime import datetime, timedelta
 from app.extensions import db
 from app.models.attendance import Attendance
 from app.models.user import User
 from app.models.gym import Gym
 from app.models.gym_enrollment import GymEnrollment
+from app.utils.pagination import paginate, pagination_meta, InvalidCursor
+from app.utils.pdf_stream import StreamingTablePDF
+from app.services.rollup_service import RollupService
+from app.utils.upsert import insert_on_conflict_do_nothing
+from sqlalchemy import tuple_
 
-def paginate_query(query, page=1, per_page=20):
-    page = max(int(page), 1)
-    per_page = max(int(per_page), 1)
-    total = query.count()
-    items = query.offset((page - 1) * per_page).limit(per_page).all()
-    total_pages = (total + per_page - 1) // per_page
-    return {
-        "items": items,
-        "total": total,
-        "total_pages": total_pages,
-        "page": page,
-        "per_page": per_page
-    }
+REPORT_COLUMNS = [("ID", 20), ("User Name", 50), ("Email", 50), ("Date & Time", 40)]
+REPORT_BATCH_SIZE = 2000
+MAX_CHECKIN_BATCH = 1000
 
 
-class AttendanceService:
+def filter_period(query, start_date=None, end_date=None):
+    """
+    Bound a query on Attendance.timestamp. The matching bounds on Attendance.date
+    (the partition key) let Postgres skip monthly partitions outside the range.
+    """
+    if start_date:
+        query = query.filter(Attendance.timestamp >= start_date, Attendance.date >= start_date.date())
+    if end_date:
+        query = query.filter(Attendance.timestamp <= end_date, Attendance.date <= end_date.date())
+    return query
 
-    class PDF(FPDF):
-        def header(self):
-            self.set_font("Arial", "B", 14)
-            self.cell(0, 10, "Gym Attendance Report", 0, 1, "C")
-            self.ln(5)
 
-        def footer(self):
-            self.set_y(-15)
-            self.set_font("Arial", "I", 8)
-            self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
+class AttendanceService:
 
     # ------------------- RECORD ATTENDANCE -------------------
     @staticmethod
     def record_attendance(user_id, gym_id):
-        user = User.query.get(user_id)
-        if not user:
-            return None, "User not found"
+        """
+        Check a member in for today (UTC).
+        One query resolves the user, the gym and the active enrollment; the insert
+        then relies on unique_daily_attendance, so concurrent taps can't double count.
+        """
+        enrolled = db.session.query(GymEnrollment.id).filter(
+            GymEnrollment.user_id == user_id,
+            GymEnrollment.gym_id == gym_id,
+            GymEnrollment.is_active.is_(True)
+        ).exists()
 
-        gym = Gym.query.get(gym_id)
-        if not gym:
-            return None, "Gym not found"
+        row = db.session.query(
+            User.name.label("user_name"),
+            Gym.name.label("gym_name"),
+            enrolled.label("enrolled")
+        ).select_from(User).outerjoin(Gym, Gym.id == gym_id).filter(User.id == user_id).first()
 
-        enrollment = GymEnrollment.query.filter_by(
-            user_id=user_id, gym_id=gym_id, is_active=True
-        ).first()
-        if not enrollment:
+        if not row:
+            return None, "User not found"
+        if row.gym_name is None:
+            return None, "Gym not found"
+        if not row.enrolled:
             return None, "User not enrolled or inactive"
 
-        today = datetime.utcnow().date()
-        existing = Attendance.query.filter(
-            Attendance.user_id == user_id,
-            Attendance.gym_id == gym_id,
-            db.func.date(Attendance.timestamp) == today
-        ).first()
+        now = datetime.utcnow()
+        stmt = insert_on_conflict_do_nothing(
+            db.session,
+            Attendance,
+            [{"user_id": user_id, "gym_id": gym_id, "date": now.date(), "timestamp": now}],
+            ["user_id", "gym_id", "date"],
+        ).returning(Attendance.id)
+        inserted = db.session.execute(stmt).first()
+        if inserted:
+            RollupService.record([(gym_id, now.date(), now)])
+        db.session.commit()
 
-        if existing:
+        if not inserted:
             return None, "Attendance already recorded today"
+        return {"message": f"{row.user_name} attendance recorded at {row.gym_name}"}, None
 
-        attendance = Attendance(user_id=user_id, gym_id=gym_id, timestamp=datetime.utcnow())
-        db.session.add(attendance)
-        db.session.commit()
-        return {"message": f"{user.name} attendance recorded at {gym.name}"}, None
+    # ------------------- BATCH CHECK-IN -------------------
+    @staticmethod
+    def record_attendance_batch(owner_id, check_ins):
+        """
+        Record buffered kiosk check-ins for the owner's gyms in one pass.
+        check_ins: list of {"user_id", "gym_id", "timestamp" (optional ISO 8601)}
+        Enrollments for the whole batch are validated in one query and rows are
+        written with a single INSERT ... ON CONFLICT DO NOTHING on
+        unique_daily_attendance. Each item gets a status: recorded, duplicate,
+        not_enrolled, forbidden, out_of_window (timestamp outside the replay
+        window or in the future) or invalid.
+        """
+        if not isinstance(check_ins, list) or not check_ins:
+            return None, "check_ins must be a non-empty list"
+        if len(check_ins) > MAX_CHECKIN_BATCH:
+            return None, f"At most {MAX_CHECKIN_BATCH} check-ins per batch"
+
+        now = datetime.utcnow()
+        earliest = now - timedelta(days=current_app.config["CHECKIN_REPLAY_WINDOW_DAYS"])
+        latest = now + timedelta(seconds=current_app.config["CHECKIN_CLOCK_SKEW_SECONDS"])
+        results = []
+        parsed = []  # (index, user_id, gym_id, timestamp)
+        for index, item in enumerate(check_ins):
+            result = {"index": index, "user_id": None, "gym_id": None, "status": "invalid"}
+            results.append(result)
+            if not isinstance(item, dict):
+                continue
+            try:
+                user_id, gym_id = int(item["user_id"]), int(item["gym_id"])
+                timestamp = datetime.fromisoformat(item["timestamp"]) if item.get("timestamp") else now
+            except (KeyError, TypeError, ValueError):
+                continue
+            if timestamp.tzinfo:
+                timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+            result.update(user_id=user_id, gym_id=gym_id)
+            if not earliest <= timestamp <= latest:
+                result["status"] = "out_of_window"
+                continue
+            parsed.append((index, user_id, gym_id, timestamp))
+
+        pairs = {(user_id, gym_id) for _, user_id, gym_id, _ in parsed}
+        enrolled = {}
+        if pairs:
+            rows = db.session.query(
+                GymEnrollment.user_id, GymEnrollment.gym_id, Gym.owner_id
+            ).join(Gym, Gym.id == GymEnrollment.gym_id).filter(
+                tuple_(GymEnrollment.user_id, GymEnrollment.gym_id).in_(pairs),
+                GymEnrollment.is_active.is_(True)
+            ).all()
+            enrolled = {(r.user_id, r.gym_id): r.owner_id for r in rows}
+
+        to_insert = {}  # (user_id, gym_id, date) -> index of the first check-in that day
+        for index, user_id, gym_id, timestamp in parsed:
+            if (user_id, gym_id) not in enrolled:
+                results[index]["status"] = "not_enrolled"
+                continue
+            if enrolled[(user_id, gym_id)] != owner_id:
+                results[index]["status"] = "forbidden"
+                continue
+            key = (user_id, gym_id, timestamp.date())
+            if key in to_insert:
+                results[index]["status"] = "duplicate"
+                continue
+            to_insert[key] = (index, timestamp)
+
+        inserted = set()
+        if to_insert:
+            stmt = insert_on_conflict_do_nothing(
+                db.session,
+                Attendance,
+                [
+                    {"user_id": u, "gym_id": g, "date": d, "timestamp": ts}
+                    for (u, g, d), (_, ts) in to_insert.items()
+                ],
+                ["user_id", "gym_id", "date"],
+            ).returning(Attendance.user_id, Attendance.gym_id, Attendance.date)
+            inserted = {tuple(r) for r in db.session.execute(stmt)}
+            RollupService.record((g, d, to_insert[(u, g, d)][1]) for u, g, d in inserted)
+            db.session.commit()
+
+        for key, (index, _) in to_insert.items():
+            results[index]["status"] = "recorded" if key in inserted else "duplicate"
+
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        return {"results": results, "summary": summary}, None
 
     # ------------------- GET USER ATTENDANCE -------------------
     @staticmethod
-    def get_attendance(user_id, page=1, per_page=20):
-        query = Attendance.query.filter_by(user_id=user_id).order_by(Attendance.timestamp.desc())
-        pagination = paginate_query(query, page, per_page)
+    def get_attendance(user_id, page=1, per_page=20, cursor=None, include_total=True, count=None):
+        base = Attendance.query.filter_by(user_id=user_id)
+        query = db.session.query(
+            Attendance.id, Attendance.gym_id, Attendance.timestamp, Gym.name.label("gym_name")
+        ).outerjoin(Gym, Gym.id == Attendance.gym_id).filter(Attendance.user_id == user_id)
+        try:
+            pagination = paginate(
+                query, [Attendance.timestamp, Attendance.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count,
+                descending=True, count_query=base
+            )
+        except InvalidCursor as e:
+            return None, str(e)
 
         records = [
             {
                 "id": a.id,
                 "gym_id": a.gym_id,
-                "gym_name": a.gym.name if a.gym else None,
+                "gym_name": a.gym_name,
                 "timestamp": a.timestamp.isoformat()
             } for a in pagination["items"]
         ]
-        return {
-            "records": records,
-            "total": pagination["total"],
-            "total_pages": pagination["total_pages"],
-            "page": pagination["page"],
-            "per_page": pagination["per_page"]
-        }, None
+        return {"records": records, **pagination_meta(pagination)}, None
 
     # ------------------- GET GYM ATTENDANCE -------------------
     @staticmethod
-    def get_gym_attendance(gym_id, page=1, per_page=20, user_id=None, start_date=None, end_date=None):
-        gym = Gym.query.get(gym_id)
-        if not gym:
+    def get_gym_attendance(gym_id, page=1, per_page=20, user_id=None, start_date=None, end_date=None,
+                           cursor=None, include_total=True, count=None):
+        if not db.session.query(Gym.query.filter(Gym.id == gym_id).exists()).scalar():
             return None, "Gym not found"
 
-        query = Attendance.query.filter_by(gym_id=gym_id)
+        base = Attendance.query.filter(Attendance.gym_id == gym_id)
         if user_id:
-            query = query.filter(Attendance.user_id == user_id)
-        if start_date:
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(Attendance.timestamp >= start_date)
-        if end_date:
-            if isinstance(end_date, str):
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-            query = query.filter(Attendance.timestamp <= end_date)
-
-        query = query.order_by(Attendance.timestamp.desc())
-        pagination = paginate_query(query, page, per_page)
+            base = base.filter(Attendance.user_id == user_id)
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        if isinstance(end_date, str):
+            end_date = datetime.strptime(end_date, "%Y-%m-%d")
+        base = filter_period(base, start_date, end_date)
+
+        query = base.with_entities(
+            Attendance.id, Attendance.user_id, Attendance.timestamp, User.name.label("user_name")
+        ).outerjoin(User, User.id == Attendance.user_id)
+
+        try:
+            pagination = paginate(
+                query, [Attendance.timestamp, Attendance.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count,
+                descending=True, count_query=base
+            )
+        except InvalidCursor as e:
+            return None, str(e)
 
         records = [
             {
                 "id": a.id,
-                "user_id": a.user.id if a.user else None,
-                "user_name": a.user.name if a.user else None,
+                "user_id": a.user_id if a.user_name is not None else None,
+                "user_name": a.user_name,
                 "timestamp": a.timestamp.isoformat()
             } for a in pagination["items"]
         ]
 
-        return {
-            "records": records,
-            "total": pagination["total"],
-            "total_pages": pagination["total_pages"],
-            "page": pagination["page"],
-            "per_page": pagination["per_page"]
-        }, None
+        return {"records": records, **pagination_meta(pagination)}, None
 
     # ------------------- GENERATE PDF -------------------
+    @staticmethod
+    def stream_pdf(gym_id, user_id=None, start_date=None, end_date=None, batch_size=REPORT_BATCH_SIZE):
+        """
+        Returns a generator of PDF byte chunks for the gym's attendance report.
+        Rows are read through a server-side cursor `batch_size` at a time with the
+        user columns joined in, and each page is written out as soon as it fills.
+        """
+        gym = Gym.query.get(gym_id)
+        if not gym:
+            return None, "Gym not found"
+
+        query = db.session.query(
+            Attendance.id, Attendance.timestamp, User.name, User.email
+        ).outerjoin(User, User.id == Attendance.user_id).filter(Attendance.gym_id == gym_id)
+
+        if user_id:
+            query = query.filter(Attendance.user_id == user_id)
+        query = filter_period(query, start_date, end_date)
+
+        if not db.session.query(query.exists()).scalar():
+            return None, "No attendance records found for the selected filters"
+
+        query = query.order_by(Attendance.timestamp.desc(), Attendance.id.desc()).yield_per(batch_size)
+
+        rows = (
+            (
+                a.id,
+                a.name or "-",
+                a.email or "-",
+                a.timestamp.strftime("%Y-%m-%d %H:%M"),
+            ) for a in query
+        )
+        pdf = StreamingTablePDF(
+            "Gym Attendance Report", f"Gym: {gym.name} Attendance Report", REPORT_COLUMNS
+        )
+        return pdf.render(rows), None
+
     @staticmethod
     def generate_pdf(gym_id, user_id=None, start_date=None, end_date=None):
-      gym = Gym.query.get(gym_id)
-      if not gym:
-        return None, "Gym not found"
-
-      query = Attendance.query.filter_by(gym_id=gym_id)
-
-      if user_id:
-        query = query.filter(Attendance.user_id == user_id)
-      if start_date:
-        query = query.filter(Attendance.timestamp >= start_date)
-      if end_date:
-        query = query.filter(Attendance.timestamp <= end_date)
-
-      query = query.order_by(Attendance.timestamp.desc())
-      records = query.all()
-
-      if not records:
-        return None, "No attendance records found for the selected filters"
-
-      pdf = AttendanceService.PDF()
-      pdf.add_page()
-      pdf.set_font("Arial", "B", 12)
-      pdf.cell(0, 10, f"Gym: {gym.name} Attendance Report", 0, 1, "C")
-      pdf.ln(5)
-
-    # Table header
-      pdf.set_font("Arial", "B", 10)
-      pdf.cell(20, 10, "ID", 1)
-      pdf.cell(50, 10, "User Name", 1)
-      pdf.cell(50, 10, "Email", 1)
-      pdf.cell(40, 10, "Date & Time", 1)
-      pdf.ln()
-
-      pdf.set_font("Arial", "", 10)
-      for a in records:
-        pdf.cell(20, 10, str(a.id), 1)
-        pdf.cell(50, 10, a.user.name if a.user else "-", 1)
-        pdf.cell(50, 10, a.user.email if a.user else "-", 1)
-        pdf.cell(40, 10, a.timestamp.strftime("%Y-%m-%d %H:%M"), 1)
-        pdf.ln()
-
-      return pdf.output(dest="S").encode("latin1"), None
\ No newline at end of file
+        """Whole report as one bytes blob; prefer `stream_pdf` for large ranges."""
+        chunks, error = AttendanceService.stream_pdf(gym_id, user_id, start_date, end_date)
+        if error:
+            return None, error
+        return b"".join(chunks), None
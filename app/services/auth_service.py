@@ -1,81 +1,88 @@
 from datetime import datetime, timedelta
 from app.extensions import db
 from app.models.user import User
-from app.services.jwt_service import JWTService
+from app.services.hash_service import HashService
+from app.services.jwt_service import JWTService, REFRESH
+from app.services.search_service import SearchService
+from app.utils.password_pool import PasswordPoolError
+
+# Returned when the password pool is saturated; routes answer 503 for it,
+# with Retry-After set to AUTH_BUSY_RETRY_AFTER_SECONDS
+AUTH_BUSY = "Too many sign-in requests right now, please retry shortly"
+AUTH_BUSY_RETRY_AFTER_SECONDS = 2
 
 
 class AuthService:
     @staticmethod
-    def signup(name, email, password):
-      email = email.lower().strip()
-
-      if User.query.filter_by(email=email).first():
-        return None, "Email already exists"
-
-      user = User(
-        name=name,
-        email=email,
-        role="user",
-        is_subscription_active=False,
-        trial_started_at=None,
-        trial_ends_at=None
-    )
-
-      user.set_password(password)
-
-      db.session.add(user)
-      db.session.commit()
-
-      return user, None
+    def _create_user(name, email, password, **fields):
+        email = email.lower().strip()
 
-@staticmethod
-def signup_gym_owner(name, email, password):
-    email = email.lower().strip()
+        if User.query.filter_by(email=email).first():
+            return None, "Email already exists"
 
-    if User.query.filter_by(email=email).first():
-        return None, "Email already exists"
+        try:
+            hashed = HashService.hash_password(password)
+        except PasswordPoolError:
+            return None, AUTH_BUSY
 
-    now = datetime.utcnow()
+        user = User(name=name, email=email, password=hashed, **fields)
 
-    # Gym owner gets a 1-month free trial
-    user = User(
-        name=name,
-        email=email,
-        role="gym_owner",
-        is_subscription_active=True,  # active during trial
-        trial_started_at=now,
-        trial_ends_at=now + timedelta(days=30)  # <-- 1 month trial
-    )
+        db.session.add(user)
+        db.session.flush()
+        SearchService.index_user(user)
+        db.session.commit()
 
-    user.set_password(password)
+        return user, None
 
-    db.session.add(user)
-    db.session.commit()
+    @staticmethod
+    def signup(name, email, password):
+        return AuthService._create_user(
+            name, email, password,
+            role="user",
+            is_subscription_active=False,
+            trial_started_at=None,
+            trial_ends_at=None
+        )
 
-    return user, None
+    @staticmethod
+    def signup_gym_owner(name, email, password):
+        now = datetime.utcnow()
+
+        # Gym owner gets a 1-month free trial
+        return AuthService._create_user(
+            name, email, password,
+            role="gym_owner",
+            is_subscription_active=True,  # active during trial
+            trial_started_at=now,
+            trial_ends_at=now + timedelta(days=30)  # <-- 1 month trial
+        )
 
-@staticmethod
-def login(email, password):
+    @staticmethod
+    def login(email, password):
         email = email.lower().strip()
 
         user = User.query.filter_by(email=email).first()
         if not user:
             return None, "Invalid email or password"
 
-        # Use helper to check password
-        if not user.check_password(password):
+        try:
+            valid, new_hash = HashService.verify_and_update(password, user.password)
+        except PasswordPoolError:
+            return None, AUTH_BUSY
+        if not valid:
             return None, "Invalid email or password"
+        if not user.is_active:
+            return None, "Account is disabled"
 
-        # Create JWT token
-        token = JWTService.create_access_token({
-            "user_id": user.id,
-            "role": user.role,
-        })
-       
+        # Stored hash predates the current PASSWORD_HASH_ROUNDS/scheme: upgrade it now
+        # that we have the plaintext, so cost changes never need a password reset
+        if new_hash:
+            user.password = new_hash
+            db.session.commit()
 
-        # Build response
+        # Build response: access/refresh pair plus the user
         return {
-            "token": token,
+            **JWTService.create_token_pair(user),
             "user": {
                 "id": user.id,
                 "name": user.name,
@@ -86,3 +93,25 @@ def login(email, password):
                 "trial_ends_at": user.trial_ends_at.isoformat() if user.trial_ends_at else None
             }
         }, None
+
+    @staticmethod
+    def refresh(refresh_token):
+        """
+        Swap a refresh token for a new pair. Re-reads the user, so role, status
+        and subscription changes land in the new access token; the old refresh
+        token is revoked (rotation), so each one works once.
+        """
+        claims, error = JWTService.verify_token(refresh_token)
+        if error:
+            return None, error
+        if claims.get("typ") != REFRESH or not claims.get("jti"):
+            return None, "Invalid token"
+        if JWTService.is_revoked(claims):
+            return None, "Token revoked"
+
+        user = db.session.get(User, claims.get("user_id"))
+        if not user or not user.is_active:
+            return None, "Account is disabled"
+
+        JWTService.revoke_refresh_token(claims)
+        return JWTService.create_token_pair(user), None
@@ -0,0 +1,101 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import case, distinct, func, select
+from app.extensions import db
+from app.models.attendance_rollup import AttendanceDailyRollup
+from app.models.booking import Booking
+from app.models.gym import Gym
+from app.models.gym_enrollment import GymEnrollment
+
+# Trailing windows, in UTC days including today
+WEEK_DAYS = 7
+MONTH_DAYS = 30
+
+METRICS = (
+    "active_members", "total_members",
+    "checkins_today", "checkins_7d", "checkins_30d",
+    "revenue_30d", "revenue_total",
+)
+
+
+class DashboardService:
+    """
+    Per-gym figures for an owner's dashboard. Each metric family is one grouped
+    aggregate over all of the owner's gyms (scoped by a subquery on
+    gyms.owner_id), so the statement count stays the same however many
+    locations the owner has. Check-ins come from attendance_daily_rollup: at
+    most 30 rows per gym whatever the traffic.
+    """
+
+    @staticmethod
+    def get_owner_dashboard(owner_id, now=None):
+        now = now or datetime.utcnow()
+        today = now.date()
+        month_start = datetime.combine(today - timedelta(days=MONTH_DAYS - 1), time.min)
+
+        gyms = db.session.query(Gym.id, Gym.name, Gym.location).filter(
+            Gym.owner_id == owner_id
+        ).order_by(Gym.id).all()
+        rows = {
+            gym.id: {"id": gym.id, "name": gym.name, "location": gym.location, **dict.fromkeys(METRICS, 0)}
+            for gym in gyms
+        }
+
+        if rows:
+            owned = select(Gym.id).where(Gym.owner_id == owner_id)
+            for counts in (
+                DashboardService._member_counts(owned),
+                DashboardService._checkin_counts(owned, today, month_start),
+                DashboardService._revenue(owned, month_start),
+            ):
+                for gym_id, values in counts.items():
+                    if gym_id in rows:  # a gym created since the first read
+                        rows[gym_id].update(values)
+
+        for row in rows.values():
+            row["revenue_30d"] = round(row["revenue_30d"], 2)
+            row["revenue_total"] = round(row["revenue_total"], 2)
+
+        # Sums of the per-gym figures: a member of two gyms counts twice
+        summary = {"gyms": len(rows), **{m: sum(row[m] for row in rows.values()) for m in METRICS}}
+        summary["revenue_30d"] = round(summary["revenue_30d"], 2)
+        summary["revenue_total"] = round(summary["revenue_total"], 2)
+
+        return {"as_of": today.isoformat(), "gyms": list(rows.values()), "summary": summary}, None
+
+    @staticmethod
+    def _member_counts(owned):
+        """gym_id -> distinct enrolled members, and those with an active enrollment (the check-in rule)."""
+        rows = db.session.query(
+            GymEnrollment.gym_id,
+            func.count(distinct(GymEnrollment.user_id)).label("total"),
+            func.count(distinct(case((GymEnrollment.is_active.is_(True), GymEnrollment.user_id)))).label("active"),
+        ).filter(GymEnrollment.gym_id.in_(owned)).group_by(GymEnrollment.gym_id)
+        return {r.gym_id: {"total_members": r.total, "active_members": r.active} for r in rows}
+
+    @staticmethod
+    def _checkin_counts(owned, today, month_start):
+        """gym_id -> check-ins today and over the trailing week and month, from the daily rollup."""
+        week_start = today - timedelta(days=WEEK_DAYS - 1)
+        day, checkins = AttendanceDailyRollup.date, AttendanceDailyRollup.checkins
+        rows = db.session.query(
+            AttendanceDailyRollup.gym_id,
+            func.sum(case((day == today, checkins), else_=0)).label("today"),
+            func.sum(case((day >= week_start, checkins), else_=0)).label("week"),
+            func.sum(checkins).label("month"),
+        ).filter(
+            AttendanceDailyRollup.gym_id.in_(owned), day >= month_start.date(), day <= today
+        ).group_by(AttendanceDailyRollup.gym_id)
+        return {
+            r.gym_id: {"checkins_today": r.today, "checkins_7d": r.week, "checkins_30d": r.month}
+            for r in rows
+        }
+
+    @staticmethod
+    def _revenue(owned, month_start):
+        """gym_id -> amount of successful bookings over the trailing month and in total."""
+        rows = db.session.query(
+            Booking.gym_id,
+            func.sum(case((Booking.booking_date >= month_start, Booking.amount), else_=0)).label("month"),
+            func.sum(Booking.amount).label("total"),
+        ).filter(Booking.gym_id.in_(owned), Booking.status == "success").group_by(Booking.gym_id)
+        return {r.gym_id: {"revenue_30d": r.month or 0.0, "revenue_total": r.total or 0.0} for r in rows}
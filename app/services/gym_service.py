@@ -1,26 +1,20 @@
 from flask import request
 from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models.gym import Gym
 from app.models.user import User
 from app.models.gym_enrollment import GymEnrollment
+from app.services.search_service import SearchService, GYM
+from app.services.version_service import VersionService, GYMS, gym_key
+from app.utils.http_cache import make_etag
+from app.utils.response_cache import cached
+from app.utils import geo
+from app.utils.pagination import paginate, pagination_meta, InvalidCursor
 
-def paginate_query(query, page=1, per_page=20):
-    """
-    Paginate a SQLAlchemy query.
-    """
-    page = max(int(page), 1)
-    per_page = max(int(per_page), 1)
-    total = query.count()
-    items = query.offset((page - 1) * per_page).limit(per_page).all()
-    total_pages = (total + per_page - 1) // per_page
-    return {
-        "items": items,
-        "total": total,
-        "total_pages": total_pages,
-        "page": page,
-        "per_page": per_page
-    }
+MAX_NEARBY_RADIUS_KM = 200
+MAX_NEARBY_RESULTS = 100
 
 class GymService:
 
@@ -40,8 +34,17 @@ class GymService:
         if not name or not location:
             return None, "Name and location are required"
 
+        coordinates, error = GymService._parse_coordinates(data)
+        if error:
+            return None, error
+
         gym = Gym(name=name.strip(), location=location.strip(), owner_id=owner.id)
+        if coordinates:
+            gym.set_coordinates(*coordinates)
         db.session.add(gym)
+        db.session.flush()
+        SearchService.index_gym(gym)
+        VersionService.bump(GYMS, gym_key(gym.id))
         db.session.commit()
         return gym, None
 
@@ -61,10 +64,32 @@ class GymService:
             gym.name = data["name"].strip()
         if "location" in data:
             gym.location = data["location"].strip()
-
+        if "latitude" in data or "longitude" in data:
+            coordinates, error = GymService._parse_coordinates(data)
+            if error:
+                return None, error
+            gym.set_coordinates(*(coordinates or (None, None)))
+
+        if "name" in data or "location" in data:
+            SearchService.index_gym(gym)
+        VersionService.bump(GYMS, gym_key(gym.id))
         db.session.commit()
         return gym, None
 
+    @staticmethod
+    def _parse_coordinates(data):
+        """((lat, lon) or None, error) from optional latitude/longitude fields; both or neither."""
+        lat, lon = data.get("latitude"), data.get("longitude")
+        if lat is None and lon is None:
+            return None, None
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            return None, "latitude and longitude must both be numbers"
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None, "latitude must be within [-90, 90] and longitude within [-180, 180]"
+        return (lat, lon), None
+
     @staticmethod
     def delete_gym(gym_id):
         owner = getattr(request, "current_user", None)
@@ -77,12 +102,14 @@ class GymService:
         if gym.owner_id != owner.id:
             return None, "Access denied: Not gym owner"
 
+        SearchService.remove(GYM, gym.id)
+        VersionService.bump(GYMS, gym_key(gym.id))
         db.session.delete(gym)
         db.session.commit()
         return {"message": "Gym deleted successfully"}, None
 
     @staticmethod
-    def get_gym_members(gym_id, page=1, per_page=20):
+    def get_gym_members(gym_id, page=1, per_page=20, cursor=None, include_total=True, count=None):
         owner = getattr(request, "current_user", None)
         if not owner:
             return None, "User not authenticated"
@@ -93,15 +120,26 @@ class GymService:
         if gym.owner_id != owner.id:
             return None, "Access denied: Not gym owner"
 
-        query = GymEnrollment.query.filter_by(gym_id=gym_id)
-        pagination = paginate_query(query, page, per_page)
+        base = GymEnrollment.query.filter(GymEnrollment.gym_id == gym_id)
+        query = base.with_entities(
+            GymEnrollment.id, GymEnrollment.user_id, GymEnrollment.enrolled_at,
+            GymEnrollment.valid_till, GymEnrollment.is_active,
+            User.name, User.email, User.phone
+        ).join(User, User.id == GymEnrollment.user_id)
+        try:
+            pagination = paginate(
+                query, [GymEnrollment.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count, count_query=base
+            )
+        except InvalidCursor as e:
+            return None, str(e)
 
         members = [
             {
-                "id": e.user.id,
-                "name": e.user.name,
-                "email": e.user.email,
-                "phone": e.user.phone,
+                "id": e.user_id,
+                "name": e.name,
+                "email": e.email,
+                "phone": e.phone,
                 "enrolled_at": e.enrolled_at.isoformat(),
                 "valid_till": e.valid_till.isoformat() if e.valid_till else None,
                 "is_active": e.is_active
@@ -109,52 +147,150 @@ class GymService:
             for e in pagination["items"]
         ]
 
-        return {
-            "members": members,
-            "total": pagination["total"],
-            "total_pages": pagination["total_pages"],
-            "page": pagination["page"],
-            "per_page": pagination["per_page"]
-        }, None
+        return {"members": members, **pagination_meta(pagination)}, None
+
+    @staticmethod
+    def get_owner_gyms(owner_id, page=1, per_page=20, cursor=None, include_total=True, count=None):
+        """The owner's own gyms, in the same shape as the public listing."""
+        query = GymService._public_gym_query().filter(Gym.owner_id == owner_id)
+        try:
+            pagination = paginate(
+                query, [Gym.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count,
+                count_query=Gym.query.filter(Gym.owner_id == owner_id)
+            )
+        except InvalidCursor as e:
+            return None, str(e)
+
+        gyms_list = [
+            {
+                "id": gym.id,
+                "name": gym.name,
+                "location": gym.location,
+                "latitude": gym.latitude,
+                "longitude": gym.longitude,
+                "owner_id": gym.owner_id,
+                "owner_name": gym.owner_name
+            }
+            for gym in pagination["items"]
+        ]
+
+        return {"gyms": gyms_list, **pagination_meta(pagination)}, None
 
     # ---------------------- PUBLIC METHODS ----------------------
     @staticmethod
-    def get_all_gyms(page=1, per_page=20):
-        query = Gym.query
-        pagination = paginate_query(query, page, per_page)
+    def _public_gym_query():
+        """Gym columns with the owner's name joined in, for public listings."""
+        return db.session.query(
+            Gym.id, Gym.name, Gym.location, Gym.latitude, Gym.longitude,
+            Gym.owner_id, User.name.label("owner_name")
+        ).outerjoin(User, User.id == Gym.owner_id)
+
+    @staticmethod
+    def all_gyms_validators(**args):
+        """(ETag, Last-Modified) for get_all_gyms(**args), from the listing's version alone."""
+        version, updated_at = VersionService.get(GYMS)[GYMS]
+        return make_etag(GYMS, version, sorted(args.items())), updated_at
+
+    @staticmethod
+    def gym_validators(gym_id):
+        """(ETag, Last-Modified) for get_gym_by_id(gym_id), from the gym's version alone."""
+        name = gym_key(gym_id)
+        version, updated_at = VersionService.get(name)[name]
+        return make_etag(name, version), updated_at
+
+    @staticmethod
+    def get_all_gyms(page=1, per_page=20, cursor=None, include_total=True, count=None):
+        args = (page, per_page, cursor, include_total, count)
+        return cached(GYMS, args, lambda: GymService._load_all_gyms(*args))
+
+    @staticmethod
+    def _load_all_gyms(page, per_page, cursor, include_total, count):
+        query = GymService._public_gym_query()
+        try:
+            pagination = paginate(
+                query, [Gym.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count, count_query=Gym.query
+            )
+        except InvalidCursor as e:
+            return None, str(e)
 
         gyms_list = [
             {
                 "id": gym.id,
                 "name": gym.name,
                 "location": gym.location,
+                "latitude": gym.latitude,
+                "longitude": gym.longitude,
                 "owner_id": gym.owner_id,
-                "owner_name": gym.owner.name if gym.owner else None
+                "owner_name": gym.owner_name
             }
             for gym in pagination["items"]
         ]
 
-        return {
-            "gyms": gyms_list,
-            "total": pagination["total"],
-            "total_pages": pagination["total_pages"],
-            "page": pagination["page"],
-            "per_page": pagination["per_page"]
-        }
+        return {"gyms": gyms_list, **pagination_meta(pagination)}, None
 
     @staticmethod
     def get_gym_by_id(gym_id):
-        gym = Gym.query.get(gym_id)
+        return cached(gym_key(gym_id), None, lambda: GymService._load_gym(gym_id))
+
+    @staticmethod
+    def _load_gym(gym_id):
+        gym = GymService._public_gym_query().filter(Gym.id == gym_id).first()
         if not gym:
             return None, "Gym not found"
         return {
             "id": gym.id,
             "name": gym.name,
             "location": gym.location,
+            "latitude": gym.latitude,
+            "longitude": gym.longitude,
             "owner_id": gym.owner_id,
-            "owner_name": gym.owner.name if gym.owner else None
+            "owner_name": gym.owner_name
         }, None
 
+    @staticmethod
+    def get_nearby_gyms(lat, lon, radius_km=10, limit=20):
+        """
+        Gyms within `radius_km` of (lat, lon), nearest first. The geohash index
+        narrows candidates to the few cells covering the circle (one range scan
+        each); exact great-circle distances then filter and sort them.
+        """
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None, "lat must be within [-90, 90] and lon within [-180, 180]"
+        if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+            return None, f"radius must be between 0 and {MAX_NEARBY_RADIUS_KM} km"
+        limit = max(1, min(limit, MAX_NEARBY_RESULTS))
+
+        ranges = []
+        for prefix in geo.covering_prefixes(lat, lon, radius_km):
+            upper = geo.prefix_upper_bound(prefix)
+            # Plain range comparisons (not LIKE) so any B-tree/collation can serve them
+            ranges.append(and_(Gym.geohash >= prefix, Gym.geohash < upper) if upper else Gym.geohash >= prefix)
+        candidates = GymService._public_gym_query().filter(Gym.geohash.isnot(None), or_(*ranges))
+
+        nearby = []
+        for gym in candidates:
+            distance = geo.haversine_km(lat, lon, gym.latitude, gym.longitude)
+            if distance <= radius_km:
+                nearby.append((distance, gym))
+        nearby.sort(key=lambda item: (item[0], item[1].id))
+
+        gyms_list = [
+            {
+                "id": gym.id,
+                "name": gym.name,
+                "location": gym.location,
+                "latitude": gym.latitude,
+                "longitude": gym.longitude,
+                "owner_id": gym.owner_id,
+                "owner_name": gym.owner_name,
+                "distance_km": round(distance, 3)
+            }
+            for distance, gym in nearby[:limit]
+        ]
+        return {"gyms": gyms_list, "count": len(gyms_list), "radius_km": radius_km}, None
+
     # ---------------------- USER METHODS ----------------------
     @staticmethod
     def enroll_at_gym(data):
@@ -196,30 +332,44 @@ class GymService:
         if not gym_id:
             return None, "gym_id is required"
 
-        enrollment = GymEnrollment.query.filter_by(user_id=user.id, gym_id=gym_id, is_active=True).first()
+        enrollment = GymEnrollment.query.options(joinedload(GymEnrollment.gym)).filter_by(
+            user_id=user.id, gym_id=gym_id, is_active=True
+        ).first()
         if not enrollment:
             return None, "User is not enrolled in this gym"
 
+        gym_name = enrollment.gym.name
         enrollment.is_active = False
         db.session.commit()
-        return {"message": f"User {user.name} unenrolled from gym {enrollment.gym.name}"}, None
+        return {"message": f"User {user.name} unenrolled from gym {gym_name}"}, None
 
     @staticmethod
-    def get_my_gyms(page=1, per_page=20):
+    def get_my_gyms(page=1, per_page=20, cursor=None, include_total=True, count=None):
         user = getattr(request, "current_user", None)
         if not user:
             return None, "User not authenticated"
 
-        query = GymEnrollment.query.filter_by(user_id=user.id)
-        pagination = paginate_query(query, page, per_page)
+        base = GymEnrollment.query.filter(GymEnrollment.user_id == user.id)
+        query = base.with_entities(
+            GymEnrollment.id, GymEnrollment.gym_id, GymEnrollment.enrolled_at,
+            GymEnrollment.valid_till, GymEnrollment.is_active,
+            Gym.name, Gym.location, Gym.owner_id, User.name.label("owner_name")
+        ).join(Gym, Gym.id == GymEnrollment.gym_id).outerjoin(User, User.id == Gym.owner_id)
+        try:
+            pagination = paginate(
+                query, [GymEnrollment.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count, count_query=base
+            )
+        except InvalidCursor as e:
+            return None, str(e)
 
         gyms_list = [
             {
-                "id": e.gym.id,
-                "name": e.gym.name,
-                "location": e.gym.location,
-                "owner_id": e.gym.owner_id,
-                "owner_name": e.gym.owner.name if e.gym.owner else None,
+                "id": e.gym_id,
+                "name": e.name,
+                "location": e.location,
+                "owner_id": e.owner_id,
+                "owner_name": e.owner_name,
                 "enrolled_at": e.enrolled_at.isoformat(),
                 "valid_till": e.valid_till.isoformat() if e.valid_till else None,
                 "is_active": e.is_active
@@ -227,10 +377,4 @@ class GymService:
             for e in pagination["items"]
         ]
 
-        return {
-            "gyms": gyms_list,
-            "total": pagination["total"],
-            "total_pages": pagination["total_pages"],
-            "page": pagination["page"],
-            "per_page": pagination["per_page"]
-        }
+        return {"gyms": gyms_list, **pagination_meta(pagination)}, None
@@ -1,26 +1,33 @@
-# from passlib.context import CryptContext
-
-
-# class HashService:
-#     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-#     @classmethod
-#     def hash_password(cls, password: str) -> str:
-#         return cls.pwd_context.hash(password)
-
-#     @classmethod
-#     def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
-#         return cls.pwd_context.verify(plain_password, hashed_password)
-
-
-from passlib.hash import pbkdf2_sha256
+from flask import current_app
+from app.utils.password_pool import get_password_pool
 
 class HashService:
+    """
+    Password hashing for request handlers, run in the password process pool with
+    the configured PASSWORD_HASH_ROUNDS. Methods raise PasswordPoolError (busy,
+    timed out or crashed) under load.
+    """
 
     @staticmethod
     def hash_password(password: str) -> str:
-        return pbkdf2_sha256.hash(password)
+        return get_password_pool(current_app.config).hash(
+            password, current_app.config["PASSWORD_HASH_ROUNDS"]
+        )
+
+    @staticmethod
+    def hash_passwords(passwords) -> list:
+        """Hash a batch across the pool's workers (bulk imports)."""
+        return get_password_pool(current_app.config).hash_many(
+            passwords, current_app.config["PASSWORD_HASH_ROUNDS"]
+        )
 
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
-        return pbkdf2_sha256.verify(password, hashed)
+        return HashService.verify_and_update(password, hashed)[0]
+
+    @staticmethod
+    def verify_and_update(password: str, hashed: str):
+        """(valid, new_hash): new_hash is set when `hashed` predates the current policy."""
+        return get_password_pool(current_app.config).verify_and_update(
+            password, hashed, current_app.config["PASSWORD_HASH_ROUNDS"]
+        )
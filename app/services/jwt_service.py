@@ -1,28 +1,136 @@
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
+import calendar
+import hashlib
+import time
+import uuid
+from flask import current_app, has_app_context
+from jose import jwt, JWTError, ExpiredSignatureError
 from app.config.settings import Config
+from app.utils.token_revocation import get_revocation_backend
+from app.utils.ttl_cache import TTLCache
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+def _config(name, default):
+    return current_app.config.get(name, default) if has_app_context() else getattr(Config, name, default)
+
+
+def _epoch(value):
+    return calendar.timegm(value.utctimetuple()) if value else None
+
+
+# Verified payloads by token digest, kept until the token's exp. Only tokens that
+# passed signature/expiry checks get in, so a lookup hit is as good as a decode.
+_decode_cache = TTLCache(max_entries=Config.JWT_DECODE_CACHE_SIZE)
 
 
 class JWTService:
     SECRET_KEY = Config.JWT_SECRET
     ALGORITHM = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
     @classmethod
-    def create_access_token(cls, data: dict) -> str:
-        """Generate JWT token with expiry."""
-        to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(minutes=cls.ACCESS_TOKEN_EXPIRE_MINUTES)
+    def access_ttl(cls):
+        return int(_config("ACCESS_TOKEN_TTL_MINUTES", 15)) * 60
 
-        to_encode["exp"] = expire
-        token = jwt.encode(to_encode, cls.SECRET_KEY, algorithm=cls.ALGORITHM)
-        return token
+    @classmethod
+    def refresh_ttl(cls):
+        return int(_config("REFRESH_TOKEN_TTL_DAYS", 30)) * 86400
+
+    @classmethod
+    def _encode(cls, claims, typ, ttl):
+        now = time.time()
+        # float iat: a token issued in the same second as a revocation must still be told apart
+        claims = {**claims, "typ": typ, "iat": now, "exp": int(now + ttl)}
+        return jwt.encode(claims, cls.SECRET_KEY, algorithm=cls.ALGORITHM)
+
+    @classmethod
+    def create_token_pair(cls, user) -> dict:
+        """
+        Short-lived access token carrying the claims auth needs (role, status,
+        subscription/trial expiry), so the middleware can trust it without a DB
+        read, plus a long-lived refresh token that only identifies the user.
+        """
+        access_token = cls._encode({
+            "user_id": user.id,
+            "name": user.name,
+            "role": user.role,
+            "is_active": user.is_active,
+            "is_subscription_active": user.is_subscription_active,
+            "trial_ends_at": _epoch(user.trial_ends_at),
+        }, ACCESS, cls.access_ttl())
+        refresh_token = cls._encode(
+            {"user_id": user.id, "jti": uuid.uuid4().hex}, REFRESH, cls.refresh_ttl()
+        )
+        return {
+            "token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "Bearer",
+            "expires_in": cls.access_ttl(),
+        }
 
     @classmethod
     def decode_token(cls, token: str) -> dict:
         """Decode JWT token and return payload."""
+        payload, _ = cls.verify_token(token)
+        return payload
+
+    @classmethod
+    def verify_token(cls, token: str):
+        """
+        Decode JWT token; returns (payload, error) with error 'Token expired' or 'Invalid token'.
+        Repeat presentations of a token are served from the decode cache until it expires.
+        """
+        use_cache = _decode_cache.max_entries > 0
+        if use_cache:
+            key = hashlib.sha256(token.encode()).digest()
+            payload = _decode_cache.get(key)
+            if payload is not None:
+                if payload["exp"] > time.time():
+                    return dict(payload), None
+                _decode_cache.delete(key)
+                return None, "Token expired"
+
         try:
             payload = jwt.decode(token, cls.SECRET_KEY, algorithms=[cls.ALGORITHM])
-            return payload
+        except ExpiredSignatureError:
+            return None, "Token expired"
         except JWTError:
-            return None
+            return None, "Invalid token"
+
+        ttl = payload.get("exp", 0) - time.time() if isinstance(payload.get("exp"), (int, float)) else 0
+        if use_cache and ttl > 0:
+            _decode_cache.set(key, dict(payload), ttl)
+        return payload, None
+
+    @classmethod
+    def decode_cache_stats(cls):
+        """Hit/miss counters and size of this process's decode cache."""
+        return _decode_cache.stats()
+
+    @classmethod
+    def clear_decode_cache(cls):
+        _decode_cache.clear()
+
+    # ---------------- revocation ----------------
+    @classmethod
+    def is_revoked(cls, claims) -> bool:
+        # per-user cutoffs only void access tokens: refresh re-reads the user from the DB anyway
+        user_id = claims.get("user_id") if claims.get("typ") == ACCESS else None
+        return get_revocation_backend(current_app.config).is_revoked(
+            user_id, claims.get("jti"), claims.get("iat", 0)
+        )
+
+    @classmethod
+    def revoke_user_tokens(cls, user_id):
+        """
+        Void every access token issued to `user_id` so far. Call after changing
+        anything the access claims carry; the client's next refresh picks up
+        the new values from the DB.
+        """
+        get_revocation_backend(current_app.config).revoke_user(user_id, cls.access_ttl())
+
+    @classmethod
+    def revoke_refresh_token(cls, claims):
+        ttl = max(claims.get("exp", 0) - time.time(), 1)
+        get_revocation_backend(current_app.config).revoke_token(claims["jti"], ttl)
@@ -0,0 +1,307 @@
+import csv
+import os
+import shutil
+import uuid
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from flask import current_app
+from app.extensions import db
+from app.models.gym import Gym
+from app.models.gym_enrollment import GymEnrollment
+from app.models.user import User
+from app.services.hash_service import HashService
+from app.services.jwt_service import JWTService
+from app.services.principal_service import PrincipalService
+from app.services.report_job_service import ReportJobService
+from app.services.search_service import SearchService
+from app.services.version_service import VersionService, user_key
+from app.utils.password_pool import PasswordPoolError
+from app.utils.response_cache import invalidate_on_commit
+from app.utils.upsert import insert_on_conflict_do_nothing
+
+REQUIRED_COLUMNS = ("name", "email")
+OPTIONAL_COLUMNS = ("password", "phone", "gym_id", "enrolled_at", "valid_till")
+REPORT_FIELDS = ("row", "email", "status", "detail")
+
+
+class _Row:
+    __slots__ = ("number", "name", "email", "password", "phone", "gym_id", "enrolled_at",
+                 "valid_till", "user_id", "status", "detail")
+
+    def __init__(self, number):
+        self.number = number
+        self.status = None
+        self.detail = ""
+
+    def fail(self, message):
+        self.status, self.detail = "error", message
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _parse(number, record):
+    row = _Row(number)
+    row.name = (record.get("name") or "").strip()
+    row.email = (record.get("email") or "").lower().strip()
+    row.password = record.get("password") or None
+    row.phone = (record.get("phone") or "").strip() or None
+    try:
+        row.gym_id = int(record["gym_id"]) if (record.get("gym_id") or "").strip() else None
+        row.enrolled_at = _parse_date((record.get("enrolled_at") or "").strip())
+        row.valid_till = _parse_date((record.get("valid_till") or "").strip())
+    except ValueError:
+        row.fail("gym_id must be an integer and dates ISO 8601")
+        return row
+
+    if not row.name or not row.email:
+        row.fail("name and email are required")
+    elif "@" not in row.email:
+        row.fail("invalid email")
+    return row
+
+
+class MemberImportService:
+    """
+    Bulk member onboarding from CSV (columns: name, email and optionally
+    password, phone, gym_id, enrolled_at, valid_till; one row per enrollment).
+
+    Rows are read as a stream and handled in batches of `batch_size`, each in
+    one transaction: a handful of IN lookups, new users' passwords hashed in
+    parallel on the password pool, then multi-row INSERTs for new users and
+    enrollments and bulk UPDATEs for changed ones. Memory stays flat whatever
+    the file size. Users are matched on email: existing ones get name/phone
+    updated (never password or role); enrollments are matched on active
+    (user, gym) pairs, so re-running an import is idempotent.
+    """
+
+    @staticmethod
+    def import_csv(lines, batch_size=1000, on_row=None):
+        """
+        Import from an iterable of CSV lines (an open text file, a request stream
+        wrapper, ...). `on_row(row_number, email, status, detail)` is called for
+        every data row, in order, with status created/updated/unchanged/error.
+        Returns ({status: count}, None) or (None, error) if the header is unusable.
+        """
+        reader = csv.DictReader(lines)
+        columns = {c.strip().lower() for c in reader.fieldnames or []}
+        missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            return None, f"CSV is missing required column(s): {', '.join(missing)}"
+        reader.fieldnames = [c.strip().lower() for c in reader.fieldnames]
+
+        summary = {}
+        known_gyms = {}
+        records = enumerate(reader, start=2)  # row 1 is the header
+        while True:
+            batch = [_parse(number, record) for number, record in islice(records, batch_size)]
+            if not batch:
+                break
+            MemberImportService._import_batch(batch, known_gyms)
+            for row in batch:
+                summary[row.status] = summary.get(row.status, 0) + 1
+                if on_row:
+                    on_row(row.number, row.email, row.status, row.detail)
+        return summary, None
+
+    @staticmethod
+    def import_file(path, report_path=None, batch_size=1000):
+        """Import a CSV file, optionally writing a per-row report CSV; returns (summary, error)."""
+        with open(path, newline="", encoding="utf-8-sig") as source:
+            if not report_path:
+                return MemberImportService.import_csv(source, batch_size)
+            with open(report_path, "w", newline="", encoding="utf-8") as report:
+                writer = csv.writer(report)
+                writer.writerow(REPORT_FIELDS)
+                return MemberImportService.import_csv(
+                    source, batch_size, on_row=lambda *result: writer.writerow(result)
+                )
+
+    # ------------------- BACKGROUND JOBS -------------------
+    @staticmethod
+    def submit(stream, admin_id):
+        """Spool an uploaded CSV to IMPORT_DIR and queue it as a member_import job."""
+        import_dir = current_app.config["IMPORT_DIR"]
+        os.makedirs(import_dir, exist_ok=True)
+        path = os.path.join(import_dir, f"{uuid.uuid4().hex}.csv")
+        with open(path, "wb") as f:
+            shutil.copyfileobj(stream, f, 64 * 1024)
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+            return None, "CSV file is empty"
+
+        params = {"source_path": path, "batch_size": current_app.config["IMPORT_BATCH_SIZE"]}
+        return ReportJobService.submit("member_import", params, requested_by=admin_id)
+
+    @staticmethod
+    def get_status(job_id):
+        """Job status, plus per-status row counts once the report is written."""
+        job, error = ReportJobService.get_job(job_id, kind="member_import")
+        if error:
+            return None, error
+        status = job.to_dict()
+        status.pop("params", None)  # server-side paths
+        if job.status == "done" and job.artifact_path and os.path.exists(job.artifact_path):
+            summary = {}
+            with open(job.artifact_path, newline="", encoding="utf-8") as report:
+                for row in csv.DictReader(report):
+                    summary[row["status"]] = summary.get(row["status"], 0) + 1
+            status["summary"] = summary
+        return status, None
+
+    # ------------------- ONE BATCH -------------------
+    @staticmethod
+    def _import_batch(batch, known_gyms):
+        rows = [row for row in batch if row.status is None]
+        try:
+            changed = MemberImportService._upsert_users(rows)
+            MemberImportService._upsert_enrollments(rows, known_gyms)
+            db.session.commit()
+        except PasswordPoolError as e:
+            db.session.rollback()
+            for row in rows:
+                row.fail(f"password hashing failed: {e}")
+        except SQLAlchemyError as e:
+            # Someone changed the same users mid-import; the next run picks these up
+            db.session.rollback()
+            for row in rows:
+                row.fail(f"batch rolled back: {e.__class__.__name__}")
+        else:
+            # Only once the new name/phone is committed, as update_profile does: a
+            # rolled-back batch must leave sessions and cached principals alone
+            for user_id in changed:
+                PrincipalService.invalidate(user_id)
+                JWTService.revoke_user_tokens(user_id)
+
+    @staticmethod
+    def _upsert_users(rows):
+        # One user per email per batch; later rows for it only add enrollments
+        first = {}
+        for row in rows:
+            first.setdefault(row.email, row)
+
+        existing = {
+            u.email: u for u in db.session.query(User.id, User.email, User.name, User.phone)
+            .filter(User.email.in_(list(first)))
+        }
+        phones = [row.phone for row in first.values() if row.phone]
+        phone_owner = dict(
+            db.session.query(User.phone, User.email).filter(User.phone.in_(phones))
+        ) if phones else {}
+
+        new, changed = [], []
+        for email, row in first.items():
+            if row.phone:
+                owner = phone_owner.get(row.phone)
+                if owner is not None and owner != email:
+                    row.fail("phone already belongs to another user")
+                    continue
+                phone_owner[row.phone] = email
+            user = existing.get(email)
+            if user is None:
+                if not row.password:
+                    row.fail("password is required for new users")
+                    continue
+                new.append(row)
+            elif user.name != row.name or (row.phone and user.phone != row.phone):
+                changed.append((user.id, row))
+            else:
+                row.status = "unchanged"
+
+        user_ids = {email: u.id for email, u in existing.items()}
+        indexed = []
+        if new:
+            hashes = HashService.hash_passwords([row.password for row in new])
+            now = datetime.utcnow()
+            stmt = insert_on_conflict_do_nothing(db.session, User, [
+                {
+                    "name": row.name, "email": row.email, "phone": row.phone, "password": hashed,
+                    "role": "user", "is_active": True, "is_subscription_active": False,
+                    "created_at": now, "updated_at": now,
+                }
+                for row, hashed in zip(new, hashes)
+            ], ["email"]).returning(User.id, User.email)
+            created = dict((email, user_id) for user_id, email in db.session.execute(stmt))
+            for row in new:
+                if row.email in created:
+                    user_ids[row.email] = created[row.email]
+                    row.status = "created"
+                    indexed.append((created[row.email], row.name, row.email, row.phone))
+                else:
+                    row.fail("email was registered while importing")
+
+        if changed:
+            db.session.execute(update(User), [
+                {"id": user_id, "name": row.name, "phone": row.phone or existing[row.email].phone,
+                 "updated_at": datetime.utcnow()}
+                for user_id, row in changed
+            ])
+            for user_id, row in changed:
+                row.status = "updated"
+                indexed.append((user_id, row.name, row.email, row.phone or existing[row.email].phone))
+        SearchService.index_users(indexed)
+        if changed:
+            VersionService.bump_owned_gyms([user_id for user_id, _ in changed])
+            invalidate_on_commit(db.session, *(user_key(user_id) for user_id, _ in changed))
+
+        # Follow-up rows share their email's outcome
+        for row in rows:
+            lead = first[row.email]
+            if row is not lead:
+                row.status, row.detail = ("error", lead.detail) if lead.status == "error" else ("unchanged", "")
+            row.user_id = None if row.status == "error" else user_ids.get(row.email)
+        return [user_id for user_id, _ in changed]
+
+    @staticmethod
+    def _upsert_enrollments(rows, known_gyms):
+        wanted = [row for row in rows if row.status != "error" and row.gym_id is not None]
+        unknown = {row.gym_id for row in wanted} - set(known_gyms)
+        if unknown:
+            found = {gym_id for (gym_id,) in db.session.query(Gym.id).filter(Gym.id.in_(unknown))}
+            known_gyms.update((gym_id, gym_id in found) for gym_id in unknown)
+
+        pairs = {}
+        for row in wanted:
+            if not known_gyms[row.gym_id]:
+                row.fail(f"gym {row.gym_id} not found")
+            else:
+                pairs.setdefault((row.user_id, row.gym_id), row)
+        if not pairs:
+            return
+
+        active = {
+            (e.user_id, e.gym_id): e for e in db.session.query(
+                GymEnrollment.id, GymEnrollment.user_id, GymEnrollment.gym_id, GymEnrollment.valid_till
+            ).filter(
+                tuple_(GymEnrollment.user_id, GymEnrollment.gym_id).in_(list(pairs)),
+                GymEnrollment.is_active.is_(True)
+            )
+        }
+
+        now = datetime.utcnow()
+        to_insert, to_update = [], []
+        for (user_id, gym_id), row in pairs.items():
+            current = active.get((user_id, gym_id))
+            if current is None:
+                to_insert.append({
+                    "user_id": user_id, "gym_id": gym_id, "enrolled_at": row.enrolled_at or now,
+                    "valid_till": row.valid_till, "is_active": True,
+                })
+                row.detail = f"enrolled in gym {gym_id}"
+            elif row.valid_till and current.valid_till != row.valid_till:
+                to_update.append({"id": current.id, "valid_till": row.valid_till})
+                row.detail = f"gym {gym_id} enrollment extended"
+            else:
+                continue
+            if row.status == "unchanged":
+                row.status = "updated"
+
+        if to_insert:
+            # Core executemany (the ORM splits batches wherever a value is None):
+            # SQLAlchemy sends these as multi-row INSERT ... VALUES
+            db.session.execute(insert(GymEnrollment.__table__), to_insert)
+        if to_update:
+            db.session.execute(update(GymEnrollment), to_update)
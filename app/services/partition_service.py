@@ -0,0 +1,111 @@
+import re
+from datetime import date
+from sqlalchemy import text
+from app.extensions import db
+
+PARENT = "attendance"
+PARTITION_NAME = re.compile(r"^attendance_(\d{4})_(\d{2})$")
+
+
+def month_start(day, offset=0):
+    """First day of the month `offset` months after the one containing `day`."""
+    index = day.year * 12 + (day.month - 1) + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_{month.year:04d}_{month.month:02d}"
+
+
+class PartitionService:
+    """
+    Maintenance for the monthly range partitions of `attendance` (Postgres only).
+    Partitions are keyed on the `date` column and named attendance_YYYY_MM;
+    rows outside every month land in attendance_default.
+    """
+
+    @staticmethod
+    def is_supported():
+        return db.engine.dialect.name == "postgresql"
+
+    @staticmethod
+    def list_partitions():
+        rows = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent ORDER BY c.relname"
+        ), {"parent": PARENT})
+        return [r.relname for r in rows]
+
+    @staticmethod
+    def create_partition(month):
+        """
+        Create the partition for `month` if it's missing. Rows for that month that
+        already fell into the default partition are moved into the new one.
+        """
+        name = partition_name(month)
+        start, end = month, month_start(month, 1)
+        bounds = {"start": start, "end": end}
+
+        exists = db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists:
+            return False
+
+        stray = db.session.execute(text(
+            f"SELECT 1 FROM {PARENT}_default WHERE date >= :start AND date < :end LIMIT 1"
+        ), bounds).first()
+
+        if not stray:
+            db.session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        else:
+            # ATTACH would fail while the default partition holds rows for the range
+            db.session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+            db.session.execute(text(
+                f"WITH moved AS (DELETE FROM {PARENT}_default WHERE date >= :start AND date < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), bounds)
+            db.session.execute(text(
+                f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def ensure_future_partitions(months_ahead=3, today=None):
+        """Make sure the current month and the next `months_ahead` months have partitions."""
+        today = today or date.today()
+        created = []
+        for offset in range(months_ahead + 1):
+            month = month_start(today, offset)
+            if PartitionService.create_partition(month):
+                created.append(partition_name(month))
+        return created
+
+    @staticmethod
+    def retire_partitions(retain_months, archive_schema=None, drop=False, today=None):
+        """
+        Detach partitions older than `retain_months` full months. Detached tables
+        are moved to `archive_schema` if given, dropped if `drop`, or left in place
+        as plain tables otherwise.
+        """
+        cutoff = month_start(today or date.today(), -retain_months)
+        retired = []
+        for name in PartitionService.list_partitions():
+            match = PARTITION_NAME.match(name)
+            if not match or date(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+                continue
+
+            db.session.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if drop:
+                db.session.execute(text(f"DROP TABLE {name}"))
+            elif archive_schema:
+                db.session.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+                db.session.execute(text(f'ALTER TABLE {name} SET SCHEMA "{archive_schema}"'))
+            db.session.commit()
+            retired.append(name)
+        return retired
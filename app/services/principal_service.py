@@ -0,0 +1,124 @@
+from datetime import datetime
+from flask import current_app, has_app_context
+from app.extensions import db
+from app.models.user import User
+from app.utils.ttl_cache import TTLCache
+
+PRINCIPAL_FIELDS = (
+    "id", "name", "email", "phone", "role", "is_active",
+    "is_subscription_active", "trial_started_at", "trial_ends_at",
+)
+
+
+class Principal:
+    """
+    Read-only snapshot of the authenticated user, detached from any session.
+    Exposes the same attributes as `User` for the fields auth and the services
+    read; load the ORM object by id before changing anything.
+    """
+
+    __slots__ = PRINCIPAL_FIELDS
+
+    def __init__(self, **values):
+        for field in PRINCIPAL_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is read-only; update the User row instead")
+
+    def __repr__(self):
+        return f"<Principal {self.id} {self.role}>"
+
+
+# Fields an access token carries (see JWTService.create_token_pair)
+CLAIM_FIELDS = ("id", "name", "role", "is_active", "is_subscription_active", "trial_ends_at")
+
+
+class ClaimsPrincipal:
+    """
+    Principal built from access token claims, with no DB read. Fields the token
+    doesn't carry (email, phone, ...) load the cached Principal on first use, so
+    it can stand in for `Principal` everywhere.
+    """
+
+    __slots__ = CLAIM_FIELDS + ("_full",)
+
+    def __init__(self, **values):
+        for field in CLAIM_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+
+    def __getattr__(self, name):
+        if name not in PRINCIPAL_FIELDS:
+            raise AttributeError(name)
+        try:
+            full = object.__getattribute__(self, "_full")
+        except AttributeError:
+            full = PrincipalService.get(self.id)
+            object.__setattr__(self, "_full", full)
+        return getattr(full, name) if full is not None else None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is read-only; update the User row instead")
+
+    def __repr__(self):
+        return f"<ClaimsPrincipal {self.id} {self.role}>"
+
+
+_cache = TTLCache(max_entries=10_000)
+
+
+def _config(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+class PrincipalService:
+    """
+    Per-process cache of authenticated principals, so `token_required` doesn't hit
+    the users table on every request. Entries live for PRINCIPAL_CACHE_TTL_SECONDS;
+    writes to a user in this process invalidate them immediately, other processes
+    see the change once their entry expires.
+    """
+
+    @staticmethod
+    def get(user_id):
+        """Return the Principal for `user_id`, or None if the user doesn't exist."""
+        if user_id is None:
+            return None
+        principal = _cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        row = db.session.query(*[getattr(User, f) for f in PRINCIPAL_FIELDS]).filter(
+            User.id == user_id
+        ).first()
+        if row is None:
+            return None
+        principal = Principal(**row._asdict())
+        _cache.set(user_id, principal, _config("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+        return principal
+
+    @staticmethod
+    def from_claims(claims):
+        """Principal for a verified access token, straight from its claims."""
+        trial_ends_at = claims.get("trial_ends_at")
+        return ClaimsPrincipal(
+            id=claims.get("user_id"),
+            name=claims.get("name"),
+            role=claims.get("role"),
+            is_active=claims.get("is_active"),
+            is_subscription_active=claims.get("is_subscription_active"),
+            trial_ends_at=datetime.utcfromtimestamp(trial_ends_at) if trial_ends_at is not None else None,
+        )
+
+    @staticmethod
+    def invalidate(user_id):
+        _cache.delete(user_id)
+
+    @staticmethod
+    def clear():
+        _cache.clear()
+
+    @staticmethod
+    def stats():
+        """Hit/miss counters and current size of this process's cache."""
+        return _cache.stats()
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.report_job import ReportJob
+from app.models.gym import Gym
+from app.jobs.broker import get_broker
+from app.jobs.worker import ensure_local_worker
+
+
+def _render_attendance_pdf(params, path):
+    from app.services.attendance_service import AttendanceService
+
+    chunks, error = AttendanceService.stream_pdf(
+        params["gym_id"],
+        params.get("user_id"),
+        datetime.fromisoformat(params["start_date"]) if params.get("start_date") else None,
+        datetime.fromisoformat(params["end_date"]) if params.get("end_date") else None,
+    )
+    if error:
+        return error
+
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return None
+
+
+def _run_member_import(params, path):
+    from app.services.member_import_service import MemberImportService
+
+    source = params["source_path"]
+    _, error = MemberImportService.import_file(source, path, params.get("batch_size", 1000))
+    # A failed import keeps its upload in IMPORT_DIR, to inspect or re-run
+    if not error and os.path.exists(source):
+        os.remove(source)
+    return error
+
+
+# kind -> (handler(params, path) returning an error or None, artifact extension)
+JOB_HANDLERS = {
+    "attendance_pdf": (_render_attendance_pdf, "pdf"),
+    "member_import": (_run_member_import, "csv"),
+}
+
+
+def dedupe_key(kind, params):
+    payload = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportJobService:
+
+    # ------------------- SUBMIT -------------------
+    @staticmethod
+    def submit(kind, params, requested_by=None):
+        """
+        Queue a report job, or hand back the existing one for identical params
+        while it is still queued/running (within REPORT_JOB_TIMEOUT_MINUTES) or
+        its artifact is fresh.
+        """
+        if kind not in JOB_HANDLERS:
+            return None, "Unknown job kind"
+
+        key = dedupe_key(kind, params)
+        existing = ReportJob.query.filter_by(dedupe_key=key).first()
+        if existing:
+            if ReportJobService._reusable(existing):
+                return existing.to_dict(), None
+            if existing.status in ("queued", "running"):
+                # Its worker or message was lost: fail it rather than wait forever
+                existing.status = "failed"
+                existing.error = "Job timed out"
+                existing.finished_at = datetime.utcnow()
+            ReportJobService._drop_artifact(existing)
+            # Failed or stale: release the key so a fresh job can take it
+            existing.dedupe_key = None
+            db.session.commit()
+
+        job = ReportJob(kind=kind, params=params, dedupe_key=key, requested_by=requested_by)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Someone queued the same report between our check and insert
+            db.session.rollback()
+            existing = ReportJob.query.filter_by(dedupe_key=key).first()
+            return existing.to_dict(), None
+
+        ReportJobService._publish(job.id)
+        return job.to_dict(), None
+
+    @staticmethod
+    def submit_attendance_pdf(owner_id, gym_id, user_id=None, start_date=None, end_date=None):
+        gym = Gym.query.get(gym_id)
+        if not gym:
+            return None, "Gym not found"
+        if gym.owner_id != owner_id:
+            return None, "Access denied: Not gym owner"
+
+        params = {
+            "gym_id": gym_id,
+            "user_id": user_id,
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+        }
+        return ReportJobService.submit("attendance_pdf", params, requested_by=owner_id)
+
+    @staticmethod
+    def _reusable(job):
+        if job.status in ("queued", "running"):
+            since = job.started_at if job.status == "running" else job.created_at
+            timeout = timedelta(minutes=current_app.config["REPORT_JOB_TIMEOUT_MINUTES"])
+            return since is not None and datetime.utcnow() - since < timeout
+        if job.status != "done" or not job.artifact_path or not os.path.exists(job.artifact_path):
+            return False
+        ttl = timedelta(minutes=current_app.config["REPORT_RESULT_TTL_MINUTES"])
+        return job.finished_at and datetime.utcnow() - job.finished_at < ttl
+
+    @staticmethod
+    def _drop_artifact(job):
+        if job.artifact_path:
+            if os.path.exists(job.artifact_path):
+                os.remove(job.artifact_path)
+            job.artifact_path = None
+
+    @staticmethod
+    def sweep_artifacts(limit=500):
+        """
+        Delete the files of finished jobs older than REPORT_RESULT_TTL_MINUTES
+        (their downloads then report the job as expired). Returns how many went.
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=current_app.config["REPORT_RESULT_TTL_MINUTES"])
+        jobs = ReportJob.query.filter(
+            ReportJob.artifact_path.isnot(None), ReportJob.finished_at < cutoff
+        ).order_by(ReportJob.finished_at).limit(limit).all()
+        for job in jobs:
+            ReportJobService._drop_artifact(job)
+        db.session.commit()
+        return len(jobs)
+
+    @staticmethod
+    def _publish(job_id):
+        broker = get_broker(current_app.config)
+        if current_app.config.get("JOB_BROKER", "memory") == "memory":
+            ensure_local_worker(current_app._get_current_object(), broker)
+        broker.publish(job_id)
+
+    # ------------------- STATUS / ARTIFACT -------------------
+    @staticmethod
+    def get_job(job_id, owner_id=None, kind="attendance_pdf"):
+        """
+        Job of `kind`. Attendance reports are visible to the owner of the gym they
+        report on; other kinds are admin jobs, guarded by the route.
+        """
+        job = ReportJob.query.get(job_id)
+        if not job or job.kind != kind:
+            return None, "Job not found"
+        if kind == "attendance_pdf":
+            gym = Gym.query.get(job.params.get("gym_id"))
+            if not gym or gym.owner_id != owner_id:
+                return None, "Job not found"
+        return job, None
+
+    @staticmethod
+    def get_status(job_id, owner_id=None, kind="attendance_pdf"):
+        job, error = ReportJobService.get_job(job_id, owner_id, kind)
+        if error:
+            return None, error
+        return job.to_dict(), None
+
+    @staticmethod
+    def get_artifact(job_id, owner_id=None, kind="attendance_pdf"):
+        job, error = ReportJobService.get_job(job_id, owner_id, kind)
+        if error:
+            return None, error
+        if job.status != "done":
+            return None, f"Job is {job.status}"
+        if not job.artifact_path or not os.path.exists(job.artifact_path):
+            return None, "Report has expired, please submit it again"
+        return job.artifact_path, None
+
+    # ------------------- WORKER -------------------
+    @staticmethod
+    def run_job(job_id):
+        """Render one job's artifact. Called by workers inside an app context."""
+        # Claim with one conditional UPDATE: of two workers handed the same job
+        # (redelivery after a crash, duplicate publish) only one gets a row back
+        claimed = ReportJob.query.filter_by(id=job_id, status="queued").update(
+            {ReportJob.status: "running", ReportJob.started_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        if not claimed:
+            return
+        job = db.session.get(ReportJob, job_id)
+
+        handler, extension = JOB_HANDLERS[job.kind]
+        report_dir = current_app.config["REPORT_DIR"]
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"{job.id}.{extension}")
+        partial = path + ".part"
+
+        try:
+            error = handler(job.params, partial)
+            if not error:
+                os.replace(partial, path)
+        except Exception as e:
+            db.session.rollback()
+            error = f"Report failed: {e}"
+
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        job = ReportJob.query.get(job_id)
+        job.finished_at = datetime.utcnow()
+        if error:
+            job.status = "failed"
+            job.error = error
+            job.dedupe_key = None
+        else:
+            job.status = "done"
+            job.artifact_path = path
+        db.session.commit()
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Integer, bindparam, case, cast, distinct, func, text, tuple_
+from app.extensions import db
+from app.models.attendance import Attendance
+from app.models.attendance_rollup import AttendanceDailyRollup, HOURS, HOUR_COLUMNS
+from app.models.gym import Gym
+from app.utils.upsert import insert_on_conflict_do_update
+
+COUNT_COLUMNS = ["checkins", "unique_users", *HOUR_COLUMNS]
+# Rows per executemany of the upsert
+UPSERT_CHUNK = 500
+DEFAULT_REBUILD_CHUNK_DAYS = 7
+MAX_DAILY_RANGE_DAYS = 731
+
+# (dialect, mode) -> upsert taking each row as bound parameters; built once,
+# since constructing and compiling 28 columns and their SET clause costs more
+# than running it
+_statements = {}
+
+
+def _hour(column):
+    """UTC hour (0-23) of a timestamp column, as an integer expression."""
+    if db.session.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%H", column), Integer)
+    return cast(func.extract("hour", column), Integer)
+
+
+def _lock_rollup():
+    """
+    Hold off `record` writers until the current transaction ends, so a gym-day
+    recomputed from attendance can't overwrite a check-in added meanwhile.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Conflicts with the ROW EXCLUSIVE lock every INSERT/UPDATE takes; readers pass
+        db.session.execute(text("LOCK TABLE attendance_daily_rollup IN SHARE ROW EXCLUSIVE MODE"))
+    elif dialect == "sqlite":
+        # Any write statement takes SQLite's database-wide write lock
+        db.session.execute(text("UPDATE attendance_daily_rollup SET checkins = checkins WHERE 0"))
+
+
+def _empty_row(gym_id, day):
+    return {"gym_id": gym_id, "date": day, **dict.fromkeys(COUNT_COLUMNS, 0)}
+
+
+def _upsert(rows, mode):
+    """Write rollup rows: mode "add" adds them to the stored counters, "replace" overwrites them."""
+    key = (db.session.get_bind().dialect.name, mode)
+    stmt = _statements.get(key)
+    if stmt is None:
+        table = AttendanceDailyRollup.__table__
+        if mode == "add":
+            def set_(excluded):
+                return {name: table.c[name] + excluded[name] for name in COUNT_COLUMNS}
+        else:
+            def set_(excluded):
+                return {name: excluded[name] for name in COUNT_COLUMNS}
+        stmt = _statements[key] = insert_on_conflict_do_update(
+            db.session, table, {name: bindparam(name) for name in ["gym_id", "date", *COUNT_COLUMNS]},
+            ["gym_id", "date"], set_
+        )
+    rows = sorted(rows, key=lambda r: (r["gym_id"], r["date"]))  # one lock order for concurrent writers
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        db.session.execute(stmt, rows[start:start + UPSERT_CHUNK])
+
+
+class RollupService:
+    """
+    attendance_daily_rollup: one row per gym per UTC day, so dashboards and
+    reports over a period read O(days) rows instead of every check-in.
+
+    Check-in paths call `record` in their own transaction with the rows they
+    actually inserted; it adds them with one INSERT ... ON CONFLICT DO UPDATE
+    (counter = counter + excluded.counter). `rebuild` recomputes a date range
+    from `attendance` for the initial backfill and to repair drift.
+    """
+
+    @staticmethod
+    def record(checkins):
+        """Add newly inserted check-ins, given as (gym_id, date, timestamp), to their gym-days."""
+        totals = {}
+        for gym_id, day, timestamp in checkins:
+            row = totals.get((gym_id, day))
+            if row is None:
+                row = totals[(gym_id, day)] = _empty_row(gym_id, day)
+            row["checkins"] += 1
+            row["unique_users"] += 1  # one attendance row per member per gym-day
+            row[HOUR_COLUMNS[timestamp.hour]] += 1
+        if totals:
+            _upsert(totals.values(), "add")
+
+    # ------------------- BACKFILL / RECONCILE -------------------
+    @staticmethod
+    def _aggregate(start, end):
+        """(gym_id, date) -> rollup row computed from attendance for start..end."""
+        hour = _hour(Attendance.timestamp)
+        query = db.session.query(
+            Attendance.gym_id, Attendance.date,
+            func.count(Attendance.id).label("checkins"),
+            func.count(distinct(Attendance.user_id)).label("unique_users"),
+            *[func.sum(case((hour == h, 1), else_=0)).label(name) for h, name in zip(HOURS, HOUR_COLUMNS)]
+        ).filter(
+            Attendance.date >= start, Attendance.date <= end, Attendance.gym_id.isnot(None)
+        ).group_by(Attendance.gym_id, Attendance.date)
+        return {(r.gym_id, r.date): {"gym_id": r.gym_id, "date": r.date, **{c: getattr(r, c) for c in COUNT_COLUMNS}}
+                for r in query}
+
+    @staticmethod
+    def rebuild(start=None, end=None, chunk_days=DEFAULT_REBUILD_CHUNK_DAYS, dry_run=False, on_chunk=None):
+        """
+        Recompute the rollup for start..end (default: first check-in .. today),
+        one transaction per `chunk_days` days. Only rows that differ are written
+        and rows with no check-ins left are removed. Each chunk locks the rollup
+        against `record` before attendance is read, so check-ins landing
+        meanwhile wait for the chunk to commit and are counted exactly once,
+        including on gym-days that have no row yet. A dry run takes no lock.
+        Returns totals: days, rows (gym-days found), written, removed.
+        """
+        if chunk_days < 1:
+            return None, "chunk_days must be at least 1"
+        end = end or datetime.utcnow().date()
+        if start is None:
+            start = db.session.query(func.min(Attendance.date)).scalar()
+            if start is None:
+                return {"days": 0, "rows": 0, "written": 0, "removed": 0}, None
+        if start > end:
+            return None, "start must not be after end"
+
+        summary = {"days": (end - start).days + 1, "rows": 0, "written": 0, "removed": 0}
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+            if not dry_run:
+                _lock_rollup()
+            existing = {
+                (r.gym_id, r.date): r for r in db.session.query(*AttendanceDailyRollup.__table__.columns).filter(
+                    AttendanceDailyRollup.date >= chunk_start, AttendanceDailyRollup.date <= chunk_end
+                )
+            }
+            fresh = RollupService._aggregate(chunk_start, chunk_end)
+
+            changed = [
+                row for key, row in fresh.items()
+                if key not in existing or any(getattr(existing[key], c) != row[c] for c in COUNT_COLUMNS)
+            ]
+            stale = [key for key in existing if key not in fresh]
+            if not dry_run:
+                if changed:
+                    _upsert(changed, "replace")
+                if stale:
+                    AttendanceDailyRollup.query.filter(
+                        tuple_(AttendanceDailyRollup.gym_id, AttendanceDailyRollup.date).in_(stale)
+                    ).delete(synchronize_session=False)
+                db.session.commit()
+            else:
+                db.session.rollback()
+
+            summary["rows"] += len(fresh)
+            summary["written"] += len(changed)
+            summary["removed"] += len(stale)
+            if on_chunk:
+                on_chunk(chunk_start, chunk_end, len(changed), len(stale))
+            chunk_start = chunk_end + timedelta(days=1)
+        return summary, None
+
+    # ------------------- READS -------------------
+    @staticmethod
+    def check_gym_owner(gym_id, owner_id):
+        """Error message unless the gym exists and belongs to the owner."""
+        gym = db.session.query(Gym.id, Gym.owner_id).filter(Gym.id == gym_id).first()
+        if not gym:
+            return "Gym not found"
+        if gym.owner_id != owner_id:
+            return "Access denied: Not gym owner"
+        return None
+
+    @staticmethod
+    def resolve_period(start_date, end_date, default_days):
+        """
+        (start, end, error) as dates from optional dates/datetimes: end defaults
+        to today (UTC), start to `default_days` days up to end.
+        """
+        end = end_date.date() if isinstance(end_date, datetime) else end_date or datetime.utcnow().date()
+        start = start_date.date() if isinstance(start_date, datetime) else start_date
+        start = start or end - timedelta(days=default_days - 1)
+        if start > end:
+            return None, None, "start_date must not be after end_date"
+        if (end - start).days >= MAX_DAILY_RANGE_DAYS:
+            return None, None, f"At most {MAX_DAILY_RANGE_DAYS} days per request"
+        return start, end, None
+
+    @staticmethod
+    def get_gym_daily(gym_id, owner_id, start_date=None, end_date=None):
+        """
+        Per-day check-ins, unique members and hourly histogram for one of the
+        owner's gyms over start..end (default: the last 30 days), every day
+        present, plus the period's hourly totals.
+        """
+        error = RollupService.check_gym_owner(gym_id, owner_id)
+        if error:
+            return None, error
+        start, end, error = RollupService.resolve_period(start_date, end_date, 30)
+        if error:
+            return None, error
+
+        rows = {
+            r.date: r for r in AttendanceDailyRollup.query.filter(
+                AttendanceDailyRollup.gym_id == gym_id,
+                AttendanceDailyRollup.date >= start, AttendanceDailyRollup.date <= end
+            )
+        }
+        days, hours = [], [0] * len(HOURS)
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            row = rows.get(day)
+            day_hours = row.hours() if row else [0] * len(HOURS)
+            hours = [a + b for a, b in zip(hours, day_hours)]
+            days.append({
+                "date": day.isoformat(),
+                "checkins": row.checkins if row else 0,
+                "unique_users": row.unique_users if row else 0,
+                "hours": day_hours
+            })
+
+        return {
+            "gym_id": gym_id,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "days": days,
+            "checkins": sum(d["checkins"] for d in days),
+            "hours": hours
+        }, None
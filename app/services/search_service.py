@@ -0,0 +1,303 @@
+import re
+from sqlalchemy import and_, delete, exists, or_, select
+from app.extensions import db
+from app.models.gym import Gym
+from app.models.gym_enrollment import GymEnrollment
+from app.models.search import SearchFuzzyKey, SearchTerm
+from app.models.user import User
+from app.utils import text_search
+from app.utils.upsert import insert_on_conflict_do_nothing
+
+GYM, USER = "gym", "user"
+MAX_QUERY_TERMS = 5
+MAX_SEARCH_RESULTS = 50
+MAX_FUZZY_TOKENS = 50
+REINDEX_BATCH_SIZE = 5000
+FUZZY_INSERT_CHUNK = 2000  # rows per multi-row INSERT, well under bind-parameter limits
+_PHONE = re.compile(r"\+?[\d\s().-]+")
+
+
+def gym_tokens(name, location):
+    """(tokens, fuzzy words) for a gym: words of its name and location."""
+    tokens = set(text_search.words(name)) | set(text_search.words(location))
+    return tokens, tokens
+
+
+def user_tokens(name, email, phone):
+    """
+    (tokens, fuzzy words) for a user: name words, email words plus the whole
+    address (so "j.smith@ex" prefix-matches), and the phone's digits. Only name
+    words get typo keys; emails and phones are near-unique and matched by prefix.
+    """
+    names = set(text_search.words(name))
+    tokens = set(names)
+    if email:
+        tokens.update(text_search.words(email))
+        tokens.add(text_search.normalize(email).strip()[:text_search.MAX_TOKEN_LENGTH])
+    digits = "".join(c for c in phone or "" if c.isdigit())
+    if digits:
+        tokens.add(digits[:text_search.MAX_TOKEN_LENGTH])
+    return tokens, names
+
+
+def _check_query(q, limit):
+    """(limit, error) for a search request."""
+    if not parse_query(q or ""):
+        return None, "q must contain at least one letter or digit"
+    if limit < 1:
+        return None, "limit must be positive"
+    return min(limit, MAX_SEARCH_RESULTS), None
+
+
+def parse_query(q):
+    """Query terms: an email or phone number is one term, otherwise its words (longest first)."""
+    q = text_search.normalize(q).strip()
+    if "@" in q:
+        return [q[:text_search.MAX_TOKEN_LENGTH]]
+    digits = "".join(c for c in q if c.isdigit())
+    if len(digits) >= 5 and _PHONE.fullmatch(q):  # "+1 (555) 010-" but not "24 7"
+        return [digits[:text_search.MAX_TOKEN_LENGTH]]
+    terms = list(dict.fromkeys(text_search.words(q)))[:MAX_QUERY_TERMS]
+    return sorted(terms, key=len, reverse=True)
+
+
+class SearchService:
+    """
+    Typo-tolerant prefix search over gyms (name, location) and users (name,
+    email, phone), backed by two plain tables so it runs on stock Postgres and
+    SQLite:
+
+    * search_terms: one row per (kind, token, entity) -- an inverted index whose
+      primary key answers exact and prefix lookups as B-tree range scans;
+    * search_fuzzy_keys: SymSpell-style deletion keys of name words, mapping a
+      typo'd term to the few real words within one edit.
+
+    Writes keep it current: call index_gym/index_users/remove in the same
+    transaction as the change. `flask search-reindex` rebuilds it from scratch.
+    """
+
+    # ------------------- INDEXING -------------------
+    @staticmethod
+    def _replace(kind, entries):
+        """entries: {entity_id: (tokens, fuzzy_words)}; replaces those entities' postings."""
+        if not entries:
+            return
+        db.session.execute(delete(SearchTerm).where(
+            SearchTerm.kind == kind, SearchTerm.entity_id.in_(list(entries))
+        ))
+        postings = [
+            {"kind": kind, "token": token, "entity_id": entity_id}
+            for entity_id, (tokens, _) in entries.items() for token in tokens
+        ]
+        if postings:
+            db.session.execute(SearchTerm.__table__.insert(), postings)
+
+        fuzzy = sorted({
+            (key, word)
+            for _, words in entries.values() for word in words
+            if len(word) >= text_search.FUZZY_MIN_LENGTH
+            for key in text_search.fuzzy_keys(word)
+        })
+        # Keys are shared by every entity using the word; stale ones are harmless
+        # (a key only proposes words, postings decide what matches)
+        for start in range(0, len(fuzzy), FUZZY_INSERT_CHUNK):
+            db.session.execute(insert_on_conflict_do_nothing(
+                db.session, SearchFuzzyKey,
+                [{"kind": kind, "key": key, "token": word} for key, word in fuzzy[start:start + FUZZY_INSERT_CHUNK]],
+                ["kind", "key", "token"],
+            ))
+
+    @staticmethod
+    def index_gym(gym):
+        SearchService._replace(GYM, {gym.id: gym_tokens(gym.name, gym.location)})
+
+    @staticmethod
+    def index_user(user):
+        SearchService.index_users([(user.id, user.name, user.email, user.phone)])
+
+    @staticmethod
+    def index_users(rows):
+        """Index/re-index users from (id, name, email, phone) tuples."""
+        SearchService._replace(USER, {row[0]: user_tokens(*row[1:]) for row in rows})
+
+    @staticmethod
+    def remove(kind, entity_id):
+        db.session.execute(delete(SearchTerm).where(
+            SearchTerm.kind == kind, SearchTerm.entity_id == entity_id
+        ))
+
+    @staticmethod
+    def reindex(kind, batch_size=REINDEX_BATCH_SIZE):
+        """Rebuild one kind's postings from the source table in committed batches; returns the count."""
+        model, columns, tokenize = (
+            (Gym, (Gym.id, Gym.name, Gym.location), gym_tokens) if kind == GYM
+            else (User, (User.id, User.name, User.email, User.phone), user_tokens)
+        )
+        db.session.execute(delete(SearchTerm).where(SearchTerm.kind == kind))
+        db.session.execute(delete(SearchFuzzyKey).where(SearchFuzzyKey.kind == kind))
+        db.session.commit()
+
+        done, last_id = 0, 0
+        while True:
+            rows = db.session.query(*columns).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                return done
+            SearchService._replace(kind, {row[0]: tokenize(*row[1:]) for row in rows})
+            db.session.commit()
+            done += len(rows)
+            last_id = rows[-1][0]
+
+    # ------------------- MATCHING -------------------
+    @staticmethod
+    def _fuzzy_tokens(kind, term):
+        """Indexed words whose leading characters are within one edit of `term`."""
+        if len(term) < text_search.FUZZY_MIN_LENGTH:
+            return []
+        candidates = db.session.execute(
+            select(SearchFuzzyKey.token).distinct().where(
+                SearchFuzzyKey.kind == kind,
+                SearchFuzzyKey.key.in_(text_search.fuzzy_keys(term)),
+            )
+        ).scalars()
+        matches = [word for word in candidates if text_search.prefix_distance(term, word) <= 1]
+        return sorted(matches)[:MAX_FUZZY_TOKENS]
+
+    @staticmethod
+    def _term_condition(column, term, stage, fuzzy):
+        if stage == "exact":
+            return column == term
+        prefix = and_(column >= term, column < text_search.prefix_upper_bound(term))
+        if stage == "fuzzy" and fuzzy.get(term):
+            return or_(prefix, column.in_(fuzzy[term]))
+        return prefix
+
+    @staticmethod
+    def match(kind, q, limit=20, scope=None):
+        """
+        Entity ids of `kind` matching every term of `q`, best first: all terms as
+        whole words, then as prefixes, then allowing one typo per term of 5+
+        characters. `scope(entity_id_column)` optionally returns an extra condition,
+        e.g. an EXISTS probe restricting hits to one gym's members.
+        Each stage is one indexed query that stops after `limit` distinct entities.
+        """
+        terms = parse_query(q)
+        if not terms:
+            return []
+
+        fuzzy = {}
+        found = []
+        for stage in ("exact", "prefix", "fuzzy"):
+            if stage == "fuzzy":
+                fuzzy = {t: SearchService._fuzzy_tokens(kind, t) for t in terms}
+                if not any(fuzzy.values()):
+                    break
+
+            # Drive from the longest (most selective) term; probe the rest per entity
+            lead = SearchTerm.__table__.alias("lead")
+            stmt = select(lead.c.entity_id).where(
+                lead.c.kind == kind,
+                SearchService._term_condition(lead.c.token, terms[0], stage, fuzzy),
+            )
+            for term in terms[1:]:
+                other = SearchTerm.__table__.alias()
+                stmt = stmt.where(exists().where(
+                    other.c.kind == kind,
+                    other.c.entity_id == lead.c.entity_id,
+                    SearchService._term_condition(other.c.token, term, stage, fuzzy),
+                ))
+            if scope is not None:
+                stmt = stmt.where(scope(lead.c.entity_id))
+            if found:
+                stmt = stmt.where(lead.c.entity_id.notin_(found))
+
+            # An entity can match a prefix through several of its tokens: dedupe in SQL
+            found.extend(db.session.execute(stmt.distinct().limit(limit - len(found))).scalars())
+            if len(found) == limit:
+                break
+        return found
+
+    # ------------------- SEARCHES -------------------
+    @staticmethod
+    def search_gyms(q, limit=20):
+        from app.services.gym_service import GymService
+
+        limit, error = _check_query(q, limit)
+        if error:
+            return None, error
+        ids = SearchService.match(GYM, q, limit)
+        rows = {g.id: g for g in GymService._public_gym_query().filter(Gym.id.in_(ids))} if ids else {}
+        gyms = [
+            {
+                "id": g.id,
+                "name": g.name,
+                "location": g.location,
+                "latitude": g.latitude,
+                "longitude": g.longitude,
+                "owner_id": g.owner_id,
+                "owner_name": g.owner_name
+            }
+            for g in (rows[i] for i in ids if i in rows)
+        ]
+        return {"gyms": gyms, "count": len(gyms)}, None
+
+    @staticmethod
+    def search_gym_members(gym_id, owner_id, q, limit=20):
+        gym = db.session.get(Gym, gym_id)
+        if not gym:
+            return None, "Gym not found"
+        if gym.owner_id != owner_id:
+            return None, "Access denied: Not gym owner"
+        limit, error = _check_query(q, limit)
+        if error:
+            return None, error
+
+        ids = SearchService.match(USER, q, limit, scope=lambda user_id: exists().where(
+            GymEnrollment.user_id == user_id, GymEnrollment.gym_id == gym_id
+        ))
+        rows = {}
+        if ids:
+            for e in db.session.query(
+                GymEnrollment.user_id, GymEnrollment.enrolled_at, GymEnrollment.valid_till,
+                GymEnrollment.is_active, User.name, User.email, User.phone
+            ).join(User, User.id == GymEnrollment.user_id).filter(
+                GymEnrollment.gym_id == gym_id, GymEnrollment.user_id.in_(ids)
+            ).order_by(GymEnrollment.is_active.desc(), GymEnrollment.id.desc()):
+                rows.setdefault(e.user_id, e)  # active (else latest) enrollment per member
+
+        members = [
+            {
+                "id": e.user_id,
+                "name": e.name,
+                "email": e.email,
+                "phone": e.phone,
+                "enrolled_at": e.enrolled_at.isoformat() if e.enrolled_at else None,
+                "valid_till": e.valid_till.isoformat() if e.valid_till else None,
+                "is_active": e.is_active
+            }
+            for e in (rows[i] for i in ids if i in rows)
+        ]
+        return {"members": members, "count": len(members)}, None
+
+    @staticmethod
+    def search_users(q, limit=20):
+        limit, error = _check_query(q, limit)
+        if error:
+            return None, error
+        ids = SearchService.match(USER, q, limit)
+        rows = {
+            u.id: u for u in db.session.query(
+                User.id, User.name, User.email, User.phone, User.role, User.is_active
+            ).filter(User.id.in_(ids))
+        } if ids else {}
+        users = [
+            {
+                "id": u.id,
+                "name": u.name,
+                "email": u.email,
+                "phone": u.phone,
+                "role": u.role,
+                "is_active": u.is_active
+            }
+            for u in (rows[i] for i in ids if i in rows)
+        ]
+        return {"users": users, "count": len(users)}, None
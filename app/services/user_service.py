@@ -1,29 +1,16 @@
+from collections import defaultdict
 from flask import request
+from sqlalchemy import case, func
 from app.models.user import User
 from app.extensions import db
 from app.models.gym import Gym
 from app.models.gym_enrollment import GymEnrollment
-
-def paginate_query(query, page=1, per_page=20):
-    """
-    Returns paginated results from a SQLAlchemy query.
-    :param query: SQLAlchemy query
-    :param page: current page number (1-based)
-    :param per_page: number of items per page
-    :return: dict with items, total count, total pages, current page
-    """
-    page = max(int(page), 1)
-    per_page = max(int(per_page), 1)
-    total = query.count()
-    items = query.offset((page - 1) * per_page).limit(per_page).all()
-    total_pages = (total + per_page - 1) // per_page  # ceil division
-    return {
-        "items": items,
-        "total": total,
-        "total_pages": total_pages,
-        "page": page,
-        "per_page": per_page
-    }
+from app.services.jwt_service import JWTService
+from app.services.principal_service import PrincipalService
+from app.services.search_service import SearchService, USER
+from app.services.version_service import VersionService, user_key
+from app.utils.pagination import paginate, pagination_meta, InvalidCursor
+from app.utils.response_cache import cached, invalidate_on_commit
 
 
 class UserService:
@@ -37,38 +24,11 @@ class UserService:
         user = getattr(request, "current_user", None)
         if not user:
             return None, "User not authenticated"
-
-        # Build response dictionary
-        profile = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "role": user.role,
-            "is_subscription_active": user.is_subscription_active,
-            "trial_started_at": user.trial_started_at.isoformat() if user.trial_started_at else None,
-            "trial_ends_at": user.trial_ends_at.isoformat() if user.trial_ends_at else None
-        }
-
-        return profile, None
-    
-
-from flask import request
-from app.models.user import User
-from app.extensions import db
-
-class UserService:
+        return cached(user_key(user.id), "profile", lambda: (UserService._profile(user), None))
 
     @staticmethod
-    def get_profile():
-        """
-        Returns the profile of the currently authenticated user.
-        Requires `token_required` decorator to have set request.current_user.
-        """
-        user = getattr(request, "current_user", None)
-        if not user:
-            return None, "User not authenticated"
-
-        profile = {
+    def _profile(user):
+        return {
             "id": user.id,
             "name": user.name,
             "email": user.email,
@@ -78,21 +38,26 @@ class UserService:
             "trial_ends_at": user.trial_ends_at.isoformat() if user.trial_ends_at else None
         }
 
-        return profile, None
-
     @staticmethod
     def update_profile(data):
         """
         Update profile fields of the currently authenticated user.
         data: dict containing keys like 'name' or 'email'
         """
-        user = getattr(request, "current_user", None)
-        if not user:
+        principal = getattr(request, "current_user", None)
+        if not principal:
             return None, "User not authenticated"
 
+        # current_user is a cached snapshot; changes go through the mapped row
+        user = db.session.get(User, principal.id)
+        if not user:
+            return None, "User not found"
+
         # Update name if provided
         if "name" in data:
             user.name = data["name"].strip()
+            if user.role == "gym_owner":
+                VersionService.bump_owned_gyms([user.id])  # public gym payloads show owner_name
 
         # Update email if provided
         if "email" in data:
@@ -105,118 +70,190 @@ class UserService:
         # Add more fields here if needed
         # e.g., user.phone = data.get("phone", user.phone)
 
+        SearchService.index_user(user)
+        invalidate_on_commit(db.session, user_key(user.id))
         db.session.commit()
+        PrincipalService.invalidate(user.id)
+        JWTService.revoke_user_tokens(user.id)
 
         # Return updated profile
-        profile = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "role": user.role,
-            "is_subscription_active": user.is_subscription_active,
-            "trial_started_at": user.trial_started_at.isoformat() if user.trial_started_at else None,
-            "trial_ends_at": user.trial_ends_at.isoformat() if user.trial_ends_at else None
-        }
+        profile = UserService._profile(user)
 
         return profile, None
-    
+
     @staticmethod
     def get_user_by_id(user_id):
         """Get any user profile by ID"""
+        return cached(user_key(user_id), "by_id", lambda: UserService._load_user(user_id))
+
+    @staticmethod
+    def _load_user(user_id):
         user = User.query.get(user_id)
         if not user:
             return None, "User not found"
+        return UserService._profile(user), None
 
-        profile = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "role": user.role,
-            "is_subscription_active": user.is_subscription_active,
-            "trial_started_at": user.trial_started_at.isoformat() if user.trial_started_at else None,
-            "trial_ends_at": user.trial_ends_at.isoformat() if user.trial_ends_at else None
-        }
-
-        return profile, None
-    
     # ==================== Owner perceptive==================
 
-def get_gym_members(gym_id, page=1, per_page=20):
-    gym = Gym.query.get(gym_id)
-    if not gym:
-        return None, "Gym not found"
-
-    query = GymEnrollment.query.filter_by(gym_id=gym_id)
-    pagination = paginate_query(query, page, per_page)
-
-    members = [
-        {
-            "user_id": e.user_id,
-            "name": e.user.name,
-            "email": e.user.email,
-            "phone": e.user.phone,
-            "enrolled_at": e.enrolled_at.isoformat(),
-            "is_active": e.is_active
-        }
-        for e in pagination["items"]
-    ]
-
-    return {
-        "members": members,
-        "total": pagination["total"],
-        "total_pages": pagination["total_pages"],
-        "page": pagination["page"],
-        "per_page": pagination["per_page"]
-    }, None
-
-
-def unenroll_user(gym_id, user_id):
-    enrollment = GymEnrollment.query.filter_by(gym_id=gym_id, user_id=user_id, is_active=True).first()
-    if not enrollment:
-        return None, "Enrollment not found"
-    enrollment.is_active = False
-    db.session.commit()
-    return {"message": f"User {user_id} unenrolled from gym {gym_id}"}, None
-
-  
-def set_enrollment_status(gym_id, user_id, status=True):
-    enrollment = GymEnrollment.query.filter_by(gym_id=gym_id, user_id=user_id).first()
-    if not enrollment:
-        return None, "Enrollment not found"
-    enrollment.is_active = status
-    db.session.commit()
-    return {"message": f"User {user_id} enrollment set to {status}"}, None
-
-
-
-# ===============admin perceptive=============
-def get_all_users_paginated(page=1, per_page=20):
-    query = User.query
-    pagination = paginate_query(query, page, per_page)
-
-    users = [u.to_dict() for u in pagination["items"]]
-
-    return {
-        "users": users,
-        "total": pagination["total"],
-        "total_pages": pagination["total_pages"],
-        "page": pagination["page"],
-        "per_page": pagination["per_page"]
-    }
-
-def set_user_status(user_id, is_active):
-    user = User.query.get(user_id)
-    if not user:
-        return None, "User not found"
-    user.is_active = is_active
-    db.session.commit()
-    return {"message": f"User {user_id} active status set to {is_active}"}, None
-
-def delete_user(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        return None, "User not found"
-    db.session.delete(user)
-    db.session.commit()
-    return {"message": f"User {user_id} deleted successfully"}, None
+    @staticmethod
+    def get_gym_members(gym_id, page=1, per_page=20, cursor=None, include_total=True, count=None):
+        gym = Gym.query.get(gym_id)
+        if not gym:
+            return None, "Gym not found"
+
+        base = GymEnrollment.query.filter(GymEnrollment.gym_id == gym_id)
+        query = base.with_entities(
+            GymEnrollment.id, GymEnrollment.user_id, GymEnrollment.enrolled_at, GymEnrollment.is_active,
+            User.name, User.email, User.phone
+        ).join(User, User.id == GymEnrollment.user_id)
+        try:
+            pagination = paginate(
+                query, [GymEnrollment.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count, count_query=base
+            )
+        except InvalidCursor as e:
+            return None, str(e)
+
+        members = [
+            {
+                "user_id": e.user_id,
+                "name": e.name,
+                "email": e.email,
+                "phone": e.phone,
+                "enrolled_at": e.enrolled_at.isoformat(),
+                "is_active": e.is_active
+            }
+            for e in pagination["items"]
+        ]
+
+        return {"members": members, **pagination_meta(pagination)}, None
+
+    @staticmethod
+    def unenroll_user(gym_id, user_id):
+        enrollment = GymEnrollment.query.filter_by(gym_id=gym_id, user_id=user_id, is_active=True).first()
+        if not enrollment:
+            return None, "Enrollment not found"
+        enrollment.is_active = False
+        db.session.commit()
+        return {"message": f"User {user_id} unenrolled from gym {gym_id}"}, None
+
+    @staticmethod
+    def set_enrollment_status(gym_id, user_id, status=True):
+        enrollment = GymEnrollment.query.filter_by(gym_id=gym_id, user_id=user_id).first()
+        if not enrollment:
+            return None, "Enrollment not found"
+        enrollment.is_active = status
+        db.session.commit()
+        return {"message": f"User {user_id} enrollment set to {status}"}, None
 
+    # ===============admin perceptive=============
+
+    @staticmethod
+    def _owned_gym_ids(user_ids):
+        """Map user id -> ids of the gyms they own, for a whole page in one query."""
+        owned = defaultdict(list)
+        if user_ids:
+            rows = db.session.query(Gym.owner_id, Gym.id).filter(
+                Gym.owner_id.in_(user_ids)
+            ).order_by(Gym.owner_id, Gym.id)
+            for owner_id, gym_id in rows:
+                owned[owner_id].append(gym_id)
+        return owned
+
+    @staticmethod
+    def _enrollment_summaries(user_ids):
+        """Map user id -> enrollment summary, aggregated per user in one grouped query."""
+        summaries = {}
+        if user_ids:
+            active = func.sum(case((GymEnrollment.is_active.is_(True), 1), else_=0))
+            rows = db.session.query(
+                GymEnrollment.user_id,
+                func.count(GymEnrollment.id).label("total"),
+                active.label("active"),
+                func.max(GymEnrollment.enrolled_at).label("last_enrolled_at"),
+            ).filter(GymEnrollment.user_id.in_(user_ids)).group_by(GymEnrollment.user_id)
+            for row in rows:
+                summaries[row.user_id] = {
+                    "total": row.total,
+                    "active": int(row.active or 0),
+                    "last_enrolled_at": row.last_enrolled_at.isoformat() if row.last_enrolled_at else None,
+                }
+        return summaries
+
+    @staticmethod
+    def get_all_users_paginated(page=1, per_page=20, cursor=None, include_total=True, count=None,
+                                role=None, is_active=None, created_from=None, created_to=None):
+        """
+        Admin user listing. Owned gyms and enrollment summaries for the page are
+        fetched in bulk, so the statement count doesn't depend on the page size.
+        """
+        query = db.session.query(
+            User.id, User.name, User.email, User.phone, User.role, User.is_active,
+            User.is_subscription_active, User.trial_started_at, User.trial_ends_at, User.created_at
+        )
+        if role:
+            query = query.filter(User.role == role)
+        if is_active is not None:
+            query = query.filter(User.is_active.is_(is_active))
+        if created_from:
+            query = query.filter(User.created_at >= created_from)
+        if created_to:
+            query = query.filter(User.created_at < created_to)
+
+        try:
+            pagination = paginate(
+                query, [User.id], page, per_page,
+                cursor=cursor, include_total=include_total, count=count
+            )
+        except InvalidCursor as e:
+            return None, str(e)
+
+        user_ids = [u.id for u in pagination["items"]]
+        owned = UserService._owned_gym_ids(user_ids)
+        summaries = UserService._enrollment_summaries(user_ids)
+        empty_summary = {"total": 0, "active": 0, "last_enrolled_at": None}
+
+        users = [
+            {
+                "id": u.id,
+                "name": u.name,
+                "email": u.email,
+                "phone": u.phone,
+                "role": u.role,
+                "is_subscription_active": u.is_subscription_active,
+                "is_active": u.is_active,
+                "trial_started_at": u.trial_started_at.isoformat() if u.trial_started_at else None,
+                "trial_ends_at": u.trial_ends_at.isoformat() if u.trial_ends_at else None,
+                "gyms_owned": owned.get(u.id, []),
+                "enrollment_summary": summaries.get(u.id, empty_summary),
+                "created_at": u.created_at.isoformat() if u.created_at else None,
+            }
+            for u in pagination["items"]
+        ]
+
+        return {"users": users, **pagination_meta(pagination)}, None
+
+    @staticmethod
+    def set_user_status(user_id, is_active):
+        user = User.query.get(user_id)
+        if not user:
+            return None, "User not found"
+        user.is_active = is_active
+        db.session.commit()
+        PrincipalService.invalidate(user_id)
+        JWTService.revoke_user_tokens(user_id)
+        return {"message": f"User {user_id} active status set to {is_active}"}, None
+
+    @staticmethod
+    def delete_user(user_id):
+        user = User.query.get(user_id)
+        if not user:
+            return None, "User not found"
+        SearchService.remove(USER, user_id)
+        VersionService.bump_owned_gyms([user_id])
+        invalidate_on_commit(db.session, user_key(user_id))
+        db.session.delete(user)
+        db.session.commit()
+        PrincipalService.invalidate(user_id)
+        JWTService.revoke_user_tokens(user_id)
+        return {"message": f"User {user_id} deleted successfully"}, None
@@ -0,0 +1,59 @@
+from datetime import datetime
+from app.extensions import db
+from app.models.gym import Gym
+from app.models.resource_version import ResourceVersion
+from app.utils.response_cache import invalidate_on_commit
+from app.utils.upsert import insert_on_conflict_do_update
+
+# Resource names, shared with the response cache.
+# Every public gym listing; bumped by any gym create/update/delete
+GYMS = "gyms"
+
+
+def gym_key(gym_id):
+    return f"gym:{gym_id}"
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+class VersionService:
+    """
+    Per-resource change counters behind HTTP conditional requests. Writers
+    bump the names they change inside their own transaction, so a validator
+    never runs ahead of the data; readers fetch a few primary-key rows instead
+    of the resource itself. A bump also drops the response cache's copies of
+    those resources once the transaction commits.
+    """
+
+    @staticmethod
+    def bump(*names):
+        names = sorted(set(names))  # fixed lock order between concurrent writers
+        if not names:
+            return
+        now = datetime.utcnow()
+        db.session.execute(insert_on_conflict_do_update(
+            db.session, ResourceVersion,
+            [{"name": name, "version": 1, "updated_at": now} for name in names],
+            ["name"],
+            lambda excluded: {"version": ResourceVersion.version + 1, "updated_at": excluded.updated_at},
+        ))
+        invalidate_on_commit(db.session, *names)
+
+    @staticmethod
+    def bump_owned_gyms(owner_ids):
+        """Owner names are part of every public gym payload: bump their gyms and the listing."""
+        gym_ids = [gym_id for (gym_id,) in db.session.query(Gym.id).filter(Gym.owner_id.in_(list(owner_ids)))]
+        if gym_ids:
+            VersionService.bump(GYMS, *(gym_key(gym_id) for gym_id in gym_ids))
+
+    @staticmethod
+    def get(*names):
+        """{name: (version, updated_at)}; never-bumped names are (0, None)."""
+        found = {
+            row.name: (row.version, row.updated_at)
+            for row in db.session.query(ResourceVersion.name, ResourceVersion.version, ResourceVersion.updated_at)
+            .filter(ResourceVersion.name.in_(names))
+        }
+        return {name: found.get(name, (0, None)) for name in names}
@@ -0,0 +1,151 @@
+import fnmatch
+import threading
+import time
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the subset of redis-py the app uses (strings, sorted
+    sets, expiry, pipelines). Selected with REDIS_URL=fakeredis:// for local runs
+    and checks; state is per process, so it is not a shared backend.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    # ---------------- keys ----------------
+    def _alive(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.time() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key))
+
+    def keys(self, pattern="*"):
+        with self._lock:
+            return [k for k in list(self._data) if self._alive(k) and fnmatch.fnmatchcase(k, pattern)]
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    # ---------------- strings ----------------
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def mget(self, keys):
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            if isinstance(value, str):
+                value = value.encode()
+            self._data[key] = value
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.time() + ex
+            return True
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self._data[key]) + amount if self._alive(key) else amount
+            self._data[key] = str(value).encode()
+            return value
+
+    # ---------------- sorted sets ----------------
+    def _zset(self, key):
+        if not self._alive(key):
+            self._data[key] = {}
+        return self._data[key]
+
+    def zadd(self, key, mapping):
+        with self._lock:
+            zset = self._zset(key)
+            added = sum(1 for member in mapping if member not in zset)
+            zset.update(mapping)
+            return added
+
+    def zrem(self, key, *members):
+        with self._lock:
+            zset = self._zset(key)
+            return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._zset(key))
+
+    def zremrangebyscore(self, key, min_score, max_score):
+        with self._lock:
+            zset = self._zset(key)
+            doomed = [m for m, s in zset.items() if float(min_score) <= s <= float(max_score)]
+            for member in doomed:
+                del zset[member]
+            return len(doomed)
+
+    def zrange(self, key, start, end, withscores=False):
+        with self._lock:
+            ordered = sorted(self._zset(key).items(), key=lambda item: (item[1], item[0]))
+            end = len(ordered) if end == -1 else end + 1
+            items = ordered[start:end]
+            return items if withscores else [m for m, _ in items]
+
+    # ---------------- pipelines ----------------
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    """Queues commands and runs them back to back under the store's lock."""
+
+    def __init__(self, store):
+        self._store = store
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._store._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._commands = []
@@ -0,0 +1,116 @@
+import math
+
+# Geohash: interleaved longitude/latitude bisection bits, 5 per base32 character.
+# Points sharing a prefix share a cell, so a B-tree over the hash string is a
+# plain-SQL spatial index: each cell is one index range scan.
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+# Same sphere as haversine_km, so the search box and the distance filter agree
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+MAX_COVER_CELLS = 16
+
+
+def encode(lat, lon, precision=PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            rng[0] = mid
+        else:
+            value = value * 2
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(lat_degrees, lon_degrees) spanned by one cell at `precision`."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def prefix_upper_bound(prefix):
+    """Smallest hash greater than every hash starting with `prefix` ("" if none)."""
+    chars = list(prefix)
+    while chars:
+        i = BASE32.index(chars[-1])
+        if i + 1 < len(BASE32):
+            chars[-1] = BASE32[i + 1]
+            return "".join(chars)
+        chars.pop()
+    return ""
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(lat, lon, radius_km):
+    """
+    Lat/lon boxes (min_lat, min_lon, max_lat, max_lon) enclosing the circle;
+    two boxes when it crosses the antimeridian, full longitude near the poles.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return [(min_lat, min_lon + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def _cells(box, precision):
+    min_lat, min_lon, max_lat, max_lon = box
+    lat_step, lon_step = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode(lat, lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(lon + lon_step, max_lon)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+    return cells
+
+
+def covering_prefixes(lat, lon, radius_km):
+    """
+    Geohash prefixes whose cells together cover the circle: the finest
+    precision that needs at most MAX_COVER_CELLS cells, so a radius query is a
+    handful of index range scans whatever the radius.
+    """
+    boxes = bounding_boxes(lat, lon, radius_km)
+    for precision in range(PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        estimate = sum(
+            (math.floor((b[2] - b[0]) / lat_step) + 2) * (math.floor((b[3] - b[1]) / lon_step) + 2)
+            for b in boxes
+        )
+        if estimate <= MAX_COVER_CELLS * 2:
+            cells = set().union(*(_cells(b, precision) for b in boxes))
+            if len(cells) <= MAX_COVER_CELLS:
+                return sorted(cells)
+    return [""]  # the whole world
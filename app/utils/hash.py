@@ -1,9 +1,42 @@
+from functools import lru_cache
 from passlib.context import CryptContext
 
-pwd_context=CryptContext(schemes=["bcrypt"],deprecated="auto")
+# pbkdf2_sha256 is what every stored password uses
+SCHEMES = ["pbkdf2_sha256"]
+DEFAULT_ROUNDS = 29000
 
-def hash_password(password:str)->str:
-    return pwd_context.hash(password)
 
-def verify_password(plain_password:str,hashed_passwoed:str)->bool:
-    return pwd_context.verify(plain_password,hashed_passwoed)
+@lru_cache(maxsize=8)
+def get_context(rounds=DEFAULT_ROUNDS):
+    """
+    The password hashing policy. New hashes use pbkdf2_sha256 with `rounds`;
+    hashes with different rounds report `needs_update`.
+    """
+    return CryptContext(
+        schemes=SCHEMES,
+        default="pbkdf2_sha256",
+        pbkdf2_sha256__default_rounds=rounds,
+        # rehash both cheaper and costlier hashes so lowering the cost takes effect too
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+def hash_password(password: str, rounds=DEFAULT_ROUNDS) -> str:
+    return get_context(rounds).hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str, rounds=DEFAULT_ROUNDS) -> bool:
+    return get_context(rounds).verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str, rounds=DEFAULT_ROUNDS):
+    """
+    Check a password and, if it matches but was hashed under an older policy,
+    return a replacement hash: (valid, new_hash_or_None).
+    """
+    return get_context(rounds).verify_and_update(plain_password, hashed_password)
+
+
+def needs_update(hashed_password: str, rounds=DEFAULT_ROUNDS) -> bool:
+    return get_context(rounds).needs_update(hashed_password)
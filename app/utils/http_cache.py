@@ -0,0 +1,40 @@
+import hashlib
+from datetime import timezone
+from flask import Response, current_app, request
+
+
+def make_etag(*parts):
+    """Strong ETag (quoted) from the parts that fully determine a representation."""
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def cache_headers(etag, last_modified=None):
+    """ETag, Last-Modified and a Cache-Control that lets shared caches keep public reads."""
+    max_age = current_app.config["HTTP_CACHE_MAX_AGE_SECONDS"]
+    stale = current_app.config["HTTP_CACHE_STALE_SECONDS"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified.replace(tzinfo=timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    return headers
+
+
+def not_modified(etag, last_modified=None):
+    """
+    A 304 response if the request's validators still match, else None.
+    If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+    `last_modified` is a naive UTC datetime, or None when unknown.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag.strip('"'))
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return Response(status=304, headers=cache_headers(etag, last_modified))
@@ -0,0 +1,218 @@
+import base64
+import json
+from datetime import datetime, date
+from flask import current_app, has_app_context
+from sqlalchemy import Table, text, tuple_
+from app.utils.ttl_cache import TTLCache
+
+# Count strategies for the `total` of a page:
+#   auto     - planner estimate for an unfiltered big table on Postgres, else cached
+#   exact    - COUNT(*) on every request
+#   cached   - COUNT(*) cached for COUNT_CACHE_TTL_SECONDS per distinct filter set
+#   estimate - planner estimate whenever the query is unfiltered, else cached
+#   none     - skip the total
+COUNT_STRATEGIES = ("auto", "exact", "cached", "estimate", "none")
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token can't be decoded for the requested ordering."""
+
+
+count_cache = TTLCache(max_entries=COUNT_CACHE_MAX_ENTRIES)
+
+
+def _config(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(value, column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if not isinstance(value, python_type):
+        raise InvalidCursor("Invalid cursor")
+    return value
+
+
+def encode_cursor(values):
+    """Pack the ordering key values of a row into an opaque, url-safe token."""
+    payload = json.dumps([_dump_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, keys):
+    """Unpack a token produced by `encode_cursor` for the given key columns."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor("Invalid cursor")
+
+    try:
+        return [_load_value(v, key) for v, key in zip(values, keys)]
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def pagination_args(args):
+    """
+    Read the common list parameters from a request's query string.
+    Clients either walk pages with `page` or follow `next_cursor` via `cursor`;
+    `include_total=false` skips the COUNT query and `count` picks how the total
+    is computed (see COUNT_STRATEGIES).
+    """
+    include_total = args.get("include_total", "true").lower() not in ("0", "false", "no")
+    count = args.get("count")
+    return {
+        "page": args.get("page", 1, type=int),
+        "per_page": args.get("per_page", 20, type=int),
+        "cursor": args.get("cursor"),
+        "include_total": include_total,
+        "count": count if count in COUNT_STRATEGIES else None,
+    }
+
+
+def _unfiltered_table(query):
+    """The table a query reads if it's a plain scan of one table with no WHERE, else None."""
+    if query.whereclause is not None:
+        return None
+    froms = query.statement.get_final_froms()
+    if len(froms) == 1 and isinstance(froms[0], Table):
+        return froms[0]
+    return None
+
+
+def _estimated_rows(session, table):
+    """Planner row estimate from pg_class; partitioned parents sum their partitions."""
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = session.execute(text(
+        "SELECT SUM(c.reltuples) FROM pg_class c "
+        "WHERE c.reltuples > 0 AND (c.oid = to_regclass(:name) OR c.oid IN "
+        "(SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:name)))"
+    ), {"name": table.name}).scalar()
+    return int(estimate) if estimate is not None else None
+
+
+def _cache_key(query):
+    compiled = query.statement.compile(dialect=query.session.get_bind().dialect)
+    params = sorted((k, repr(v)) for k, v in compiled.params.items())
+    return str(compiled), tuple(params)
+
+
+def count_total(query, strategy="auto"):
+    """
+    Total row count of `query` using one of COUNT_STRATEGIES.
+    :return: (total, is_exact); (None, None) for "none". Cached totals count as
+             exact but may lag writes by up to COUNT_CACHE_TTL_SECONDS.
+    """
+    strategy = strategy or "auto"
+    if strategy == "none":
+        return None, None
+
+    query = query.order_by(None)
+    if strategy in ("auto", "estimate"):
+        table = _unfiltered_table(query)
+        if table is not None:
+            estimate = _estimated_rows(query.session, table)
+            threshold = 0 if strategy == "estimate" else _config("COUNT_ESTIMATE_MIN_ROWS", 100_000)
+            if estimate is not None and estimate >= threshold:
+                return estimate, False
+
+    if strategy == "exact":
+        return query.count(), True
+
+    key = _cache_key(query)
+    total = count_cache.get(key)
+    if total is None:
+        total = query.count()
+        count_cache.set(key, total, _config("COUNT_CACHE_TTL_SECONDS", 30))
+    return total, True
+
+
+def paginate(query, keys, page=1, per_page=20, cursor=None, include_total=True, descending=False,
+             count_query=None, count=None):
+    """
+    Paginate a SQLAlchemy query ordered by `keys` (unique as a whole, e.g. (timestamp, id)).
+
+    With a `cursor` the page is located by a keyset seek on `keys`, so deep pages
+    cost the same as the first one. Without it we fall back to OFFSET on `page`
+    for older clients. Every page hands back a `next_cursor` for the following one.
+    :param query: SQLAlchemy query without ORDER BY
+    :param keys: list of columns forming the ordering key
+    :param page: page number (1-based), ignored when a cursor is given
+    :param per_page: number of items per page
+    :param cursor: token from a previous page's `next_cursor`
+    :param include_total: compute total/total_pages (None when skipped)
+    :param descending: order newest/highest first
+    :param count_query: cheaper query to COUNT (e.g. without display-only joins)
+    :param count: one of COUNT_STRATEGIES (default "auto"), see `count_total`
+    :return: dict with items, paging metadata and next_cursor
+    """
+    page = max(int(page or 1), 1)
+    per_page = max(int(per_page), 1)
+
+    total, total_is_exact = count_total(count_query or query, count if include_total else "none")
+
+    ordered = query.order_by(*[k.desc() if descending else k.asc() for k in keys])
+
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if len(keys) == 1:
+            seek = keys[0] < values[0] if descending else keys[0] > values[0]
+        else:
+            row, bound = tuple_(*keys), tuple_(*values)
+            seek = row < bound if descending else row > bound
+        rows = ordered.filter(seek).limit(per_page + 1).all()
+        page = None
+    else:
+        rows = ordered.offset((page - 1) * per_page).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, k.key) for k in keys])
+
+    return {
+        "items": items,
+        "total": total,
+        "total_is_exact": total_is_exact,
+        "total_pages": (total + per_page - 1) // per_page if total is not None else None,
+        "page": page,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "has_next": has_next,
+    }
+
+
+def pagination_meta(pagination):
+    """Paging fields shared by every list response."""
+    return {
+        "total": pagination["total"],
+        "total_is_exact": pagination["total_is_exact"],
+        "total_pages": pagination["total_pages"],
+        "page": pagination["page"],
+        "per_page": pagination["per_page"],
+        "next_cursor": pagination["next_cursor"],
+        "has_next": pagination["has_next"],
+    }
@@ -0,0 +1,152 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from app.utils import hash as password_hash
+
+
+class PasswordPoolError(RuntimeError):
+    """Base class for hash/verify calls the pool couldn't complete."""
+
+
+class PasswordPoolBusy(PasswordPoolError):
+    """Raised when too many hash/verify calls are already queued."""
+
+
+class PasswordPoolTimeout(PasswordPoolError):
+    """Raised when a hash/verify call didn't finish within the timeout."""
+
+
+def _hash(password, rounds):
+    return password_hash.hash_password(password, rounds)
+
+
+def _verify_and_update(password, hashed, rounds):
+    return password_hash.verify_and_update(password, hashed, rounds)
+
+
+class PasswordHasherPool:
+    """
+    Runs password hashing and verification (the app.utils.hash policy) in a
+    bounded pool of worker processes, so a burst of logins can't pin the web
+    workers' CPU.
+
+    At most `max_pending` calls may be queued or running; beyond that callers get
+    PasswordPoolBusy straight away instead of waiting. Each call waits at most
+    `timeout` seconds for its result; a timed-out call keeps its slot until the
+    worker is done with it. All failures derive from PasswordPoolError.
+    With `workers=0` everything runs inline, which is handy for the CLI and
+    local debugging.
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded web worker can copy held locks into the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Password hashing queue is full")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException as exc:
+            self._slots.release()
+            if isinstance(exc, BrokenProcessPool):
+                self.shutdown()
+                raise PasswordPoolError("Password hashing worker crashed") from exc
+            raise
+        # The slot is held until the task itself finishes or is cancelled: a caller
+        # giving up after `timeout` doesn't free the worker it left hashing
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise PasswordPoolTimeout("Password hashing timed out")
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool on the next call
+            self.shutdown()
+            raise PasswordPoolError("Password hashing worker crashed")
+
+    def hash(self, password, rounds=password_hash.DEFAULT_ROUNDS):
+        return self._run(_hash, password, rounds)
+
+    def hash_many(self, passwords, rounds=password_hash.DEFAULT_ROUNDS):
+        """
+        Hash a batch in parallel, for bulk imports. Submits one task per worker at
+        a time, so login/signup calls sharing the pool queue behind at most one
+        wave rather than the whole batch. Doesn't take the `max_pending` slots.
+        """
+        passwords = list(passwords)
+        if not self.workers:
+            return [_hash(password, rounds) for password in passwords]
+
+        hashes = []
+        try:
+            executor = self._get_executor()
+            for start in range(0, len(passwords), self.workers):
+                wave = [executor.submit(_hash, p, rounds) for p in passwords[start:start + self.workers]]
+                hashes.extend(f.result(timeout=self.timeout) for f in wave)
+        except FutureTimeout:
+            raise PasswordPoolTimeout("Password hashing timed out")
+        except BrokenProcessPool:
+            self.shutdown()
+            raise PasswordPoolError("Password hashing worker crashed")
+        return hashes
+
+    def verify_and_update(self, password, hashed, rounds=password_hash.DEFAULT_ROUNDS):
+        """(valid, new_hash_or_None), see app.utils.hash.verify_and_update."""
+        return self._run(_verify_and_update, password, hashed, rounds)
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first login."""
+        if self.workers:
+            executor = self._get_executor()
+            list(executor.map(_hash, ["warm-up"] * self.workers, [1000] * self.workers))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool(config):
+    """Return this process's pool, sized by the PASSWORD_POOL_* settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = config.get("PASSWORD_POOL_WORKERS", 0)
+            _pool = PasswordHasherPool(
+                workers=workers,
+                max_pending=config.get("PASSWORD_POOL_MAX_PENDING") or max(workers, 1) * 8,
+                timeout=config.get("PASSWORD_POOL_TIMEOUT_SECONDS", 5),
+            )
+        return _pool
+
+
+def reset_password_pool():
+    """Drop the pool so the next call picks up changed settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
@@ -0,0 +1,158 @@
+import zlib
+from array import array
+
+MM = 72 / 25.4  # points per millimetre
+
+PAGE_WIDTH = 210 * MM  # A4
+PAGE_HEIGHT = 297 * MM
+MARGIN = 10 * MM
+BOTTOM_LIMIT = 20 * MM  # leave room for the footer, like FPDF's auto page break
+
+# Object numbers fixed up front; pages and their content streams follow from 6
+CATALOG, PAGES, FONT_REGULAR, FONT_BOLD, FONT_ITALIC = 1, 2, 3, 4, 5
+
+FONTS = {
+    FONT_REGULAR: "Helvetica",
+    FONT_BOLD: "Helvetica-Bold",
+    FONT_ITALIC: "Helvetica-Oblique",
+}
+
+
+def _escape(text):
+    text = str(text).encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_width(text, size):
+    # Helvetica averages a little over half an em per glyph; good enough to
+    # centre titles and clip cells without shipping font metrics.
+    return len(text) * size * 0.52
+
+
+def _fit(text, width, size):
+    text = str(text)
+    max_chars = int((width - 2 * MM) / (size * 0.52))
+    if len(text) <= max_chars:
+        return text
+    return text[:max(max_chars - 3, 0)] + "..."
+
+
+class StreamingTablePDF:
+    """
+    Writes a bordered table report as a PDF byte stream, one page at a time.
+
+    FPDF keeps every page in memory until output(); this writer flushes each page
+    as soon as it is full, so memory stays flat however many rows are fed in.
+    Only the byte offsets of written objects (8 bytes each) are kept for the xref table.
+    """
+
+    def __init__(self, title, subtitle, columns, row_height=10 * MM, font_size=10):
+        self.title = title
+        self.subtitle = subtitle
+        self.columns = [(label, width * MM) for label, width in columns]
+        self.table_width = sum(width for _, width in self.columns)
+        self.row_height = row_height
+        self.font_size = font_size
+        self.offsets = array("Q", [0] * (FONT_ITALIC + 1))
+        self.page_count = 0
+        self.position = 0
+
+    # ------------------- LOW LEVEL -------------------
+    def _emit(self, data):
+        self.position += len(data)
+        return data
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        return self._emit(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _allocate(self):
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    # ------------------- PAGE CONTENT -------------------
+    def _text(self, ops, font, size, x, y, text):
+        ops.append("BT /F%d %d Tf %.2f %.2f Td (%s) Tj ET" % (font, size, x, y, _escape(text)))
+
+    def _centered(self, ops, font, size, y, text):
+        x = (PAGE_WIDTH - _text_width(text, size)) / 2
+        self._text(ops, font, size, max(x, MARGIN), y, text)
+
+    def _row(self, ops, top, values, font):
+        bottom = top - self.row_height
+        baseline = bottom + self.row_height / 2 - self.font_size * 0.35
+        ops.append("%.2f %.2f %.2f %.2f re S" % (MARGIN, bottom, self.table_width, self.row_height))
+        x = MARGIN
+        for (_, width), value in zip(self.columns, values):
+            if x > MARGIN:
+                ops.append("%.2f %.2f m %.2f %.2f l S" % (x, bottom, x, top))
+            self._text(ops, font, self.font_size, x + MM, baseline, _fit(value, width, self.font_size))
+            x += width
+        return bottom
+
+    def _start_page(self):
+        ops = ["0.2 w"]
+        top = PAGE_HEIGHT - MARGIN
+        self._centered(ops, FONT_BOLD, 14, top - 7 * MM, self.title)
+        top -= 15 * MM
+        if not self.page_count:
+            self._centered(ops, FONT_BOLD, 12, top - 7 * MM, self.subtitle)
+            top -= 15 * MM
+        top = self._row(ops, top, [label for label, _ in self.columns], FONT_BOLD)
+        return ops, top
+
+    def _finish_page(self, ops):
+        self.page_count += 1
+        page_no = self.page_count
+        self._centered(ops, FONT_ITALIC, 8, 10 * MM, "Page %d" % page_no)
+
+        stream = zlib.compress("\n".join(ops).encode("latin-1"))
+        content_id, page_id = self._allocate(), self._allocate()
+
+        chunk = self._object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        )
+        fonts = b" ".join(b"/F%d %d 0 R" % (f, f) for f in FONTS)
+        chunk += self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (PAGES, PAGE_WIDTH, PAGE_HEIGHT, fonts, content_id),
+        )
+        return chunk
+
+    # ------------------- PUBLIC -------------------
+    def render(self, rows):
+        """Yield the PDF as byte chunks (roughly one per page) for an iterable of row tuples."""
+        yield self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        header = b""
+        for font_id, name in FONTS.items():
+            header += self._object(
+                font_id,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % name.encode(),
+            )
+        yield header
+
+        ops, top = self._start_page()
+        for values in rows:
+            if top - self.row_height < BOTTOM_LIMIT:
+                yield self._finish_page(ops)
+                ops, top = self._start_page()
+            top = self._row(ops, top, values, FONT_REGULAR)
+        yield self._finish_page(ops)
+
+        # Page objects were allocated right after their content streams
+        first_page = FONT_ITALIC + 2
+        kids = b" ".join(b"%d 0 R" % (first_page + 2 * i) for i in range(self.page_count))
+        tail = self._object(PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, self.page_count))
+        tail += self._object(CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES)
+        yield tail
+
+        xref_at = self.position
+        size = len(self.offsets)
+        yield b"xref\n0 %d\n0000000000 65535 f \n" % size
+        for start in range(1, size, 1000):
+            yield b"".join(b"%010d 00000 n \n" % offset for offset in self.offsets[start:start + 1000])
+        yield b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG, xref_at)
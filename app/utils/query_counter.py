@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Statements seen on an engine while a `count_queries` block is open."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __len__(self):
+        return self.count
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    Count every statement sent to `engine` inside the block:
+
+        with count_queries(db.engine) as counter:
+            client.get("/gym/all?per_page=50")
+        assert counter.count == 2
+    """
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
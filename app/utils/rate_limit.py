@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import wraps
+from flask import current_app, request
+
+
+def parse_limit(value):
+    """'20/60' -> (20, 60.0): at most 20 hits per sliding 60 seconds."""
+    count, seconds = str(value).split("/")
+    return int(count), float(seconds)
+
+
+class RateLimitBackend:
+    """Sliding-window log: a hit is allowed if fewer than `limit` were allowed in the last `window` seconds."""
+
+    def hit(self, key, limit, window):
+        """Record a hit; returns (allowed, retry_after_seconds)."""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process windows; each web worker enforces its own budget. Keys are kept
+    in least-recently-hit order with the window they were hit under: keys whose
+    own window has lapsed are dropped from the cold end as hits come in, and past
+    `max_keys` the coldest key is evicted, so memory stays bounded and a new key
+    costs O(1) however many distinct keys a burst brings.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._hits = OrderedDict()  # key -> (window, deque of hit times), coldest first
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._hits.pop(key, None)
+            hits = entry[1] if entry else deque()
+            self._hits[key] = (window, hits)  # now the hottest key
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return False, hits[0] + window - now
+            hits.append(now)
+            return True, 0
+
+    def _expire(self, now):
+        """Drop cold keys whose latest hit has left their own window."""
+        while self._hits:
+            key, (window, hits) = next(iter(self._hits.items()))
+            if hits and hits[-1] > now - window:
+                return
+            del self._hits[key]
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Windows shared by every process through a sorted set per key in Redis."""
+
+    PREFIX = "ratelimit:"
+
+    def __init__(self, client):
+        self.client = client
+
+    def hit(self, key, limit, window):
+        key = self.PREFIX + key
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex}"
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zadd(key, {member: now})
+        pipe.zcard(key)
+        pipe.expire(key, int(math.ceil(window)))
+        _, _, count, _ = pipe.execute()
+        if count <= limit:
+            return True, 0
+
+        # over the limit: take our hit back so rejected attempts don't extend the block
+        self.client.zrem(key, member)
+        oldest = self.client.zrange(key, 0, 0, withscores=True)
+        retry_after = oldest[0][1] + window - now if oldest else window
+        return False, retry_after
+
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def get_rate_limit_backend(config):
+    """Return the backend selected by `RATE_LIMIT_BACKEND` ("memory" or "redis"), one per process."""
+    name = config.get("RATE_LIMIT_BACKEND", "memory")
+    with _lock:
+        if name not in _backends:
+            if name == "memory":
+                _backends[name] = InMemoryRateLimitBackend()
+            elif name == "redis":
+                from app.utils.redis_client import get_redis
+
+                _backends[name] = RedisRateLimitBackend(get_redis(config))
+            else:
+                raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name}")
+        return _backends[name]
+
+
+def reset_rate_limits():
+    """Forget every backend (and its in-process windows)."""
+    with _lock:
+        _backends.clear()
+
+
+# ---------------- key functions ----------------
+def client_ip():
+    if current_app.config.get("RATE_LIMIT_TRUST_PROXY"):
+        forwarded = request.headers.get("X-Forwarded-For", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.remote_addr or "unknown"
+
+
+def request_email():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None
+    email = data.get("email")
+    return email.lower().strip() if isinstance(email, str) and email.strip() else None
+
+
+KEY_FUNCS = {"ip": client_ip, "email": request_email}
+
+
+def rate_limit(scope, **limits):
+    """
+    Throttle a view with one sliding window per key kind, e.g.
+
+        @rate_limit("login", ip="RATE_LIMIT_LOGIN_PER_IP", email="RATE_LIMIT_LOGIN_PER_EMAIL")
+
+    Each keyword names a key function in KEY_FUNCS and the config setting holding
+    its "count/seconds" limit. Rejected requests get 429 with Retry-After.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if config.get("RATE_LIMIT_ENABLED", True):
+                backend = get_rate_limit_backend(config)
+                for kind, setting in limits.items():
+                    value = KEY_FUNCS[kind]()
+                    if value is None:
+                        continue
+                    limit, window = parse_limit(config[setting])
+                    allowed, retry_after = backend.hit(f"{scope}:{kind}:{value}", limit, window)
+                    if not allowed:
+                        retry_after = max(int(math.ceil(retry_after)), 1)
+                        return (
+                            {"error": "Too many attempts, please try again later"},
+                            429,
+                            {"Retry-After": str(retry_after)},
+                        )
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,22 @@
+import threading
+from app.utils.fake_redis import FakeRedis
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_redis(config):
+    """
+    Redis client for `REDIS_URL`, one per process. `fakeredis://` gives the
+    in-process FakeRedis instead, for local runs without a Redis server.
+    """
+    url = config["REDIS_URL"]
+    with _lock:
+        if url not in _clients:
+            if url.startswith("fakeredis://"):
+                _clients[url] = FakeRedis()
+            else:
+                import redis
+
+                _clients[url] = redis.Redis.from_url(url)
+        return _clients[url]
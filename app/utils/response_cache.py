@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from flask import current_app
+from app.utils.ttl_cache import TTLCache
+
+
+class CacheBackend:
+    """Byte-string key/value store with per-key TTLs."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl):
+        """Set `key` only if it is absent; True if it was set."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU; invalidations are only seen by the process that made them."""
+
+    def __init__(self, max_entries):
+        self._entries = TTLCache(max_entries=max_entries)
+        self._add_lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, value, ttl)
+
+    def add(self, key, value, ttl):
+        with self._add_lock:
+            if self._entries.get(key) is not None:
+                return False
+            self._entries.set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        self._entries.delete(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every process; Redis expires (and, under maxmemory, evicts) entries."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=max(int(ttl), 1))
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, ex=max(int(ttl), 1), nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache of serialized service results, grouped by resource ("gyms", "gym:42",
+    "user:7"). Each resource has a generation token stored next to its entries
+    and every entry key embeds it, so invalidating a resource is one write --
+    a fresh token -- however many argument variants were cached. A lost or
+    evicted token is simply replaced by a new one, which only costs misses.
+
+    Misses are single-flight: the first caller takes a short lock key and
+    computes; concurrent callers for the same key poll for its result instead
+    of all hitting the database (stampede protection), and compute themselves
+    only if the lock holder hasn't finished within `lock_seconds`.
+    """
+
+    PREFIX = "rc:"
+    POLL_SECONDS = 0.01
+
+    def __init__(self, backend, ttl, lock_seconds):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._counters = {}
+        self._counters_lock = threading.Lock()
+
+    def _count(self, resource, outcome):
+        kind = resource.split(":", 1)[0]
+        with self._counters_lock:
+            counters = self._counters.setdefault(kind, {"hits": 0, "misses": 0, "waits": 0})
+            counters[outcome] += 1
+
+    def _generation(self, resource):
+        key = f"{self.PREFIX}gen:{resource}"
+        generation = self.backend.get(key)
+        if generation is None:
+            self.backend.add(key, os.urandom(6).hex(), self.ttl * 10)
+            generation = self.backend.get(key)
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def _key(self, resource, variant):
+        digest = hashlib.sha256(json.dumps(variant, sort_keys=True, default=str).encode()).hexdigest()[:24]
+        return f"{self.PREFIX}{resource}:{self._generation(resource)}:{digest}"
+
+    def get_or_compute(self, resource, variant, compute):
+        """
+        (result, error) for `compute()`, cached under `resource` and `variant`
+        (the JSON-serializable arguments and principal that shape the result).
+        Only successful results are cached.
+        """
+        key = self._key(resource, variant)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self._count(resource, "hits")
+            return json.loads(cached), None
+
+        lock_key = key + ":lock"
+        if not self.backend.add(lock_key, b"1", self.lock_seconds):
+            deadline = time.monotonic() + self.lock_seconds
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_SECONDS)
+                cached = self.backend.get(key)
+                if cached is not None:
+                    self._count(resource, "waits")
+                    return json.loads(cached), None
+            lock_key = None  # holder is too slow; compute without it
+
+        self._count(resource, "misses")
+        try:
+            result, error = compute()
+            if error is None:
+                self.backend.set(key, json.dumps(result), self.ttl)
+            return result, error
+        finally:
+            if lock_key:
+                self.backend.delete(lock_key)
+
+    def invalidate(self, *resources):
+        for resource in resources:
+            self.backend.set(f"{self.PREFIX}gen:{resource}", os.urandom(6).hex(), self.ttl * 10)
+
+    def stats(self):
+        """Per resource kind: hits, misses (computed), waits (served by another caller's compute), hit_ratio."""
+        with self._counters_lock:
+            stats = {kind: dict(counters) for kind, counters in self._counters.items()}
+        for counters in stats.values():
+            served = counters["hits"] + counters["waits"]
+            total = served + counters["misses"]
+            counters["hit_ratio"] = round(served / total, 4) if total else None
+        return stats
+
+
+class _NoCache(ResponseCache):
+    """RESPONSE_CACHE_BACKEND=none: always compute."""
+
+    def __init__(self):
+        super().__init__(None, 0, 0)
+
+    def get_or_compute(self, resource, variant, compute):
+        return compute()
+
+    def invalidate(self, *resources):
+        pass
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_response_cache(config):
+    """Return the cache selected by `RESPONSE_CACHE_BACKEND` ("memory", "redis" or "none"), one per process."""
+    name = config.get("RESPONSE_CACHE_BACKEND", "memory")
+    with _lock:
+        if name not in _caches:
+            if name == "none":
+                _caches[name] = _NoCache()
+                return _caches[name]
+            if name == "memory":
+                backend = InMemoryCacheBackend(config.get("RESPONSE_CACHE_MAX_ENTRIES", 10_000))
+            elif name == "redis":
+                from app.utils.redis_client import get_redis
+
+                backend = RedisCacheBackend(get_redis(config))
+            else:
+                raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+            _caches[name] = ResponseCache(
+                backend,
+                ttl=config.get("RESPONSE_CACHE_TTL_SECONDS", 30),
+                lock_seconds=config.get("RESPONSE_CACHE_LOCK_SECONDS", 5),
+            )
+        return _caches[name]
+
+
+def reset_response_caches():
+    """Forget every cache (and its in-process entries and counters)."""
+    with _lock:
+        _caches.clear()
+
+
+def cached(resource, variant, compute):
+    """get_or_compute on the app's configured cache."""
+    return get_response_cache(current_app.config).get_or_compute(resource, variant, compute)
+
+
+# ------------------- INVALIDATION ON COMMIT -------------------
+_PENDING = "response_cache_invalidations"
+
+
+def invalidate_on_commit(session, *resources):
+    """
+    Invalidate `resources` once `session` commits (nothing if it rolls back).
+    Dropping entries before the commit would let a concurrent read re-cache
+    the old rows; after it, any read still in flight stored its result under
+    the old generation, where nothing will look it up again.
+    """
+    pending = session.info.setdefault(_PENDING, [])
+    pending.append((get_response_cache(current_app.config), resources))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for cache, resources in session.info.pop(_PENDING, ()):
+        cache.invalidate(*resources)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session, previous_transaction):
+    if previous_transaction.parent is None:  # outermost transaction only
+        session.info.pop(_PENDING, None)
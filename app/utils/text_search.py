@@ -0,0 +1,65 @@
+import re
+import unicodedata
+
+MAX_TOKEN_LENGTH = 64
+# Words of at least this many characters tolerate one typo
+FUZZY_MIN_LENGTH = 5
+# Typo keys cover the first FUZZY_KEY_LENGTH characters of a word
+FUZZY_KEY_LENGTH = 5
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase and strip accents: "José" -> "jose"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def words(text):
+    return [w[:MAX_TOKEN_LENGTH] for w in _WORD.findall(normalize(text))]
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with `prefix` (byte order)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def fuzzy_keys(word):
+    """
+    The word's first FUZZY_KEY_LENGTH characters plus each one-character deletion
+    of them. Two words whose leading characters are one edit apart (substitution,
+    insertion, deletion or transposition) share at least one key.
+    """
+    head = word[:FUZZY_KEY_LENGTH]
+    keys = {head}
+    keys.update(head[:i] + head[i + 1:] for i in range(len(head)))
+    return keys
+
+
+def _osa_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def prefix_distance(term, word, limit=1):
+    """Edit distance between `term` and the closest prefix of `word` (capped at limit + 1)."""
+    best = limit + 1
+    for length in range(max(len(term) - limit, 1), min(len(term) + limit, len(word)) + 1):
+        best = min(best, _osa_distance(term, word[:length], limit))
+        if best == 0:
+            break
+    return best
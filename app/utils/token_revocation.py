@@ -0,0 +1,114 @@
+import threading
+import time
+
+
+class RevocationBackend:
+    """
+    Compact revocation list for self-contained tokens. Two kinds of entry, both
+    dropped once no token they could match is still alive:
+
+    * per user: "tokens issued before T are void" -- one entry per user whose
+      role/status changed, kept for the access token lifetime;
+    * per token id (jti): a single refresh token that was rotated or revoked,
+      kept until that token would have expired anyway.
+    """
+
+    def revoke_user(self, user_id, ttl):
+        raise NotImplementedError
+
+    def revoke_token(self, jti, ttl):
+        raise NotImplementedError
+
+    def is_revoked(self, user_id, jti, issued_at):
+        """True if the token was issued before a cutoff for `user_id` or its `jti` is listed (either may be None)."""
+        raise NotImplementedError
+
+
+class InMemoryRevocationBackend(RevocationBackend):
+    """Per-process list; revocations are only seen by the process that made them."""
+
+    def __init__(self):
+        self._users = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        for entries in (self._users, self._tokens):
+            for key in [k for k, (_, expires_at) in entries.items() if expires_at <= now]:
+                del entries[key]
+
+    def revoke_user(self, user_id, ttl):
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            self._users[user_id] = (now, now + ttl)
+
+    def revoke_token(self, jti, ttl):
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            self._tokens[jti] = (now, now + ttl)
+
+    def is_revoked(self, user_id, jti, issued_at):
+        now = time.time()
+        with self._lock:
+            user_entry = self._users.get(user_id) if user_id is not None else None
+            if user_entry and user_entry[1] > now and issued_at <= user_entry[0]:
+                return True
+            token_entry = self._tokens.get(jti) if jti else None
+            return bool(token_entry and token_entry[1] > now)
+
+
+class RedisRevocationBackend(RevocationBackend):
+    """List shared by every process; each entry is a key with a TTL, so Redis expires it."""
+
+    PREFIX = "revoked:"
+
+    def __init__(self, client):
+        self.client = client
+
+    def revoke_user(self, user_id, ttl):
+        self.client.set(f"{self.PREFIX}user:{user_id}", repr(time.time()), ex=max(int(ttl), 1))
+
+    def revoke_token(self, jti, ttl):
+        self.client.set(f"{self.PREFIX}jti:{jti}", b"1", ex=max(int(ttl), 1))
+
+    def is_revoked(self, user_id, jti, issued_at):
+        keys = []
+        if user_id is not None:
+            keys.append(f"{self.PREFIX}user:{user_id}")
+        if jti:
+            keys.append(f"{self.PREFIX}jti:{jti}")
+        if not keys:
+            return False
+        values = dict(zip(keys, self.client.mget(keys)))
+        revoked_at = values.get(f"{self.PREFIX}user:{user_id}")
+        if revoked_at is not None and issued_at <= float(revoked_at):
+            return True
+        return values.get(f"{self.PREFIX}jti:{jti}") is not None
+
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def get_revocation_backend(config):
+    """Return the backend selected by `TOKEN_REVOCATION_BACKEND` ("memory" or "redis"), one per process."""
+    name = config.get("TOKEN_REVOCATION_BACKEND", "memory")
+    with _lock:
+        if name not in _backends:
+            if name == "memory":
+                _backends[name] = InMemoryRevocationBackend()
+            elif name == "redis":
+                from app.utils.redis_client import get_redis
+
+                _backends[name] = RedisRevocationBackend(get_redis(config))
+            else:
+                raise ValueError(f"Unknown TOKEN_REVOCATION_BACKEND: {name}")
+        return _backends[name]
+
+
+def reset_revocations():
+    """Forget every backend (and its in-process entries)."""
+    with _lock:
+        _backends.clear()
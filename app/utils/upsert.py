@@ -0,0 +1,32 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def _insert(session, model):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+
+
+def insert_on_conflict_do_nothing(session, model, rows, index_elements):
+    """
+    Multi-row INSERT ... ON CONFLICT (index_elements) DO NOTHING for the bound dialect.
+    `index_elements` must match a unique constraint; conflicting rows are skipped
+    silently, so chain `.returning(...)` to learn which rows went in.
+    """
+    return _insert(session, model).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+
+
+def insert_on_conflict_do_update(session, model, rows, index_elements, set_):
+    """
+    Multi-row INSERT ... ON CONFLICT (index_elements) DO UPDATE SET set_ for the
+    bound dialect. `set_` maps column names to values or expressions, or is a
+    callable taking the statement's `excluded` row (the values that failed to
+    insert) and returning that mapping.
+    """
+    stmt = _insert(session, model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements, set_=set_(stmt.excluded) if callable(set_) else set_
+    )
@@ -0,0 +1,45 @@
+"""search index tables
+
+Revision ID: a3d94e7b2c18
+Revises: f2a8c61d0b57
+Create Date: 2026-10-17 19:41:27.903315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d94e7b2c18'
+down_revision = 'f2a8c61d0b57'
+branch_labels = None
+depends_on = None
+
+
+def _token(length):
+    # Byte-order comparisons on Postgres so prefix ranges use the B-tree under any collation
+    return sa.String(length=length).with_variant(sa.String(length=length, collation="C"), "postgresql")
+
+
+def upgrade():
+    op.create_table('search_terms',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('token', _token(64), nullable=False),
+    sa.Column('entity_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'token', 'entity_id')
+    )
+    op.create_index('ix_search_terms_entity', 'search_terms', ['kind', 'entity_id', 'token'])
+
+    op.create_table('search_fuzzy_keys',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('key', _token(8), nullable=False),
+    sa.Column('token', _token(64), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'key', 'token')
+    )
+    # Fill both with `flask search-reindex` after upgrading
+
+
+def downgrade():
+    op.drop_table('search_fuzzy_keys')
+    op.drop_index('ix_search_terms_entity', table_name='search_terms')
+    op.drop_table('search_terms')
@@ -0,0 +1,29 @@
+"""resource versions for HTTP conditional requests
+
+Revision ID: b7e3f1a9c254
+Revises: a3d94e7b2c18
+Create Date: 2026-10-17 21:05:12.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f1a9c254'
+down_revision = 'a3d94e7b2c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resource_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('resource_versions')
@@ -0,0 +1,47 @@
+"""attendance date and daily unique constraint
+
+Revision ID: c41d8e2b7f05
+Revises: b7c2e4f1a9d3
+Create Date: 2026-10-17 11:03:27.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8e2b7f05'
+down_revision = 'b7c2e4f1a9d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The model has carried `date` and unique_daily_attendance for a while but
+    # no revision created them; batch check-ins rely on the constraint for
+    # ON CONFLICT DO NOTHING.
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date', sa.Date(), nullable=True))
+
+    # SQLite stores timestamps as text, where CAST(... AS DATE) keeps only the year.
+    # Rows written without a timestamp get the migration day so `date` can be NOT NULL.
+    day = "DATE(timestamp)" if op.get_bind().dialect.name == "sqlite" else "CAST(timestamp AS DATE)"
+    op.execute(f"UPDATE attendance SET date = COALESCE({day}, CURRENT_DATE) WHERE date IS NULL")
+    # Keep the first check-in of any user/gym/day that slipped in twice. Rows with a
+    # NULL user or gym never collide on the constraint and are left alone.
+    op.execute(
+        "DELETE FROM attendance "
+        "WHERE user_id IS NOT NULL AND gym_id IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM attendance WHERE user_id IS NOT NULL AND gym_id IS NOT NULL "
+        "GROUP BY user_id, gym_id, date)"
+    )
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.alter_column('date', existing_type=sa.Date(), nullable=False)
+        batch_op.create_unique_constraint('unique_daily_attendance', ['user_id', 'gym_id', 'date'])
+
+
+def downgrade():
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_daily_attendance', type_='unique')
+        batch_op.drop_column('date')
@@ -0,0 +1,33 @@
+"""attendance daily rollup
+
+Revision ID: c8d2e6f4a1b7
+Revises: b7e3f1a9c254
+Create Date: 2026-10-17 22:48:36.504117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d2e6f4a1b7'
+down_revision = 'b7e3f1a9c254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_daily_rollup',
+    sa.Column('gym_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('checkins', sa.Integer(), nullable=False),
+    sa.Column('unique_users', sa.Integer(), nullable=False),
+    *[sa.Column(f'hour_{hour:02d}', sa.Integer(), nullable=False) for hour in range(24)],
+    sa.ForeignKeyConstraint(['gym_id'], ['gyms.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('gym_id', 'date')
+    )
+    # Fill it from existing check-ins with `flask attendance-rollup` after upgrading
+
+
+def downgrade():
+    op.drop_table('attendance_daily_rollup')
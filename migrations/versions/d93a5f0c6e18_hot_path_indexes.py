@@ -0,0 +1,48 @@
+"""hot path indexes
+
+Revision ID: d93a5f0c6e18
+Revises: c41d8e2b7f05
+Create Date: 2026-10-17 11:48:05.220931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93a5f0c6e18'
+down_revision = 'c41d8e2b7f05'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    ('ix_attendance_gym_id_timestamp', 'attendance', ['gym_id', 'timestamp', 'id'], None),
+    ('ix_attendance_user_id_timestamp', 'attendance', ['user_id', 'timestamp', 'id'], None),
+    ('ix_gym_enrollments_active_user_gym', 'gym_enrollments', ['user_id', 'gym_id'], 'is_active'),
+    ('ix_gym_enrollments_gym_id_id', 'gym_enrollments', ['gym_id', 'id'], None),
+    ('ix_gym_enrollments_user_id_id', 'gym_enrollments', ['user_id', 'id'], None),
+    ('ix_gyms_owner_id', 'gyms', ['owner_id'], None),
+    ('ix_bookings_gym_id_booking_date', 'bookings', ['gym_id', 'booking_date'], None),
+    ('ix_bookings_user_id_booking_date', 'bookings', ['user_id', 'booking_date'], None),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; it builds without
+    # holding a write lock on the table, so check-ins keep flowing meanwhile.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
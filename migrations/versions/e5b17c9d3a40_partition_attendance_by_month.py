@@ -0,0 +1,101 @@
+"""partition attendance by month
+
+Revision ID: e5b17c9d3a40
+Revises: d93a5f0c6e18
+Create Date: 2026-10-17 12:31:52.671038
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b17c9d3a40'
+down_revision = 'd93a5f0c6e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Declarative partitioning is Postgres-only; other backends keep the plain table
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # The partition key has to be part of the primary key, so the table becomes
+    # PRIMARY KEY (id, date); ids still come from the same sequence.
+    op.execute("ALTER TABLE attendance RENAME TO attendance_unpartitioned")
+    op.execute("ALTER TABLE attendance_unpartitioned RENAME CONSTRAINT attendance_pkey TO attendance_unpartitioned_pkey")
+    op.execute("ALTER TABLE attendance_unpartitioned DROP CONSTRAINT unique_daily_attendance")
+    op.execute("DROP INDEX IF EXISTS ix_attendance_gym_id_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_attendance_user_id_timestamp")
+
+    op.execute("""
+        CREATE TABLE attendance (
+            id INTEGER NOT NULL DEFAULT nextval('attendance_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            gym_id INTEGER REFERENCES gyms (id),
+            date DATE NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT attendance_pkey PRIMARY KEY (id, date),
+            CONSTRAINT unique_daily_attendance UNIQUE (user_id, gym_id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("CREATE TABLE attendance_default PARTITION OF attendance DEFAULT")
+
+    # One partition per month from the oldest row through three months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            month DATE := date_trunc('month', COALESCE((SELECT min(date) FROM attendance_unpartitioned), now()))::date;
+            last DATE := (date_trunc('month', now()) + interval '3 months')::date;
+        BEGIN
+            WHILE month <= last LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF attendance FOR VALUES FROM (%L) TO (%L)',
+                    'attendance_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute("CREATE INDEX ix_attendance_gym_id_timestamp ON attendance (gym_id, timestamp, id)")
+    op.execute("CREATE INDEX ix_attendance_user_id_timestamp ON attendance (user_id, timestamp, id)")
+
+    op.execute(
+        "INSERT INTO attendance (id, user_id, gym_id, date, timestamp) "
+        "SELECT id, user_id, gym_id, date, timestamp FROM attendance_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE attendance_id_seq OWNED BY attendance.id")
+    op.execute("DROP TABLE attendance_unpartitioned")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE attendance RENAME TO attendance_partitioned")
+    op.execute("ALTER TABLE attendance_partitioned RENAME CONSTRAINT attendance_pkey TO attendance_partitioned_pkey")
+    op.execute("ALTER TABLE attendance_partitioned DROP CONSTRAINT unique_daily_attendance")
+    op.execute("DROP INDEX IF EXISTS ix_attendance_gym_id_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_attendance_user_id_timestamp")
+
+    op.execute("""
+        CREATE TABLE attendance (
+            id INTEGER NOT NULL DEFAULT nextval('attendance_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            gym_id INTEGER REFERENCES gyms (id),
+            date DATE NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT attendance_pkey PRIMARY KEY (id),
+            CONSTRAINT unique_daily_attendance UNIQUE (user_id, gym_id, date)
+        )
+    """)
+    op.execute("CREATE INDEX ix_attendance_gym_id_timestamp ON attendance (gym_id, timestamp, id)")
+    op.execute("CREATE INDEX ix_attendance_user_id_timestamp ON attendance (user_id, timestamp, id)")
+    op.execute(
+        "INSERT INTO attendance (id, user_id, gym_id, date, timestamp) "
+        "SELECT id, user_id, gym_id, date, timestamp FROM attendance_partitioned"
+    )
+    op.execute("ALTER SEQUENCE attendance_id_seq OWNED BY attendance.id")
+    op.execute("DROP TABLE attendance_partitioned CASCADE")
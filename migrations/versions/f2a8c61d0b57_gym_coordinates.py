@@ -0,0 +1,40 @@
+"""gym coordinates and geohash index
+
+Revision ID: f2a8c61d0b57
+Revises: e5b17c9d3a40
+Create Date: 2026-10-17 19:02:11.408317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a8c61d0b57'
+down_revision = 'e5b17c9d3a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable columns without defaults: a catalog-only change, no table rewrite
+    with op.batch_alter_table('gyms', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gyms_geohash', 'gyms', ['geohash'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_gyms_geohash', table_name='gyms', postgresql_concurrently=True, if_exists=True)
+
+    with op.batch_alter_table('gyms', schema=None) as batch_op:
+        batch_op.drop_column('geohash')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
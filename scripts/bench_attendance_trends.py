@@ -0,0 +1,216 @@
+"""
+Peak-hour heatmap and trend analytics benchmark and correctness check.
+
+Seeds one gym with N check-ins (default 5,000,000) spread over two years with
+weekday and hour-of-day patterns, fills attendance_daily_rollup with
+RollupService.rebuild, then times GET /attendance/gym/<id>/attendance/trends
+for the last 28 days and for the longest allowed range. The same heatmap and
+daily counts are computed a second way -- every check-in timestamp pulled as
+one integer column and binned with NumPy -- and both must agree; rolling
+averages and week-over-week deltas are checked against plain Python on the
+daily counts.
+
+Exits with status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points at a throwaway database.
+
+    python scripts/bench_attendance_trends.py [check-ins]
+"""
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "trends.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+from datetime import date, datetime, timedelta  # noqa: E402
+from sqlalchemy import BigInteger, Integer, cast, func  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.analytics_service import AnalyticsService  # noqa: E402
+from app.services.rollup_service import RollupService, MAX_DAILY_RANGE_DAYS  # noqa: E402
+
+DAYS = MAX_DAILY_RANGE_DAYS - 1
+INSERT_CHUNK = 100_000
+# Relative traffic per UTC hour (morning and evening peaks) and per weekday (Mon..Sun)
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 3, 8, 12, 9, 5, 4, 5, 7, 5, 4, 5, 8, 12, 16, 13, 8, 4, 2, 1], dtype=float)
+WEEKDAY_WEIGHTS = np.array([1.2, 1.1, 1.1, 1.0, 0.9, 0.7, 0.6])
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def seed(total, today):
+    """One gym, enough members for `total` distinct member-days over DAYS days ending yesterday."""
+    rng = np.random.default_rng(25)
+    owner = User(name="Olga Owner", email="owner@example.com", role="gym_owner", is_subscription_active=True)
+    owner.set_password("secret")
+    db.session.add(owner)
+    db.session.flush()
+    gym = Gym(name="Busy Gym", location="Somewhere", owner_id=owner.id)
+    db.session.add(gym)
+    db.session.commit()
+
+    first = today - timedelta(days=DAYS)
+    weekday = (first.weekday() + np.arange(DAYS)) % 7
+    growth = np.linspace(0.8, 1.2, DAYS)  # traffic grows over the two years
+    per_day = WEEKDAY_WEIGHTS[weekday] * growth
+    per_day = np.floor(per_day / per_day.sum() * total).astype(np.int64)
+    per_day[-1] += total - per_day.sum()
+    members = int(per_day.max()) + 1
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "password": "x", "role": "user"}
+        for i in range(members)
+    ])
+    member_ids = np.array([u for (u,) in db.session.query(User.id).filter(User.email.like("member%"))])
+
+    started = time.perf_counter()
+    base = datetime.combine(first, datetime.min.time())
+    hour_p = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+    rows = []
+    for day, count in enumerate(per_day.tolist()):
+        users = rng.choice(member_ids, size=count, replace=False).tolist()
+        seconds = (rng.choice(24, size=count, p=hour_p) * 3600 + rng.integers(0, 3600, size=count)).tolist()
+        day_date, day_start = first + timedelta(days=day), base + timedelta(days=day)
+        rows.extend(
+            {"user_id": u, "gym_id": gym.id, "date": day_date, "timestamp": day_start + timedelta(seconds=s)}
+            for u, s in zip(users, seconds)
+        )
+        if len(rows) >= INSERT_CHUNK:
+            db.session.execute(Attendance.__table__.insert(), rows)
+            db.session.commit()
+            rows = []
+    if rows:
+        db.session.execute(Attendance.__table__.insert(), rows)
+        db.session.commit()
+    print(f"seeded {total:,} check-ins by {members:,} members over {DAYS} days "
+          f"in {time.perf_counter() - started:.0f} s")
+    return gym.id, owner.id, first
+
+
+def epoch_seconds(column):
+    if db.session.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(func.extract("epoch", column), BigInteger)
+
+
+def raw_binning(gym_id, start, end):
+    """Heatmap and daily counts from every timestamp in start..end, pulled as one integer column."""
+    started = time.perf_counter()
+    query = db.session.query(epoch_seconds(Attendance.timestamp)).filter(
+        Attendance.gym_id == gym_id, Attendance.date >= start, Attendance.date <= end
+    )
+    seconds = np.fromiter((s for (s,) in query.yield_per(INSERT_CHUNK)), dtype=np.int64)
+    fetched = time.perf_counter()
+    epoch_day = seconds // 86400
+    hour = seconds % 86400 // 3600
+    weekday = (epoch_day + 3) % 7  # 1970-01-01 was a Thursday
+    heatmap = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+    first_day = (start - date(1970, 1, 1)).days
+    daily = np.bincount(epoch_day - first_day, minlength=(end - start).days + 1)
+    binned = time.perf_counter()
+    return heatmap, daily, len(seconds), fetched - started, binned - fetched
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, sorted(samples)[len(samples) // 2]
+
+
+def check_trends(result, daily, heatmap):
+    check("heatmap matches binning the raw timestamps", result["heatmap"]["checkins"] == heatmap.tolist())
+    check("daily counts match the raw timestamps", [d["checkins"] for d in result["daily"]] == daily.tolist())
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+    today = datetime.utcnow().date()
+
+    with app.app_context():
+        db.create_all()
+        gym_id, owner_id, first = seed(total, today)
+        started = time.perf_counter()
+        summary, _ = RollupService.rebuild(first, today, chunk_days=31)
+        print(f"rollup backfill: {summary['written']} gym-days in {time.perf_counter() - started:.1f} s")
+        counts = {
+            d if isinstance(d, date) else date.fromisoformat(d): c
+            for d, c in db.session.query(Attendance.date, func.count(Attendance.id)).group_by(Attendance.date)
+        }
+
+    client = app.test_client()
+    token = client.post("/auth/login", json={"email": "owner@example.com", "password": "secret"}).json["token"]
+    auth = {"Authorization": "Bearer " + token}
+    yesterday = today - timedelta(days=1)
+
+    for label, start in (("last 28 days", yesterday - timedelta(days=27)), (f"{DAYS} days", first)):
+        url = f"/attendance/gym/{gym_id}/attendance/trends?start_date={start}&end_date={yesterday}"
+        response, http_ms = timed(lambda: client.get(url, headers=auth), 20)
+        with app.app_context():
+            _, service_ms = timed(lambda: AnalyticsService.get_gym_trends(gym_id, owner_id, start, yesterday), 20)
+            heatmap, daily, rows, fetch_s, bin_s = raw_binning(gym_id, start, yesterday)
+            started = time.perf_counter()
+            python_bins, looped = [0] * (7 * 24), 0
+            for (second,) in db.session.query(epoch_seconds(Attendance.timestamp)).filter(
+                Attendance.gym_id == gym_id, Attendance.date >= start, Attendance.date <= yesterday
+            ).limit(1_000_000).yield_per(INSERT_CHUNK):
+                python_bins[(second // 86400 + 3) % 7 * 24 + second % 86400 // 3600] += 1
+                looped += 1
+            python_s = (time.perf_counter() - started) / looped * 1_000_000
+        print(f"{label}: {rows:,} check-ins")
+        print(f"  trends from the rollup: {http_ms:.1f} ms per request ({service_ms:.1f} ms in the service)")
+        print(f"  raw timestamps: {fetch_s:.2f} s to fetch the column, {bin_s * 1000:.0f} ms to bin with NumPy; "
+              f"fetch + per-row Python loop: {python_s:.2f} s per million rows")
+        result = response.json
+        check(f"{label}: sub-second response ({http_ms:.1f} ms)", response.status_code == 200 and http_ms < 1000)
+        check_trends(result, daily, heatmap)
+        check_rolling(result, counts)
+
+    with app.app_context():
+        peak = AnalyticsService.get_gym_trends(gym_id, owner_id, first, yesterday)[0]["peak"]
+    check(f"peak is the seeded busiest slot ({peak['weekday']} {peak['hour']}:00)",
+          peak["weekday"] == "Mon" and peak["hour"] == int(np.argmax(HOUR_WEIGHTS)))
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+def check_rolling(result, counts):
+    """Rolling averages and week-over-week blocks against plain Python over the daily counts."""
+    def total(first, last):
+        return sum(counts.get(first + timedelta(days=i), 0) for i in range((last - first).days + 1))
+
+    ok = all(
+        abs(row[f"avg_{w}d"] - total(day - timedelta(days=w - 1), day) / w) < 0.006
+        for row in result["daily"] for day in [date.fromisoformat(row["date"])] for w in (7, 28)
+    )
+    check("rolling 7/28-day averages match", ok)
+    weeks = result["weeks"]
+    ok = weeks[-1]["week_end"] == result["end_date"] and all(
+        week["checkins"] == total(date.fromisoformat(week["week_start"]), date.fromisoformat(week["week_end"]))
+        and week["previous"] == total(date.fromisoformat(week["week_start"]) - timedelta(days=7),
+                                      date.fromisoformat(week["week_start"]) - timedelta(days=1))
+        and week["delta"] == week["checkins"] - week["previous"]
+        for week in weeks
+    )
+    check(f"week-over-week blocks match (last: {weeks[-1]['delta']:+d}, {weeks[-1]['delta_pct']} %)", ok)
+
+
+if __name__ == "__main__":
+    main()
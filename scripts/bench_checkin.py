@@ -0,0 +1,107 @@
+"""
+Check-ins per second: the old check-then-insert path vs the single upsert path.
+
+Seeds one gym with N enrolled members in a scratch database (DATABASE_URL, or a
+temporary SQLite file), checks every member in once with each implementation,
+and reports throughput and SQL statements per check-in.
+
+    python scripts/bench_checkin.py [members]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.attendance_service import AttendanceService  # noqa: E402
+
+
+def legacy_record_attendance(user_id, gym_id):
+    """record_attendance as it was before the upsert fast path."""
+    user = User.query.get(user_id)
+    if not user:
+        return None, "User not found"
+    gym = Gym.query.get(gym_id)
+    if not gym:
+        return None, "Gym not found"
+    enrollment = GymEnrollment.query.filter_by(user_id=user_id, gym_id=gym_id, is_active=True).first()
+    if not enrollment:
+        return None, "User not enrolled or inactive"
+    today = datetime.utcnow().date()
+    existing = Attendance.query.filter(
+        Attendance.user_id == user_id,
+        Attendance.gym_id == gym_id,
+        db.func.date(Attendance.timestamp) == today
+    ).first()
+    if existing:
+        return None, "Attendance already recorded today"
+    now = datetime.utcnow()
+    db.session.add(Attendance(user_id=user_id, gym_id=gym_id, date=now.date(), timestamp=now))
+    db.session.commit()
+    return {"message": f"{user.name} attendance recorded at {gym.name}"}, None
+
+
+def seed(members):
+    owner = User(name="Bench Owner", email="bench-owner@example.com", role="gym_owner", password="x")
+    db.session.add(owner)
+    db.session.flush()
+    gym = Gym(name="Bench Gym", location="Bench", owner_id=owner.id)
+    db.session.add(gym)
+    db.session.flush()
+    db.session.bulk_insert_mappings(User, [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "password": "x", "role": "user"}
+        for i in range(members)
+    ])
+    ids = [u for (u,) in db.session.query(User.id).filter(User.role == "user")]
+    db.session.bulk_insert_mappings(GymEnrollment, [
+        {"user_id": u, "gym_id": gym.id, "is_active": True} for u in ids
+    ])
+    db.session.commit()
+    return gym.id, ids
+
+
+def run(name, fn, gym_id, user_ids):
+    db.session.query(Attendance).delete()
+    db.session.commit()
+    db.session.expire_all()
+
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    began = time.perf_counter()
+    for user_id in user_ids:
+        _, error = fn(user_id, gym_id)
+        assert not error, error
+        db.session.expire_all()  # each request starts with a cold identity map
+    elapsed = time.perf_counter() - began
+    event.remove(engine, "before_cursor_execute", count)
+
+    n = len(user_ids)
+    print(f"{name:<10} {n / elapsed:>10.0f} check-ins/s {statements / n:>6.1f} statements/check-in")
+
+
+if __name__ == "__main__":
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        gym_id, user_ids = seed(members)
+        run("before", legacy_record_attendance, gym_id, user_ids)
+        run("after", AttendanceService.record_attendance, gym_id, user_ids)
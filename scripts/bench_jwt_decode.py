@@ -0,0 +1,66 @@
+"""
+JWT verification throughput with the decode cache on and off.
+
+Issues `clients` distinct access tokens and verifies them round-robin through
+JWTService.verify_token, as a web worker would see a population of clients
+re-sending their tokens. Reports verifies/second and per-call latency for the
+cache disabled (full python-jose parse + HMAC every time) and enabled, plus a
+run with more clients than cache slots to show the bounded/LRU behaviour.
+
+    python scripts/bench_jwt_decode.py [clients] [seconds]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import jwt_service  # noqa: E402
+from app.services.jwt_service import JWTService  # noqa: E402
+from app.utils.ttl_cache import TTLCache  # noqa: E402
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"User {user_id}"
+        self.role = "user"
+        self.is_active = True
+        self.is_subscription_active = False
+        self.trial_ends_at = datetime.utcnow() + timedelta(days=30)
+
+
+def run(tokens, cache_size, seconds):
+    jwt_service._decode_cache = TTLCache(max_entries=cache_size)
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for token in tokens:
+            payload, error = JWTService.verify_token(token)
+            assert error is None, error
+        count += len(tokens)
+    elapsed = time.perf_counter() - started
+    return count / elapsed, jwt_service._decode_cache.stats()
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    tokens = [JWTService.create_token_pair(FakeUser(i))["token"] for i in range(clients)]
+
+    scenarios = [
+        ("cache off", 0),
+        ("cache on", max(clients, 1)),
+        ("cache too small (LRU churn)", max(clients // 2, 1)),
+    ]
+    print(f"{clients} distinct tokens, {seconds:.0f}s per scenario")
+    print(f"{'scenario':<30} {'verifies/s':>12} {'us/verify':>10} {'hit rate':>9}")
+    for label, size in scenarios:
+        rate, stats = run(tokens, size, seconds)
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0.0
+        print(f"{label:<30} {rate:>12,.0f} {1e6 / rate:>10.1f} {hit_rate:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
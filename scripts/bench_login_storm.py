@@ -0,0 +1,127 @@
+"""
+Latency of a cheap endpoint during a login storm, inline hashing vs the pool.
+
+Serves the app on a local threaded server, hammers POST /auth/login from many
+threads and meanwhile probes GET /gym/all at a steady rate. Reports p50/p99 of
+the probe, login throughput and how many logins were shed with 503. Runs once
+with PASSWORD_POOL_WORKERS=0 (hashing in the web threads) and once with the pool.
+
+    python scripts/bench_login_storm.py [seconds] [login_threads] [pool_workers]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "storm.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USERS = 50
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000 if ordered else float("nan")
+
+
+def build_app(pool_workers):
+    from passlib.hash import pbkdf2_sha256
+    from app import create_app
+    from app.extensions import db
+    from app.models.gym import Gym
+    from app.models.user import User
+    from app.utils.password_pool import reset_password_pool
+
+    reset_password_pool()
+    app = create_app()
+    app.config["PASSWORD_POOL_WORKERS"] = pool_workers
+    app.config["RATE_LIMIT_ENABLED"] = False  # the storm comes from one IP/email on purpose
+    with app.app_context():
+        db.create_all()
+        if not User.query.first():
+            hashed = pbkdf2_sha256.hash("secret-password")
+            owner = User(name="Owner", email="owner@example.com", role="gym_owner", password=hashed)
+            db.session.add(owner)
+            db.session.flush()
+            db.session.add_all(Gym(name=f"Gym {i}", location="City", owner_id=owner.id) for i in range(20))
+            db.session.add_all(
+                User(name=f"Member {i}", email=f"member{i}@example.com", password=hashed) for i in range(USERS)
+            )
+            db.session.commit()
+    return app
+
+
+def run(seconds, login_threads, pool_workers):
+    from werkzeug.serving import make_server
+    from app.utils.password_pool import get_password_pool
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = build_app(pool_workers)
+    with app.app_context():
+        get_password_pool(app.config).warm_up()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    logins = {"ok": 0, "busy": 0, "other": 0}
+    lock = threading.Lock()
+
+    def storm(i):
+        body = json.dumps({"email": f"member{i % USERS}@example.com", "password": "secret-password"}).encode()
+        while not stop.is_set():
+            req = urllib.request.Request(base + "/auth/login", data=body,
+                                         headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(req).read()
+                outcome = "ok"
+            except urllib.error.HTTPError as e:
+                outcome = "busy" if e.code == 503 and e.headers.get("Retry-After") else "other"
+            with lock:
+                logins[outcome] += 1
+
+    probes = []
+
+    def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            urllib.request.urlopen(base + "/gym/all?per_page=10").read()
+            probes.append(time.perf_counter() - started)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=storm, args=(i,)) for i in range(login_threads)]
+    threads.append(threading.Thread(target=probe))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    get_password_pool(app.config).shutdown()
+
+    label = f"pool ({pool_workers} workers)" if pool_workers else "inline"
+    print(f"{label:<18} /gym/all p50={percentile(probes, 50):7.1f}ms p99={percentile(probes, 99):7.1f}ms "
+          f"probes={len(probes):<5} logins/s={logins['ok'] / seconds:6.1f} "
+          f"shed={logins['busy']} errors={logins['other']}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    login_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    pool_workers = int(sys.argv[3]) if len(sys.argv) > 3 else max((os.cpu_count() or 2) // 2, 1)
+
+    print(f"{login_threads} login threads for {seconds:.0f}s, cpu_count={os.cpu_count()}")
+    run(seconds, login_threads, 0)
+    run(seconds, login_threads, pool_workers)
+
+
+if __name__ == "__main__":
+    main()
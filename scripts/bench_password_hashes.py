@@ -0,0 +1,61 @@
+"""
+Password verifications per second per core for each hashing scheme/cost.
+
+Times single-threaded verifies (one core) for pbkdf2_sha256 at several round
+counts and bcrypt at its default cost if a bcrypt backend is installed, then
+suggests PASSWORD_HASH_ROUNDS values for a few per-login CPU budgets.
+
+    python scripts/bench_password_hashes.py [pbkdf2_rounds ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from passlib.hash import bcrypt  # noqa: E402
+from app.utils import hash as password_hash  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+MIN_SECONDS = 1.0
+BUDGETS_MS = (25, 50, 100, 250)
+
+
+def verifies_per_second(verify):
+    verify()  # warm-up
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < MIN_SECONDS:
+        verify()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    rounds_list = [int(r) for r in sys.argv[1:]] or [10_000, password_hash.DEFAULT_ROUNDS, 100_000, 300_000]
+    results = []
+
+    for rounds in rounds_list:
+        hashed = password_hash.hash_password(PASSWORD, rounds)
+        rate = verifies_per_second(lambda: password_hash.verify_password(PASSWORD, hashed, rounds))
+        results.append((f"pbkdf2_sha256 rounds={rounds}", rate))
+
+    if bcrypt.has_backend():
+        hashed = bcrypt.hash(PASSWORD)
+        rate = verifies_per_second(lambda: bcrypt.verify(PASSWORD, hashed))
+        results.append((f"bcrypt cost={bcrypt.default_rounds}", rate))
+
+    print(f"{'scheme':<30} {'verifies/s/core':>16} {'ms/verify':>10}")
+    for label, rate in results:
+        print(f"{label:<30} {rate:>16.1f} {1000 / rate:>10.2f}")
+
+    # pbkdf2 cost is linear in rounds; scale from the largest measurement
+    pbkdf2 = [(r, rate) for r, (_, rate) in zip(rounds_list, results)]
+    rounds, rate = max(pbkdf2)
+    per_round_ms = 1000 / rate / rounds
+    print("\nSuggested PASSWORD_HASH_ROUNDS per login CPU budget:")
+    for budget in BUDGETS_MS:
+        print(f"  {budget:>4} ms -> {int(budget / per_round_ms):,} rounds")
+
+
+if __name__ == "__main__":
+    main()
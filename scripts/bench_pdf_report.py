@@ -0,0 +1,60 @@
+"""
+Memory/throughput benchmark for the streaming attendance PDF writer.
+
+Feeds synthetic attendance rows through StreamingTablePDF and discards the
+output, reporting peak traced memory for increasing row counts. Peak memory
+should stay flat (only a few bytes per page for the xref) as rows grow.
+
+    python scripts/bench_pdf_report.py [max_rows]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.pdf_stream import StreamingTablePDF  # noqa: E402
+from app.services.attendance_service import REPORT_COLUMNS  # noqa: E402
+
+
+def synthetic_rows(count):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        yield (
+            i + 1,
+            f"Member {i % 5000}",
+            f"member{i % 5000}@example.com",
+            (start + timedelta(seconds=30 * i)).strftime("%Y-%m-%d %H:%M"),
+        )
+
+
+def render(count):
+    pdf = StreamingTablePDF("Gym Attendance Report", "Gym: Bench Attendance Report", REPORT_COLUMNS)
+    size = sum(len(chunk) for chunk in pdf.render(synthetic_rows(count)))
+    return size, pdf.page_count
+
+
+def run(count):
+    # Timed and traced separately: tracemalloc slows allocation-heavy code several times over
+    began = time.perf_counter()
+    size, pages = render(count)
+    elapsed = time.perf_counter() - began
+
+    tracemalloc.start()
+    render(count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size, pages
+
+
+if __name__ == "__main__":
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'rows':>10} {'pages':>8} {'seconds':>9} {'rows/s':>10} {'peak MiB':>9} {'pdf MiB':>9}")
+    count = 10_000
+    while count <= max_rows:
+        elapsed, peak, size, pages = run(count)
+        print(f"{count:>10} {pages:>8} {elapsed:>9.2f} {count / elapsed:>10.0f} "
+              f"{peak / 2**20:>9.2f} {size / 2**20:>9.1f}")
+        count *= 10
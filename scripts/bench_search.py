@@ -0,0 +1,247 @@
+"""
+Gym/member search benchmark and correctness check.
+
+Seeds users with realistic names (accented, shared surnames), emails and
+phones, enrolls a slice of them in one gym, builds the search index with
+SearchService.reindex, then times exact, prefix, typo, multi-word, email,
+phone and gym-scoped queries (p50/p99 over many random queries). Every result
+is compared with a brute-force scan of the seeded rows using the same
+matching rules. Also checks that users matching a prefix through many of their
+words are all found, and that the write hooks (signup, profile edit, delete)
+keep the index current.
+
+Exits with status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points at a throwaway database.
+
+    python scripts/bench_search.py [users] [queries]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "search.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from datetime import datetime  # noqa: E402
+from flask import request  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import search_service  # noqa: E402
+from app.services.auth_service import AuthService  # noqa: E402
+from app.services.search_service import SearchService, USER, GYM  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+from app.utils import text_search  # noqa: E402
+
+FIRST = ["José", "María", "Jürgen", "Anna", "Mohammed", "Wei", "Olivia", "Liam", "Noah", "Emma",
+         "Sofía", "Lucas", "Mia", "Ethan", "Aarav", "Priya", "Chloé", "Mateo", "Hana", "Kenji",
+         "Fatima", "Omar", "Zoë", "Isabella", "Jack", "Amelia", "Leon", "Nina", "Arjun", "Yuki"]
+LAST = ["García", "Martínez", "Smith", "Müller", "Nguyen", "Kowalski", "Johnson", "Rossi", "Dubois",
+        "Hernández", "Kim", "Tanaka", "Singh", "Brown", "Silva", "Novak", "Andersson", "O'Brien",
+        "Papadopoulos", "Schmidt", "López", "Wilson", "Ivanova", "Haddad", "Costa", "Jansen"]
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def seed(count, rng):
+    now = datetime.utcnow()
+    owner = User(name="Owner", email="owner@example.com", role="gym_owner", is_subscription_active=True)
+    owner.set_password("secret123")
+    db.session.add(owner)
+    db.session.flush()
+    gym = Gym(name="Power House Fitness", location="Bogotá Centro", owner_id=owner.id)
+    db.session.add(gym)
+    db.session.flush()
+    db.session.add(Gym(name="Fitness Hub", location="Berlin Mitte", owner_id=owner.id))
+
+    hashed = owner.password
+    batch = []
+    for i in range(count):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        # Most names are unique-ish: a numbered middle word spreads the surnames out
+        name = f"{first} {last}" if i % 3 else f"{first} {rng.choice(LAST)} {last}"
+        ascii_last = text_search.normalize(last).replace("'", "")
+        batch.append({
+            "name": name,
+            "email": f"{text_search.normalize(first)}.{ascii_last}{i}@example.com",
+            "phone": f"+1555{i:07d}", "password": hashed, "role": "user", "is_active": True,
+            "is_subscription_active": False, "created_at": now, "updated_at": now,
+        })
+        if len(batch) == 10_000:
+            db.session.execute(User.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(User.__table__.insert(), batch)
+
+    user_ids = db.session.execute(db.select(User.id).where(User.role == "user").order_by(User.id)).scalars()
+    members = list(user_ids)[::10]  # every 10th user is a member
+    rows = [{"user_id": uid, "gym_id": gym.id, "enrolled_at": now, "is_active": True} for uid in members]
+    for start in range(0, len(rows), 10_000):
+        db.session.execute(GymEnrollment.__table__.insert(), rows[start:start + 10_000])
+    db.session.commit()
+
+
+def brute_force(users, q, scope=None):
+    """Expected hits per stage (exact, prefix, fuzzy) from a scan over (id, tokens, name words)."""
+    terms = search_service.parse_query(q)
+    stages, seen = [], set()
+    for stage in ("exact", "prefix", "fuzzy"):
+        hits = {
+            uid for uid, tokens, names in users
+            if uid not in seen and (scope is None or uid in scope)
+            and all(_matches(term, tokens, names, stage) for term in terms)
+        }
+        seen |= hits
+        stages.append(hits)
+    return stages
+
+
+def same_ranking(ids, stages, limit):
+    """ids fill the stages in order; order within a stage is the database's."""
+    position = 0
+    for hits in stages:
+        take = min(limit - position, len(hits))
+        if not set(ids[position:position + take]) <= hits or len(set(ids[position:position + take])) != take:
+            return False
+        position += take
+    return len(ids) == position
+
+
+def _matches(term, tokens, names, stage):
+    if stage == "exact":
+        return term in tokens
+    if any(t.startswith(term) for t in tokens):
+        return True
+    # Only name words carry typo keys
+    return stage == "fuzzy" and len(term) >= text_search.FUZZY_MIN_LENGTH and any(
+        len(t) >= text_search.FUZZY_MIN_LENGTH and text_search.prefix_distance(term, t) <= 1 for t in names
+    )
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+def query_sets(rng, count, emails, phones):
+    """{label: [queries]} built from the seeded vocabulary and a sample of addresses."""
+    last = [text_search.normalize(n) for n in LAST]
+    first = [text_search.normalize(n) for n in FIRST]
+
+    def typo(word):
+        i = rng.randrange(1, len(word) - 1)
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:] if rng.random() < 0.5 else word[:i] + "x" + word[i + 1:]
+
+    return {
+        "exact surname": [rng.choice(LAST) for _ in range(count)],
+        "prefix (3 chars)": [rng.choice(last)[:3] for _ in range(count)],
+        "typo (5+ chars)": [typo(rng.choice([w for w in last if len(w) >= 6])) for _ in range(count)],
+        "first + last prefix": [f"{rng.choice(first)} {rng.choice(last)[:4]}" for _ in range(count)],
+        "email words": [f"{rng.choice(first)}.{rng.choice(last)[:3]}" for _ in range(count)],
+        "email address prefix": [e[:e.index("@") + rng.randrange(1, 5)] for e in rng.sample(emails, count)],
+        "phone prefix": [f"+1 555 {p[5:7]} {p[7:rng.randrange(8, 11)]}" for p in rng.sample(phones, count)],
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(20)
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        is_pg = db.engine.dialect.name == "postgresql"
+        if not User.query.filter(User.role == "user").first():
+            started = time.perf_counter()
+            seed(count, rng)
+            print(f"seeded {count} users in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        indexed = SearchService.reindex(USER) + SearchService.reindex(GYM)
+        elapsed = time.perf_counter() - started
+        postings = db.session.query(db.func.count()).select_from(search_service.SearchTerm).scalar()
+        print(f"indexed {indexed} rows ({postings} postings) in {elapsed:.1f}s")
+        if is_pg:
+            db.session.execute(text("ANALYZE search_terms"))
+            db.session.execute(text("ANALYZE search_fuzzy_keys"))
+            db.session.commit()
+
+        gym = Gym.query.filter_by(name="Power House Fitness").one()
+        users, emails, phones = [], [], []
+        for uid, name, email, phone in db.session.query(User.id, User.name, User.email, User.phone):
+            users.append((uid, *search_service.user_tokens(name, email, phone)))
+            emails.append(email)
+            if phone:
+                phones.append(phone)
+        members = {uid for (uid,) in db.session.query(GymEnrollment.user_id).filter_by(gym_id=gym.id)}
+        verify_every = max(1, queries // 5)  # brute force is O(users): spot-check
+
+        print(f"\n{'query':24}{'p50 ms':>9}{'p99 ms':>9}{'hits':>7}")
+        for label, qs in query_sets(rng, queries, emails, phones).items():
+            for scoped in (False, True):
+                timings, hits, wrong = [], 0, 0
+                for i, q in enumerate(qs):
+                    started = time.perf_counter()
+                    ids = SearchService.match(USER, q, 20, scope=(lambda user_id: db.exists().where(
+                        GymEnrollment.user_id == user_id, GymEnrollment.gym_id == gym.id
+                    )) if scoped else None)
+                    timings.append(time.perf_counter() - started)
+                    hits += len(ids)
+                    if i % verify_every == 0:
+                        stages = brute_force(users, q, members if scoped else None)
+                        if not same_ranking(ids, stages, 20):
+                            wrong += 1
+                            print(f"    mismatch for {q!r}: {ids[:5]} vs {[len(h) for h in stages]} hits per stage")
+                name = label + (" @gym" if scoped else "")
+                print(f"{name:24}{percentile(timings, 0.5):9.2f}{percentile(timings, 0.99):9.2f}{hits / len(qs):7.1f}")
+                check(f"{name}: results agree with brute force", wrong == 0)
+
+        check("gym search finds by location with a typo",
+              [g["name"] for g in SearchService.search_gyms("bogta")[0]["gyms"]] == ["Power House Fitness"])
+        check("gym search matches every word, by prefix",
+              [g["name"] for g in SearchService.search_gyms("fit ber")[0]["gyms"]] == ["Fitness Hub"])
+        check("empty query rejected", SearchService.search_users("  ")[1] is not None)
+        check("other owner's gym refused",
+              SearchService.search_gym_members(gym.id, gym.owner_id + 10**9, "anna")[1] is not None)
+
+        # Write hooks keep the index current
+        user, error = AuthService.signup("Quentin Zyx-Brandnew", "quentin@example.com", "secret123")
+        check("signup indexed", error is None and SearchService.match(USER, "zyx brandn") == [user.id])
+        with app.test_request_context():
+            request.current_user = user
+            UserService.update_profile({"name": "Quentin Renamed"})
+        check("profile edit re-indexed",
+              SearchService.match(USER, "brandnew") == [] and SearchService.match(USER, "renamed") == [user.id])
+        UserService.delete_user(user.id)
+        check("delete removes postings", SearchService.match(USER, "quentin@example") == [])
+
+        # Each of these matches "qx" through 20 words of its own: a page of
+        # posting rows would cover only a few of them
+        crowd = [User(name=" ".join(f"Qx{chr(97 + u)}{chr(97 + w)}" for w in range(20)),
+                      email=f"crowd{u}@example.com", password="x", role="user") for u in range(6)]
+        db.session.add_all(crowd)
+        db.session.flush()
+        SearchService.index_users([(u.id, u.name, u.email, u.phone) for u in crowd])
+        db.session.commit()
+        check("a prefix shared by many words of few users finds them all",
+              sorted(SearchService.match(USER, "qx")) == sorted(u.id for u in crowd))
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
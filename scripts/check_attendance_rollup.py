@@ -0,0 +1,321 @@
+"""
+Daily attendance rollup check: incremental upkeep, backfill/reconcile, reads.
+
+Checks that:
+
+* single and batch check-ins add exactly the rows they insert to
+  attendance_daily_rollup (duplicates, refused and out-of-gym check-ins add
+  nothing), hour by hour,
+* `rebuild` finds the rollup in step after live traffic, repairs drifted,
+  missing and stale gym-days chunk by chunk, and backfills an empty table,
+* a check-in landing while `rebuild` recomputes a gym-day that has no rollup
+  row yet is kept, not overwritten,
+* GET /attendance/gym/<id>/attendance/daily returns every day of the range
+  with hourly counts matching the raw rows, and refuses other owners' gyms,
+* GET /attendance/gym/<id>/attendance/trends is consistent with itself and
+  handles idle gyms (bench_attendance_trends.py checks its figures),
+* the owner dashboard agrees with the rollup.
+
+Then fills one gym with a year of check-ins and reports the daily report's
+time from the rollup next to the same GROUP BY over raw attendance, and the
+backfill rate. Exits with status 1 on any failure. Runs against a temporary
+SQLite file unless DATABASE_URL points at a throwaway database.
+
+    python scripts/check_attendance_rollup.py [check-ins for the timing gym]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest import mock
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "rollup.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.attendance_rollup import AttendanceDailyRollup, HOUR_COLUMNS  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.attendance_service import AttendanceService  # noqa: E402
+from app.services.dashboard_service import DashboardService  # noqa: E402
+from app.services.rollup_service import RollupService  # noqa: E402
+
+MEMBERS = 300
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def seed():
+    owners = {}
+    for name, email, role in (("Olga Owner", "owner@example.com", "gym_owner"),
+                              ("Oscar Other", "other@example.com", "gym_owner")):
+        user = User(name=name, email=email, role=role, is_subscription_active=True)
+        user.set_password("secret")
+        db.session.add(user)
+        owners[email] = user
+    db.session.flush()
+    gyms = [Gym(name=name, location="Somewhere", owner_id=owners[email].id)
+            for name, email in (("Alpha", "owner@example.com"), ("Beta", "owner@example.com"),
+                                ("Gamma", "other@example.com"), ("Timing", "owner@example.com"))]
+    db.session.add_all(gyms)
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "password": "x", "role": "user"}
+        for i in range(MEMBERS)
+    ])
+    db.session.flush()
+    members = [u for (u,) in db.session.query(User.id).filter(User.email.like("member%")).order_by(User.id)]
+    db.session.execute(GymEnrollment.__table__.insert(), [
+        {"user_id": user_id, "gym_id": gym.id, "is_active": n % 10 != 0}
+        for gym in gyms for n, user_id in enumerate(members)
+    ])
+    db.session.commit()
+    return owners["owner@example.com"].id, [g.id for g in gyms], members
+
+
+def raw_days(gym_id, start, end):
+    """date -> (check-ins, unique members, Counter of hours), straight from attendance."""
+    days = {}
+    for a in Attendance.query.filter(Attendance.gym_id == gym_id, Attendance.date >= start, Attendance.date <= end):
+        checkins, users, hours = days.setdefault(a.date, [0, set(), Counter()])
+        days[a.date][0] += 1
+        users.add(a.user_id)
+        hours[a.timestamp.hour] += 1
+    return {d: (c, len(u), h) for d, (c, u, h) in days.items()}
+
+
+def rollup_matches(gym_ids, start, end):
+    for gym_id in gym_ids:
+        expected = raw_days(gym_id, start, end)
+        rows = AttendanceDailyRollup.query.filter(
+            AttendanceDailyRollup.gym_id == gym_id,
+            AttendanceDailyRollup.date >= start, AttendanceDailyRollup.date <= end
+        ).all()
+        actual = {r.date: (r.checkins, r.unique_users, Counter({h: n for h, n in enumerate(r.hours()) if n}))
+                  for r in rows}
+        if actual != expected:
+            return False
+    return True
+
+
+def live_traffic(owner_id, gym_ids, members, now):
+    alpha, beta, gamma, _ = gym_ids
+    recorded = sum(AttendanceService.record_attendance(user_id, alpha)[1] is None for user_id in members[:120])
+    again = sum(AttendanceService.record_attendance(user_id, alpha)[1] is None for user_id in members[:40])
+    check(f"single check-ins: {recorded} recorded, repeats refused", again == 0)
+    today = now.date()
+    row = db.session.get(AttendanceDailyRollup, (alpha, today))
+    check("single check-ins counted once each, in this hour",
+          row is not None and row.checkins == recorded and getattr(row, HOUR_COLUMNS[now.hour]) == recorded)
+
+    rng = random.Random(24)
+    check_ins = []
+    for _ in range(900):
+        when = now - timedelta(days=rng.randint(1, 9), seconds=rng.randint(0, 86399))
+        check_ins.append({"user_id": rng.choice(members), "gym_id": rng.choice((alpha, beta, gamma)),
+                          "timestamp": when.isoformat()})
+    check_ins += check_ins[:50]  # replayed by a second kiosk
+    for when in (now - timedelta(days=400), now + timedelta(days=2)):  # kiosk clock far off
+        check_ins.append({"user_id": members[0], "gym_id": alpha, "timestamp": when.isoformat()})
+    summary = AttendanceService.record_attendance_batch(owner_id, check_ins)[0]["summary"]
+    print(f"  batch: {summary}")
+    check("batch mixes recorded, duplicate, not_enrolled and forbidden",
+          {"recorded", "duplicate", "not_enrolled", "forbidden"} <= set(summary))
+    check("timestamps outside the replay window are refused", summary.get("out_of_window") == 2)
+    check("gym-days of other owners' gyms stay empty",
+          AttendanceDailyRollup.query.filter_by(gym_id=gamma).count() == 0)
+    check("rollup matches attendance after live check-ins",
+          rollup_matches(gym_ids, today - timedelta(days=10), today))
+    result, _ = RollupService.rebuild(dry_run=True)
+    check(f"reconcile finds nothing to do ({result})", result["written"] == 0 and result["removed"] == 0)
+
+
+def drift_and_repair(gym_ids, now):
+    alpha, beta = gym_ids[:2]
+    today = now.date()
+    rows = AttendanceDailyRollup.query.filter_by(gym_id=beta).order_by(AttendanceDailyRollup.date).limit(2).all()
+    rows[0].checkins += 5
+    rows[0].hour_03 += 5
+    db.session.delete(rows[1])
+    db.session.add(AttendanceDailyRollup(gym_id=alpha, date=today - timedelta(days=200), checkins=7, unique_users=7,
+                                         **{c: 0 for c in HOUR_COLUMNS}))
+    db.session.commit()
+
+    chunks = []
+    result, _ = RollupService.rebuild(today - timedelta(days=365), today, chunk_days=3, dry_run=True)
+    check(f"dry run reports 2 out of date and 1 stale ({result})", result["written"] == 2 and result["removed"] == 1)
+    result, _ = RollupService.rebuild(today - timedelta(days=365), today, chunk_days=3,
+                                      on_chunk=lambda *args: chunks.append(args))
+    check(f"reconcile repairs them in {len(chunks)} chunks of 3 days",
+          result["written"] == 2 and result["removed"] == 1 and len(chunks) == 122)
+    check("rollup matches attendance after repair", rollup_matches(gym_ids, today - timedelta(days=365), today))
+
+    expected = db.session.query(func.count(AttendanceDailyRollup.date)).scalar()
+    AttendanceDailyRollup.query.delete()
+    db.session.commit()
+    result, _ = RollupService.rebuild(chunk_days=2)
+    check(f"backfill of an empty table writes every gym-day ({result['written']})",
+          result["written"] == result["rows"] == expected and rollup_matches(gym_ids, today - timedelta(days=30), today))
+    check("rebuild rejects start after end", RollupService.rebuild(today, today - timedelta(days=1))[1] is not None)
+
+
+def rebuild_race(app, gym_ids, members, now):
+    """A check-in arriving between rebuild's attendance read and its write, on a gym-day with no row yet."""
+    beta, today = gym_ids[1], now.date()
+    with app.app_context():
+        # Check-ins written around the rollup, so the gym-day has attendance but no rollup row
+        db.session.execute(Attendance.__table__.insert(), [
+            {"user_id": user_id, "gym_id": beta, "date": today, "timestamp": now} for user_id in members[1:4]
+        ])
+        db.session.commit()
+
+    aggregated, checked_in = threading.Event(), threading.Event()
+    aggregate = RollupService._aggregate
+
+    def paused_aggregate(start, end):
+        fresh = aggregate(start, end)
+        aggregated.set()
+        checked_in.wait(2)  # times out when the check-in is (rightly) blocked
+        return fresh
+
+    def rebuild():
+        with app.app_context():
+            RollupService.rebuild(today, today)
+
+    def check_in():
+        aggregated.wait(10)
+        with app.app_context():
+            AttendanceService.record_attendance(members[5], beta)
+        checked_in.set()
+
+    with mock.patch.object(RollupService, "_aggregate", staticmethod(paused_aggregate)):
+        threads = [threading.Thread(target=rebuild), threading.Thread(target=check_in)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    with app.app_context():
+        row = db.session.get(AttendanceDailyRollup, (beta, today))
+        check(f"a check-in during rebuild is kept ({row.checkins if row else 0} of 4 check-ins)",
+              row is not None and row.checkins == 4)
+
+
+def http_reads(app, gym_ids, owner_id, now):
+    alpha, _, gamma, _ = gym_ids
+    client = app.test_client()
+    token = client.post("/auth/login", json={"email": "owner@example.com", "password": "secret"}).json["token"]
+    auth = {"Authorization": "Bearer " + token}
+    today = now.date()
+    start = today - timedelta(days=13)
+    url = f"/attendance/gym/{alpha}/attendance/daily?start_date={start}&end_date={today}"
+    body = client.get(url, headers=auth).json
+    with app.app_context():
+        expected = raw_days(alpha, start, today)
+    check("daily report lists every day of the range", [d["date"] for d in body["days"]] ==
+          [(start + timedelta(days=i)).isoformat() for i in range(14)])
+    check("daily report matches the raw rows, hour by hour", all(
+        (d["checkins"], d["unique_users"], Counter({h: n for h, n in enumerate(d["hours"]) if n}))
+        == expected.get(datetime.strptime(d["date"], "%Y-%m-%d").date(), (0, 0, Counter()))
+        for d in body["days"]) and body["checkins"] == sum(c for c, _, _ in expected.values()))
+    check("period hours sum the days", body["hours"] == [sum(d["hours"][h] for d in body["days"]) for h in range(24)])
+    check("default range is the last 30 days",
+          len(client.get(f"/attendance/gym/{alpha}/attendance/daily", headers=auth).json["days"]) == 30)
+    check("other owner's gym refused",
+          client.get(f"/attendance/gym/{gamma}/attendance/daily", headers=auth).status_code == 403)
+    check("missing gym 404", client.get("/attendance/gym/999999/attendance/daily", headers=auth).status_code == 404)
+    check("bad dates 400", client.get(f"/attendance/gym/{alpha}/attendance/daily?start_date=yesterday",
+                                      headers=auth).status_code == 400)
+    check("ranges over the cap 400", client.get(
+        f"/attendance/gym/{alpha}/attendance/daily?start_date=2020-01-01&end_date=2024-01-01",
+        headers=auth).status_code == 400)
+
+    trends = client.get(f"/attendance/gym/{alpha}/attendance/trends", headers=auth).json
+    daily_total = sum(d["checkins"] for d in trends["daily"])
+    check("trends: heatmap and daily counts add up to the period's check-ins",
+          sum(map(sum, trends["heatmap"]["checkins"])) == trends["checkins"] == daily_total
+          and len(trends["daily"]) == 28 and len(trends["weeks"]) == 4)
+    idle = client.get(f"/attendance/gym/{gym_ids[3]}/attendance/trends?start_date={today}", headers=auth).json
+    check("trends: a gym with no check-ins has no peak and no percentage change",
+          idle["peak"] is None and idle["weeks"][0]["delta_pct"] is None and len(idle["daily"]) == 1)
+    check("trends: other owner's gym refused",
+          client.get(f"/attendance/gym/{gamma}/attendance/trends", headers=auth).status_code == 403)
+
+    with app.app_context():
+        dashboard = {g["id"]: g for g in DashboardService.get_owner_dashboard(owner_id, now)[0]["gyms"]}
+        week = sum(c for c, _, _ in raw_days(alpha, today - timedelta(days=6), today).values())
+    check("dashboard reads the same counts", dashboard[alpha]["checkins_today"] == expected[today][0]
+          and dashboard[alpha]["checkins_7d"] == week)
+
+
+def timing(gym_id, members, count, now):
+    rng = random.Random(25)
+    today = now.date()
+    per_day = max(1, min(count // 365, len(members)))
+    rows = []
+    for day in range(365):
+        date = today - timedelta(days=day + 1)
+        for user_id in rng.sample(members, per_day):
+            rows.append({"user_id": user_id, "gym_id": gym_id, "date": date,
+                         "timestamp": datetime.combine(date, datetime.min.time()) + timedelta(minutes=rng.randint(0, 1439))})
+    for start in range(0, len(rows), 20000):
+        db.session.execute(Attendance.__table__.insert(), rows[start:start + 20000])
+    db.session.commit()
+
+    started = time.perf_counter()
+    result, _ = RollupService.rebuild(today - timedelta(days=366), today, chunk_days=31)
+    backfill = time.perf_counter() - started
+    print(f"  backfill: {len(rows)} check-ins -> {result['written']} gym-days in {backfill:.2f} s "
+          f"({len(rows) / backfill:,.0f} check-ins/s)")
+
+    start, end = today - timedelta(days=365), today
+    started = time.perf_counter()
+    for _ in range(20):
+        RollupService.get_gym_daily(gym_id, db.session.get(Gym, gym_id).owner_id, start, end)
+    rollup_ms = (time.perf_counter() - started) / 20 * 1000
+    started = time.perf_counter()
+    for _ in range(3):
+        db.session.query(Attendance.date, func.count(Attendance.id)).filter(
+            Attendance.gym_id == gym_id, Attendance.date >= start, Attendance.date <= end
+        ).group_by(Attendance.date).all()
+    raw_ms = (time.perf_counter() - started) / 3 * 1000
+    print(f"  366-day daily report: {rollup_ms:.1f} ms from the rollup (with hours); "
+          f"{raw_ms:.1f} ms for daily counts alone over {len(rows)} raw rows")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+    now = datetime.utcnow()
+
+    with app.app_context():
+        db.create_all()
+        owner_id, gym_ids, members = seed()
+        live_traffic(owner_id, gym_ids, members, now)
+        drift_and_repair(gym_ids, now)
+    rebuild_race(app, gym_ids, members, now)
+    http_reads(app, gym_ids, owner_id, now)
+    with app.app_context():
+        timing(gym_ids[3], members, count, now)
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
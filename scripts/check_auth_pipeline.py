@@ -0,0 +1,93 @@
+"""
+Auth pipeline check: token decodes and user lookups per protected request.
+
+Sends requests to routes that stack several auth decorators and counts how often
+the JWT is decoded and how many statements read the users table. Every request
+must decode once and load the user at most once (zero times once the principal
+cache is warm); exits with status 1 otherwise.
+
+Runs against a temporary SQLite file unless DATABASE_URL points elsewhere.
+
+    python scripts/check_auth_pipeline.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "auth.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.jwt_service import JWTService  # noqa: E402
+from app.services.principal_service import PrincipalService  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+
+
+def seed():
+    now = datetime.utcnow()
+    owner = User(name="Owner", email="owner@example.com", role="gym_owner", password="x",
+                 is_subscription_active=True, trial_started_at=now, trial_ends_at=now + timedelta(days=30))
+    member = User(name="Member", email="member@example.com", role="user", password="x")
+    db.session.add_all([owner, member])
+    db.session.flush()
+    gym = Gym(name="Gym", location="City", owner_id=owner.id)
+    db.session.add(gym)
+    db.session.flush()
+    db.session.add(GymEnrollment(user_id=member.id, gym_id=gym.id, is_active=True))
+    db.session.commit()
+    return owner, member, gym
+
+
+def bearer(user):
+    return {"Authorization": "Bearer " + JWTService.create_token_pair(user)["token"]}
+
+
+def main():
+    app = create_app()
+    decodes = []
+    verify_token = JWTService.verify_token.__func__
+
+    def counting_verify_token(cls, token):
+        decodes.append(token)
+        return verify_token(cls, token)
+
+    JWTService.verify_token = classmethod(counting_verify_token)
+
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        owner, member, gym = seed()
+        client = app.test_client()
+        cases = [
+            ("owner + role + subscription", "get", f"/gym/{gym.id}/members", owner),
+            ("token + role", "get", f"/attendance/gym/{gym.id}/attendance", owner),
+            ("token + role", "get", "/gym/my-gyms", member),
+            ("token", "get", "/user/profile", member),
+        ]
+
+        PrincipalService.clear()
+        for label, method, path, user in cases + cases:
+            headers = bearer(user)
+            decodes.clear()
+            with count_queries(db.engine) as counter:
+                response = getattr(client, method)(path, headers=headers)
+            statements = [" ".join(s.split()) for s in counter.statements]
+            user_reads = [s for s in statements if "FROM users WHERE users.id" in s]
+            ok = len(decodes) == 1 and len(user_reads) <= 1 and response.status_code < 500
+            failures += not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {method.upper()} {path} [{label}] "
+                  f"status={response.status_code} decodes={len(decodes)} user_lookups={len(user_reads)}")
+
+        print("principal cache:", PrincipalService.stats())
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
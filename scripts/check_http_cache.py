@@ -0,0 +1,137 @@
+"""
+HTTP conditional caching check for the public gym reads (/gym/all, /gym/<id>).
+
+Checks that:
+
+* both endpoints send ETag, Last-Modified and a public Cache-Control,
+* If-None-Match with the current ETag answers 304 without reading gyms (one
+  resource_versions lookup), and so does If-Modified-Since,
+* different pages/page sizes get different ETags,
+* creating, updating and deleting a gym, and renaming its owner, change the
+  ETags of the listing and of that gym (and only that gym),
+* a stale ETag gets a full 200 response.
+
+Also reports how long a 304 takes next to a full response. Exits with status 1
+on any failure. Runs against a temporary SQLite file unless DATABASE_URL points
+at a throwaway database.
+
+    python scripts/check_http_cache.py [gyms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "http_cache.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def gym_reads(counter):
+    return sum(1 for s in counter.statements if "FROM gyms" in s)
+
+
+def timed(client, url, headers, rounds=200):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        client.get(url, headers=headers)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        owner = User(name="Olga Owner", email="owner@example.com", role="gym_owner", is_subscription_active=True)
+        owner.set_password("secret")
+        db.session.add(owner)
+        db.session.flush()
+        db.session.execute(Gym.__table__.insert(), [
+            {"name": f"Gym {i}", "location": "Somewhere", "owner_id": owner.id} for i in range(count)
+        ])
+        db.session.commit()
+        engine = db.engine
+
+    token = client.post("/auth/login", json={"email": "owner@example.com", "password": "secret"}).json["token"]
+    auth = {"Authorization": "Bearer " + token}
+
+    # Never-bumped resources still get an ETag; Last-Modified appears after the first change
+    first = client.get("/gym/1")
+    check("unchanged gym has an ETag", first.status_code == 200 and first.headers.get("ETag"))
+    check("public Cache-Control", "public" in first.headers.get("Cache-Control", "") and
+          "max-age=" in first.headers["Cache-Control"])
+
+    gym_id = client.post("/gym/", json={"name": "Iron Temple", "location": "Lisbon"}, headers=auth).json["gym_id"]
+    listing = client.get("/gym/all?per_page=20")
+    detail = client.get(f"/gym/{gym_id}")
+    for label, response in (("listing", listing), ("detail", detail)):
+        check(f"{label} sends ETag and Last-Modified",
+              response.headers.get("ETag") and response.headers.get("Last-Modified"))
+
+    for label, url, response in (("listing", "/gym/all?per_page=20", listing), ("detail", f"/gym/{gym_id}", detail)):
+        with count_queries(engine) as counter:
+            revalidated = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        check(f"{label}: If-None-Match -> 304 with {counter.count} statement(s), no gym reads",
+              revalidated.status_code == 304 and gym_reads(counter) == 0 and counter.count == 1
+              and revalidated.headers["ETag"] == response.headers["ETag"] and not revalidated.data)
+        since = client.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+        check(f"{label}: If-Modified-Since -> 304", since.status_code == 304)
+        listed = client.get(url, headers={"If-None-Match": f'"other", {response.headers["ETag"]}'})
+        check(f"{label}: matching ETag in a list -> 304", listed.status_code == 304)
+
+    check("pages have their own ETags",
+          len({client.get(u).headers["ETag"] for u in ("/gym/all", "/gym/all?page=2", "/gym/all?per_page=5")}) == 3)
+
+    other = client.get("/gym/1")
+    client.put(f"/gym/{gym_id}", json={"name": "Iron Temple II"}, headers=auth)
+    stale = client.get(f"/gym/{gym_id}", headers={"If-None-Match": detail.headers["ETag"]})
+    check("update: stale ETag gets the new body", stale.status_code == 200 and stale.json["name"] == "Iron Temple II")
+    check("update: listing ETag changed",
+          client.get("/gym/all?per_page=20", headers={"If-None-Match": listing.headers["ETag"]}).status_code == 200)
+    check("update: other gyms keep their ETag",
+          client.get("/gym/1", headers={"If-None-Match": other.headers["ETag"]}).status_code == 304)
+
+    before = client.get(f"/gym/{gym_id}").headers["ETag"]
+    client.put("/user/profile", json={"name": "Olga Renamed"}, headers=auth)
+    renamed = client.get(f"/gym/{gym_id}", headers={"If-None-Match": before})
+    check("owner rename: gym ETag changed", renamed.status_code == 200 and renamed.json["owner_name"] == "Olga Renamed")
+
+    token = client.post("/auth/login", json={"email": "owner@example.com", "password": "secret"}).json["token"]
+    auth = {"Authorization": "Bearer " + token}
+    before = client.get(f"/gym/{gym_id}").headers["ETag"]
+    client.delete(f"/gym/{gym_id}", headers=auth)
+    check("delete: cached gym is not revalidated",
+          client.get(f"/gym/{gym_id}", headers={"If-None-Match": before}).status_code == 404)
+
+    url = "/gym/all?per_page=50"
+    etag = client.get(url).headers["ETag"]
+    full = timed(client, url, {})
+    revalidate = timed(client, url, {"If-None-Match": etag})
+    print(f"  {url}: {full:.2f} ms full response, {revalidate:.2f} ms 304")
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
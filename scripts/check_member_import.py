@@ -0,0 +1,194 @@
+"""
+Bulk member import check: outcomes, idempotency, statement counts and memory.
+
+Generates a CSV of members (some enrolled in several gyms, plus a few broken
+rows), imports it through MemberImportService and checks that:
+
+* every row gets the expected status and bad rows carry a reason,
+* a second run of the same file creates nothing (idempotent upsert),
+* a renamed member's tokens are revoked only once the batch commits; a
+  rolled-back batch leaves them valid,
+* statements per batch stay constant (batched IN lookups + multi-row writes),
+* peak Python memory doesn't grow with the file size,
+* the admin API queues the same import as a job and serves its report, and
+  deletes the spooled upload only when the import succeeds.
+
+Uses a low PASSWORD_HASH_ROUNDS so the check runs in seconds. Exits with status
+1 on any failure. Runs against a temporary SQLite file unless DATABASE_URL
+points elsewhere.
+
+    python scripts/check_member_import.py [rows]
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.member_import_service import MemberImportService  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
+
+BATCH_SIZE = 500
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def write_csv(path, rows, gym_ids, prefix="m"):
+    """`rows` members, every 10th also enrolled in a second gym, plus 3 bad rows."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "email", "password", "phone", "gym_id", "valid_till"])
+        for i in range(rows):
+            email = f"{prefix}{i}@chain.example"
+            writer.writerow([f"Member {i}", email, f"pw-{i}", f"{prefix}-{i}", gym_ids[i % len(gym_ids)], ""])
+            if i % 10 == 0:
+                writer.writerow([f"Member {i}", email, "", "", gym_ids[(i + 1) % len(gym_ids)], "2030-01-01"])
+        writer.writerow(["No Email", "", "pw", "", gym_ids[0], ""])
+        writer.writerow(["Bad Gym", f"{prefix}-badgym@chain.example", "pw", "", 999999, ""])
+        writer.writerow(["No Password", f"{prefix}-nopw@chain.example", "", "", gym_ids[0], ""])
+    return rows + rows // 10 + (1 if rows % 10 else 0) + 3
+
+
+def run_import(path):
+    results = []
+    with open(path, newline="") as source:
+        summary, error = MemberImportService.import_csv(
+            source, BATCH_SIZE, on_row=lambda *r: results.append(r)
+        )
+    assert error is None, error
+    return summary, results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    app = create_app()
+    app.config.update(PASSWORD_HASH_ROUNDS=1000, PASSWORD_POOL_WORKERS=0, IMPORT_BATCH_SIZE=BATCH_SIZE,
+                      IMPORT_DIR=tempfile.mkdtemp(), REPORT_DIR=tempfile.mkdtemp())
+    workdir = tempfile.mkdtemp()
+
+    with app.app_context():
+        db.create_all()
+        owner = User(name="Chain", email="owner@chain.example", role="gym_owner", password="x")
+        admin = User(name="Admin", email="admin@chain.example", role="admin")
+        admin.set_password("secret")
+        db.session.add_all([owner, admin])
+        db.session.flush()
+        gyms = [Gym(name=f"Gym {i}", location="City", owner_id=owner.id) for i in range(5)]
+        db.session.add_all(gyms)
+        db.session.commit()
+        gym_ids = [g.id for g in gyms]
+        engine = db.engine
+
+        print(f"import of {rows} members")
+        path = os.path.join(workdir, "members.csv")
+        total = write_csv(path, rows, gym_ids)
+        started = time.perf_counter()
+        with count_queries(engine) as counter:
+            summary, results = run_import(path)
+        elapsed = time.perf_counter() - started
+        batches = -(-total // BATCH_SIZE)
+        print(f"  {summary} in {elapsed:.1f}s, {counter.count} statements for {batches} batches")
+
+        check("one result per data row, in order", [r[0] for r in results] == list(range(2, total + 2)))
+        check(f"{rows} users created", summary.get("created") == rows)
+        check("3 bad rows reported with reasons",
+              summary.get("error") == 3 and all(r[3] for r in results if r[2] == "error"))
+        check("users in DB", User.query.filter(User.email.like("%@chain.example")).count() == rows + 2 + 1)
+        enrollments = GymEnrollment.query.count()
+        check("enrollments in DB (incl. second gyms)", enrollments == rows + -(-rows // 10))
+        check("statements per batch are constant", counter.count <= batches * 10)
+
+        print("re-run of the same file")
+        summary, _ = run_import(path)
+        check(f"nothing created on re-run ({summary})", "created" not in summary)
+        check("no duplicate enrollments", GymEnrollment.query.count() == enrollments)
+
+        print("rename side effects")
+        renamed = User.query.filter_by(email="m0@chain.example").first()
+        token = app.test_client().post("/auth/login", json={"email": "m0@chain.example", "password": "pw-0"}).json
+        token = {"Authorization": "Bearer " + token["token"]}
+        rename_path = os.path.join(workdir, "rename.csv")
+        with open(rename_path, "w", newline="") as f:
+            f.write("name,email\nRenamed Member,m0@chain.example\n")
+        with mock.patch.object(MemberImportService, "_upsert_enrollments", side_effect=SQLAlchemyError("boom")):
+            summary, _ = run_import(rename_path)
+        db.session.expire_all()
+        check("rolled-back batch: row failed, name unchanged",
+              summary == {"error": 1} and db.session.get(User, renamed.id).name == "Member 0")
+        check("rolled-back batch: tokens still valid",
+              app.test_client().get("/user/profile", headers=token).status_code == 200)
+        summary, _ = run_import(rename_path)
+        check("committed rename revokes tokens", summary == {"updated": 1} and
+              app.test_client().get("/user/profile", headers=token).status_code == 401)
+
+        print("memory")
+        peaks = []
+        for size in (rows // 4, rows):
+            size_path = os.path.join(workdir, f"mem{size}.csv")
+            write_csv(size_path, size, gym_ids, prefix=f"mem{size}-")
+            tracemalloc.start()
+            with open(size_path, newline="") as source:
+                MemberImportService.import_csv(source, BATCH_SIZE)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(f"  peak {peaks[0] / 1e6:.1f} MB for {rows // 4} rows, {peaks[1] / 1e6:.1f} MB for {rows} rows")
+        check("peak memory flat in file size", peaks[1] < peaks[0] * 1.5)
+
+    print("admin API")
+    client = app.test_client()
+    token = client.post("/auth/login", json={"email": "admin@chain.example", "password": "secret"}).json["token"]
+    headers = {"Authorization": "Bearer " + token}
+    upload = "name,email,password,gym_id\nApi One,api1@chain.example,pw,%d\nApi Bad,,pw,\n" % gym_ids[0]
+    response = client.post("/user/import", headers=headers,
+                           data={"file": (io.BytesIO(upload.encode()), "members.csv")})
+    check("upload queued (202)", response.status_code == 202)
+    job_id = response.json["job_id"]
+    status = {}
+    for _ in range(100):
+        status = client.get(f"/user/import/{job_id}", headers=headers).json
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+    check(f"job finished with summary ({status.get('summary')})",
+          status.get("summary") == {"created": 1, "error": 1})
+    report = client.get(f"/user/import/{job_id}/report", headers=headers)
+    check("report downloadable", report.status_code == 200 and b"api1@chain.example,created" in report.data)
+    check("spooled upload removed after success", os.listdir(app.config["IMPORT_DIR"]) == [])
+
+    response = client.post("/user/import", headers=headers,
+                           data={"file": (io.BytesIO(b"nickname,phone\nNo Email,123\n"), "broken.csv")})
+    job_id = response.json["job_id"]
+    for _ in range(100):
+        status = client.get(f"/user/import/{job_id}", headers=headers).json
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+    check(f"import with a bad header fails ({status.get('error')})", status["status"] == "failed")
+    check("spooled upload kept after failure", len(os.listdir(app.config["IMPORT_DIR"])) == 1)
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
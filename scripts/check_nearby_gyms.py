@@ -0,0 +1,167 @@
+"""
+Nearest-gym search check: geohash cover vs brute force, and index use.
+
+Seeds gyms at random coordinates (clustered around a few cities, plus points
+near the antimeridian and the poles), then for many random queries compares
+GymService.get_nearby_gyms with a brute-force haversine scan over every gym:
+same gyms, same order. Reports average query time for both, and on Postgres
+checks that the candidate query is served by ix_gyms_geohash.
+
+Exits with status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points at a throwaway database.
+
+    python scripts/check_nearby_gyms.py [gyms] [queries]
+"""
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "nearby.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event, text  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.gym_service import GymService  # noqa: E402
+from app.utils import geo  # noqa: E402
+
+# Centres whose due-north point at 0.9999 r fell outside a box sized with 111.32 km/degree
+BOUNDARY_CASES = [(30.5466, 31.6862, 200), (34.8232, -41.8850, 1)]
+CITIES = [(52.52, 13.405), (40.7128, -74.006), (-33.8688, 151.2093), (35.6762, 139.6503), (-17.7134, 178.065)]
+EDGES = [(0.0, 179.95), (0.0, -179.95), (89.5, 10.0), (-89.5, -60.0)]
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def random_point(rng):
+    lat, lon = rng.choice(CITIES + EDGES)
+    lat = max(-90.0, min(90.0, lat + rng.gauss(0, 0.3)))
+    lon = (lon + rng.gauss(0, 0.3) + 180) % 360 - 180
+    return lat, lon
+
+
+def seed(count, rng):
+    owner = User(name="Owner", email="owner@example.com", role="gym_owner", password="x")
+    db.session.add(owner)
+    db.session.flush()
+    rows = []
+    for i in range(count):
+        lat, lon = random_point(rng)
+        rows.append({"name": f"Gym {i}", "location": "Somewhere", "owner_id": owner.id,
+                     "latitude": lat, "longitude": lon, "geohash": geo.encode(lat, lon)})
+    for start in range(0, len(rows), 10_000):
+        db.session.execute(Gym.__table__.insert(), rows[start:start + 10_000])
+    db.session.commit()
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text("ANALYZE gyms"))
+        db.session.commit()
+
+
+def due_north(lat, lon, distance_km):
+    return lat + math.degrees(distance_km / geo.EARTH_RADIUS_KM), lon
+
+
+def covered(lat, lon, radius, point):
+    """Whether `point` falls in one of the cells covering the circle around (lat, lon)."""
+    point_hash = geo.encode(*point)
+    return any(point_hash.startswith(prefix) for prefix in geo.covering_prefixes(lat, lon, radius))
+
+
+def brute_force(points, lat, lon, radius, limit):
+    hits = [(geo.haversine_km(lat, lon, p_lat, p_lon), gym_id) for gym_id, p_lat, p_lon in points]
+    return [gym_id for d, gym_id in sorted(h for h in hits if h[0] <= radius)][:limit]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = random.Random(7)
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        if not Gym.query.first():
+            seed(count, rng)
+        points = db.session.query(Gym.id, Gym.latitude, Gym.longitude).all()
+        print(f"{len(points)} gyms, {queries} queries")
+
+        mismatches, indexed_time, brute_time = 0, 0.0, 0.0
+        for _ in range(queries):
+            lat, lon = random_point(rng)
+            radius = rng.choice([1, 5, 10, 50, 200])
+            started = time.perf_counter()
+            result, error = GymService.get_nearby_gyms(lat, lon, radius, 100)
+            indexed_time += time.perf_counter() - started
+            assert error is None, error
+
+            started = time.perf_counter()
+            rows = db.session.query(Gym.id, Gym.latitude, Gym.longitude).all()
+            expected = brute_force(rows, lat, lon, radius, 100)
+            brute_time += time.perf_counter() - started
+
+            if [g["id"] for g in result["gyms"]] != expected:
+                mismatches += 1
+                print(f"    mismatch at ({lat:.4f}, {lon:.4f}) r={radius}")
+        check("same gyms in the same order as brute force", mismatches == 0)
+        print(f"  avg {indexed_time / queries * 1000:.2f} ms indexed, {brute_time / queries * 1000:.2f} ms brute force")
+
+        rng_edges = random.Random(19)
+        centres = BOUNDARY_CASES + [
+            (rng_edges.uniform(-80, 80), rng_edges.uniform(-180, 180), rng_edges.choice([1, 5, 10, 50, 200]))
+            for _ in range(2000)
+        ]
+        missed = [c for c in centres if not covered(c[0], c[1], c[2], due_north(c[0], c[1], 0.9999 * c[2]))]
+        check(f"points due north at 0.9999 r are covered (missed: {missed[:3]})", not missed)
+
+        owner_id = db.session.query(Gym.owner_id).limit(1).scalar()
+        for lat, lon, radius in BOUNDARY_CASES:
+            edge_lat, edge_lon = due_north(lat, lon, 0.9999 * radius)
+            gym = Gym(name="Edge gym", location="Edge", owner_id=owner_id, latitude=edge_lat, longitude=edge_lon,
+                      geohash=geo.encode(edge_lat, edge_lon))
+            db.session.add(gym)
+            db.session.commit()
+            result, _ = GymService.get_nearby_gyms(lat, lon, radius, 100)
+            check(f"gym 0.9999 r due north of ({lat}, {lon}) r={radius} is found",
+                  gym.id in [g["id"] for g in result["gyms"]])
+            db.session.delete(gym)
+            db.session.commit()
+
+        check("out-of-range latitude rejected", GymService.get_nearby_gyms(91, 0)[1] is not None)
+        check("radius over the cap rejected", GymService.get_nearby_gyms(0, 0, 10_000)[1] is not None)
+
+        if db.engine.dialect.name == "postgresql":
+            statements = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    statements.append((statement, parameters))
+
+            event.listen(db.engine, "before_cursor_execute", capture)
+            GymService.get_nearby_gyms(52.52, 13.405, 5)
+            event.remove(db.engine, "before_cursor_execute", capture)
+            statement, parameters = statements[-1]
+            with db.engine.connect() as conn:
+                plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+            plan = json.dumps(plan)
+            check("candidate query uses ix_gyms_geohash", "ix_gyms_geohash" in plan)
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
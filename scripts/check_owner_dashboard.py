@@ -0,0 +1,204 @@
+"""
+Owner dashboard check: GET /gym/dashboard and the owner's GET /gym/ listing.
+
+Seeds an owner with many gyms (members, inactive and repeated enrollments,
+45 days of check-ins, bookings in every status) next to a second owner, then
+checks that:
+
+* every per-gym figure and the summary match a naive per-gym computation,
+* the dashboard issues the same number of statements for 10 gyms as for all
+  of them (no per-gym queries),
+* GET /gym/ and the dashboard only show the caller's own gyms, and other
+  roles are refused.
+
+Also reports the dashboard's time next to the naive loop. Exits with status 1
+on any failure. Runs against a temporary SQLite file unless DATABASE_URL
+points at a throwaway database.
+
+    python scripts/check_owner_dashboard.py [gyms]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "dashboard.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.dashboard_service import DashboardService, METRICS  # noqa: E402
+from app.services.rollup_service import RollupService  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+
+MEMBERS_PER_GYM = 20
+HISTORY_DAYS = 45
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def make_owner(name, email):
+    owner = User(name=name, email=email, role="gym_owner", is_subscription_active=True)
+    owner.set_password("secret")
+    db.session.add(owner)
+    db.session.flush()
+    return owner.id
+
+
+def seed(gym_count, now):
+    rng = random.Random(23)
+    owner_id = make_owner("Olga Owner", "owner@example.com")
+    other_id = make_owner("Oscar Other", "other@example.com")
+    member = User(name="Mia Member", email="member@example.com", role="user")
+    member.set_password("secret")
+    db.session.add(member)
+
+    db.session.execute(Gym.__table__.insert(), [
+        {"name": f"Gym {i}", "location": "Somewhere", "owner_id": owner_id if i < gym_count else other_id}
+        for i in range(gym_count + 5)
+    ])
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"User {i}", "email": f"user{i}@example.com", "password": "x", "role": "user"}
+        for i in range(MEMBERS_PER_GYM * 10)
+    ])
+    gym_ids = [g for (g,) in db.session.query(Gym.id).order_by(Gym.id)]
+    user_ids = [u for (u,) in db.session.query(User.id).filter(User.email.like("user%"))]
+
+    enrollments, attendance, bookings = [], [], []
+    for index, gym_id in enumerate(gym_ids):
+        if index % 25 == 7:
+            continue  # a gym with no activity at all
+        members = rng.sample(user_ids, MEMBERS_PER_GYM)
+        for n, user_id in enumerate(members):
+            enrollments.append({"user_id": user_id, "gym_id": gym_id, "is_active": n % 4 != 0})
+            if n % 7 == 0:  # re-enrolled: the same member twice
+                enrollments.append({"user_id": user_id, "gym_id": gym_id, "is_active": True})
+        for day in range(HISTORY_DAYS):
+            date = (now - timedelta(days=day)).date()
+            for user_id in rng.sample(members, rng.randint(0, 6)):
+                timestamp = datetime.combine(date, datetime.min.time()) + timedelta(seconds=rng.randint(0, 86399))
+                attendance.append({"user_id": user_id, "gym_id": gym_id, "date": date, "timestamp": timestamp})
+        for _ in range(rng.randint(0, 12)):
+            bookings.append({
+                "user_id": rng.choice(members), "gym_id": gym_id,
+                "booking_date": now - timedelta(days=rng.uniform(0, 90)),
+                "status": rng.choice(("pending", "success", "success", "cancelled")),
+                "amount": round(rng.uniform(5, 120), 2),
+            })
+    db.session.execute(GymEnrollment.__table__.insert(), enrollments)
+    db.session.execute(Attendance.__table__.insert(), attendance)
+    db.session.execute(Booking.__table__.insert(), bookings)
+    db.session.commit()
+    RollupService.rebuild()  # check-ins were inserted around the check-in paths
+    print(f"seeded {len(gym_ids)} gyms, {len(enrollments)} enrollments, "
+          f"{len(attendance)} check-ins, {len(bookings)} bookings")
+    return owner_id, other_id
+
+
+def naive_dashboard(owner_id, now):
+    """The per-gym loop the dashboard replaces: several queries for every gym."""
+    today = now.date()
+    gyms = []
+    for gym in Gym.query.filter_by(owner_id=owner_id).order_by(Gym.id):
+        enrollments = GymEnrollment.query.filter_by(gym_id=gym.id).all()
+        dates = [a.date for a in Attendance.query.filter_by(gym_id=gym.id)]
+        paid = [b for b in Booking.query.filter_by(gym_id=gym.id) if b.status == "success"]
+        month_start = datetime.combine(today - timedelta(days=29), datetime.min.time())
+        gyms.append({
+            "id": gym.id, "name": gym.name, "location": gym.location,
+            "active_members": len({e.user_id for e in enrollments if e.is_active}),
+            "total_members": len({e.user_id for e in enrollments}),
+            "checkins_today": sum(1 for d in dates if d == today),
+            "checkins_7d": sum(1 for d in dates if (today - d).days < 7),
+            "checkins_30d": sum(1 for d in dates if (today - d).days < 30),
+            "revenue_30d": round(sum(b.amount for b in paid if b.booking_date >= month_start), 2),
+            "revenue_total": round(sum(b.amount for b in paid), 2),
+        })
+    return gyms
+
+
+def same(a, b):
+    return all(abs(a[m] - b[m]) < 0.011 for m in METRICS) and a["id"] == b["id"]
+
+
+def main():
+    gym_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+    client = app.test_client()
+    now = datetime.utcnow()
+
+    with app.app_context():
+        db.create_all()
+        owner_id, other_id = seed(gym_count, now)
+        engine = db.engine
+
+        started = time.perf_counter()
+        dashboard, error = DashboardService.get_owner_dashboard(owner_id, now)
+        fast = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        with count_queries(engine) as naive_counter:
+            expected = naive_dashboard(owner_id, now)
+        slow = (time.perf_counter() - started) * 1000
+
+        check("dashboard succeeds", error is None)
+        mismatched = [e["id"] for e, g in zip(expected, dashboard["gyms"]) if not same(e, g)]
+        check(f"{len(expected)} gyms match the naive computation (mismatched: {mismatched[:5]})",
+              len(expected) == len(dashboard["gyms"]) == gym_count and not mismatched)
+        summary = dashboard["summary"]
+        check("summary sums the gyms", summary["gyms"] == gym_count and all(
+            abs(summary[m] - sum(g[m] for g in expected)) < 0.011 * gym_count for m in METRICS))
+        check("the window figures nest (today <= 7d <= 30d, 30d revenue <= total)", all(
+            g["checkins_today"] <= g["checkins_7d"] <= g["checkins_30d"] and g["revenue_30d"] <= g["revenue_total"]
+            for g in dashboard["gyms"]))
+        check("idle gyms report zeros", any(all(g[m] == 0 for m in METRICS) for g in dashboard["gyms"]))
+
+        small_owner = make_owner("Sam Small", "small@example.com")
+        db.session.execute(Gym.__table__.update().where(Gym.id.in_(
+            db.session.query(Gym.id).filter(Gym.owner_id == owner_id).order_by(Gym.id.desc()).limit(10).scalar_subquery()
+        )).values(owner_id=small_owner))
+        db.session.commit()
+        with count_queries(engine) as small:
+            DashboardService.get_owner_dashboard(small_owner, now)
+        with count_queries(engine) as large:
+            DashboardService.get_owner_dashboard(owner_id, now)
+        check(f"statements: {small.count} for 10 gyms, {large.count} for {gym_count - 10} "
+              f"(naive loop: {naive_counter.count})", small.count == large.count <= 4)
+        print(f"  dashboard over {gym_count} gyms: {fast:.1f} ms; naive per-gym loop: {slow:.1f} ms")
+
+    owner = {"Authorization": "Bearer " + client.post(
+        "/auth/login", json={"email": "owner@example.com", "password": "secret"}).json["token"]}
+    member = {"Authorization": "Bearer " + client.post(
+        "/auth/login", json={"email": "member@example.com", "password": "secret"}).json["token"]}
+
+    listing = client.get("/gym/?per_page=100&count=exact", headers=owner).json
+    with app.app_context():
+        own = {g for (g,) in db.session.query(Gym.id).filter(Gym.owner_id == owner_id)}
+    check("GET /gym/ lists only the owner's gyms",
+          listing["total"] == len(own) and {g["id"] for g in listing["gyms"]} <= own)
+    response = client.get("/gym/dashboard", headers=owner)
+    check("GET /gym/dashboard shows only the owner's gyms",
+          response.status_code == 200 and {g["id"] for g in response.json["gyms"]} == own)
+    check("members are refused", client.get("/gym/dashboard", headers=member).status_code == 403)
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+N+1 regression check for the list endpoints.
+
+Calls each list service with a small and a large page size and counts the SQL
+statements it issues. A serializer that lazy-loads a relationship per row makes
+the count grow with the page; the check exits with status 1 when that happens.
+
+Runs against a temporary SQLite file unless DATABASE_URL points elsewhere
+(use a throwaway database: tables are created and filled).
+
+    python scripts/check_query_counts.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "counts.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import request  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.attendance_service import AttendanceService  # noqa: E402
+from app.services.gym_service import GymService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+from app.utils.pagination import count_cache  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+
+PAGE_SIZES = (5, 50)
+ROWS = 60
+
+
+def seed():
+    """One owner per gym, one member enrolled everywhere plus ROWS members of the first gym."""
+    now = datetime.utcnow()
+    owners = [User(name=f"Owner {i}", email=f"owner{i}@example.com", role="gym_owner", password="x")
+              for i in range(ROWS)]
+    db.session.add_all(owners)
+    db.session.flush()
+    gyms = [Gym(name=f"Gym {i}", location="City", owner_id=o.id) for i, o in enumerate(owners)]
+    db.session.add_all(gyms)
+    members = [User(name=f"Member {i}", email=f"member{i}@example.com", password="x") for i in range(ROWS)]
+    db.session.add_all(members)
+    db.session.flush()
+
+    regular = members[0]
+    db.session.add_all(GymEnrollment(user_id=regular.id, gym_id=g.id, is_active=True) for g in gyms)
+    db.session.add_all(GymEnrollment(user_id=m.id, gym_id=gyms[0].id, is_active=True) for m in members[1:])
+    for day in range(ROWS):
+        ts = now - timedelta(days=day)
+        db.session.add(Attendance(user_id=regular.id, gym_id=gyms[day].id, date=ts.date(), timestamp=ts))
+        visitor = members[1 + day % (ROWS - 1)]
+        db.session.add(Attendance(user_id=visitor.id, gym_id=gyms[0].id, date=ts.date(), timestamp=ts))
+    db.session.commit()
+    return gyms[0], owners[0], regular
+
+
+def scenarios(gym, owner, regular):
+    """(name, principal, callable taking per_page) for each list endpoint."""
+    return [
+        ("GET /attendance/my-attendance", regular,
+         lambda n: AttendanceService.get_attendance(regular.id, per_page=n)),
+        ("GET /attendance/gym/<id>/attendance", owner,
+         lambda n: AttendanceService.get_gym_attendance(gym.id, per_page=n)),
+        ("GET /gym/all", None, lambda n: GymService.get_all_gyms(per_page=n)),
+        ("GET /gym/<id>/members", owner, lambda n: GymService.get_gym_members(gym.id, per_page=n)),
+        ("GET /gym/my-gyms", regular, lambda n: GymService.get_my_gyms(per_page=n)),
+        ("GET /gym/ (owner)", owner, lambda n: GymService.get_owner_gyms(owner.id, per_page=n)),
+        ("GET /user/ (admin)", None, lambda n: UserService.get_all_users_paginated(per_page=n)),
+        ("enroll_ns members", owner, lambda n: UserService.get_gym_members(gym.id, per_page=n)),
+    ]
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        gym, owner, regular = seed()
+
+        for name, principal, fn in scenarios(gym, owner, regular):
+            counts = []
+            for per_page in PAGE_SIZES:
+                # both page sizes must pay for the COUNT, not reuse a cached one
+                count_cache.clear()
+                with app.test_request_context():
+                    request.current_user = principal
+                    with count_queries(db.engine) as counter:
+                        result, error = fn(per_page)
+                    db.session.rollback()
+                if error:
+                    raise SystemExit(f"{name}: {error}")
+                counts.append(counter.count)
+
+            status = "ok" if len(set(counts)) == 1 else "FAIL"
+            failures += status == "FAIL"
+            detail = ", ".join(f"per_page={n}: {c}" for n, c in zip(PAGE_SIZES, counts))
+            print(f"{status:<5} {name} ({detail})")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
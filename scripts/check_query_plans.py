@@ -0,0 +1,208 @@
+"""
+Query-plan regression check for the hot service queries.
+
+Seeds a scratch database with a large dataset, calls each service method the
+API uses, captures every SELECT it issues and runs EXPLAIN on it. Exits with
+status 1 if any of them reads one of the big tables with a sequential scan, or
+if a scenario issues no SELECT at all. The response cache is switched off so
+every call reaches the database.
+
+Postgres is the real target (EXPLAIN (FORMAT JSON)); SQLite is supported for a
+quick local run through EXPLAIN QUERY PLAN. Point DATABASE_URL at a throwaway
+database: tables are created and filled if `users` is empty.
+
+    DATABASE_URL=postgresql://.../gymly_plans python scripts/check_query_plans.py [attendance_rows]
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import request  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.gym_enrollment import GymEnrollment  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.attendance_service import AttendanceService  # noqa: E402
+from app.services.gym_service import GymService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+from app.utils.response_cache import reset_response_caches  # noqa: E402
+
+WATCHED_TABLES = {"attendance", "gym_enrollments", "gyms", "users", "bookings"}
+# Below this many rows a table fits in a page or two and a seq scan is the right plan
+MIN_WATCHED_ROWS = 1000
+CHUNK = 10_000
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(model.__table__.insert(), rows[start:start + CHUNK])
+
+
+def seed(attendance_rows):
+    users = max(attendance_rows // 20, 1000)
+    gyms = max(users // 250, 10)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    _insert(User, [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "password": "x",
+         "role": "gym_owner" if i < gyms else "user", "is_active": True,
+         "created_at": now, "updated_at": now}
+        for i in range(users)
+    ])
+    _insert(Gym, [{"name": f"Gym {i}", "location": "City", "owner_id": i + 1} for i in range(gyms)])
+
+    enrollments = [
+        {"user_id": u, "gym_id": rng.randint(1, gyms), "enrolled_at": now, "is_active": rng.random() < 0.9}
+        for u in range(gyms + 1, users + 1)
+    ]
+    _insert(GymEnrollment, enrollments)
+
+    seen, rows = set(), []
+    while len(rows) < attendance_rows:
+        e = enrollments[rng.randrange(len(enrollments))]
+        ts = now - timedelta(minutes=rng.randrange(60 * 24 * 365))
+        key = (e["user_id"], e["gym_id"], ts.date())
+        if key not in seen:
+            seen.add(key)
+            rows.append({"user_id": key[0], "gym_id": key[1], "date": key[2], "timestamp": ts})
+    _insert(Attendance, rows)
+
+    _insert(Booking, [
+        {"user_id": rng.randint(gyms + 1, users), "gym_id": rng.randint(1, gyms),
+         "booking_date": now - timedelta(days=rng.randrange(365)), "status": "success", "amount": 10.0}
+        for _ in range(attendance_rows // 10)
+    ])
+    db.session.commit()
+
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+
+def scenarios():
+    """(name, callable) pairs hitting the queries behind each endpoint."""
+    gym = Gym.query.order_by(Gym.id).first()
+    owner = User.query.get(gym.owner_id)
+    member = GymEnrollment.query.filter_by(gym_id=gym.id, is_active=True).first()
+    user = User.query.get(member.user_id)
+    since = datetime.utcnow() - timedelta(days=30)
+
+    def as_user(principal, fn):
+        def run():
+            request.current_user = principal
+            return fn()
+        return run
+
+    def next_page(fn):
+        def run():
+            first, _ = fn(None)
+            return fn(first["next_cursor"])
+        return run
+
+    return [
+        ("record_attendance", lambda: AttendanceService.record_attendance(user.id, gym.id)),
+        ("get_attendance", lambda: AttendanceService.get_attendance(user.id)),
+        ("get_gym_attendance", lambda: AttendanceService.get_gym_attendance(gym.id)),
+        ("get_gym_attendance cursor", next_page(
+            lambda c: AttendanceService.get_gym_attendance(gym.id, cursor=c, include_total=False))),
+        ("get_gym_attendance dates", lambda: AttendanceService.get_gym_attendance(
+            gym.id, start_date=since, end_date=datetime.utcnow())),
+        ("stream_pdf", lambda: b"".join(AttendanceService.stream_pdf(gym.id, start_date=since)[0])),
+        ("get_all_gyms", lambda: GymService.get_all_gyms(include_total=False)),
+        ("get_all_gyms cursor", next_page(lambda c: GymService.get_all_gyms(cursor=c, include_total=False))),
+        ("get_gym_by_id", lambda: GymService.get_gym_by_id(gym.id)),
+        ("get_gym_members", as_user(owner, lambda: GymService.get_gym_members(gym.id))),
+        ("get_my_gyms", as_user(user, lambda: GymService.get_my_gyms())),
+        ("admin users", lambda: UserService.get_all_users_paginated(include_total=False)),
+        ("admin users cursor", next_page(
+            lambda c: UserService.get_all_users_paginated(cursor=c, include_total=False))),
+    ]
+
+
+def _pg_seq_scans(node, found, watched):
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in watched:
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        _pg_seq_scans(child, found, watched)
+    return found
+
+
+def watched_tables():
+    """WATCHED_TABLES that are big enough for a seq scan to matter."""
+    return {
+        name for name in WATCHED_TABLES
+        if db.session.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar() >= MIN_WATCHED_ROWS
+    }
+
+
+def seq_scans(conn, statement, parameters, watched):
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        return _pg_seq_scans(plan[0]["Plan"], [], watched)
+
+    details = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+    # A bare SCAN that feeds a LIMIT in index (rowid) order stops early; only
+    # flag scans that have to read everything.
+    ordered_limit = " LIMIT " in statement and not any("TEMP B-TREE" in d for d in details)
+    found = []
+    for detail in details:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in watched and "USING" not in detail:
+            if not ordered_limit:
+                found.append(words[1])
+    return found
+
+
+def main():
+    attendance_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = create_app()
+    # Every scenario must reach the database: a cached response would leave no plan to check
+    app.config["RESPONSE_CACHE_BACKEND"] = "none"
+    reset_response_caches()
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        if not db.session.query(User.id).first():
+            print(f"Seeding {attendance_rows} attendance rows...")
+            seed(attendance_rows)
+        watched = watched_tables()
+
+        for name, fn in scenarios():
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    captured.append((statement, parameters))
+
+            with app.test_request_context():
+                event.listen(db.engine, "before_cursor_execute", capture)
+                try:
+                    fn()
+                finally:
+                    event.remove(db.engine, "before_cursor_execute", capture)
+                db.session.rollback()
+
+            with db.engine.connect() as conn:
+                bad = [(s, seq_scans(conn, s, p, watched)) for s, p in captured]
+            bad = [(s, tables) for s, tables in bad if tables]
+            status = "FAIL" if bad or not captured else "ok"
+            print(f"{status:<5} {name} ({len(captured)} queries)")
+            if not captured:
+                failures += 1
+                print("      no SELECT reached the database")
+            for statement, tables in bad:
+                failures += 1
+                print(f"      seq scan on {', '.join(tables)}: {' '.join(statement.split())[:200]}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
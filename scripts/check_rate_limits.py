@@ -0,0 +1,134 @@
+"""
+Auth throttling check: sliding windows, Retry-After and backend parity.
+
+Runs the login and signup routes against each rate limit backend (in-process,
+and the Redis backend on the FakeRedis store) and checks that:
+
+* the per-email window rejects the (limit+1)th attempt with 429 and Retry-After,
+* a different email from the same IP is still allowed until the per-IP window fills,
+* rejected attempts don't extend the block, and the window slides open again,
+* X-Forwarded-For is only trusted with RATE_LIMIT_TRUST_PROXY,
+* the in-process backend stays within max_keys under a burst of distinct keys,
+  and short-window traffic never expires a long window that is still blocking.
+
+Exits with status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points elsewhere.
+
+    python scripts/check_rate_limits.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "ratelimit.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.rate_limit import InMemoryRateLimitBackend, reset_rate_limits  # noqa: E402
+
+WINDOW = 2
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def login(client, email, ip="10.0.0.1", headers=None):
+    return client.post("/auth/login", json={"email": email, "password": "wrong"},
+                       environ_base={"REMOTE_ADDR": ip}, headers=headers or {})
+
+
+def run(app, backend):
+    print(f"backend={backend}")
+    reset_rate_limits()
+    app.config.update(
+        RATE_LIMIT_BACKEND=backend,
+        RATE_LIMIT_LOGIN_PER_EMAIL=f"3/{WINDOW}",
+        RATE_LIMIT_LOGIN_PER_IP="5/60",
+        RATE_LIMIT_TRUST_PROXY=False,
+    )
+    client = app.test_client()
+
+    codes = [login(client, "member@example.com").status_code for _ in range(3)]
+    check("first 3 attempts per email reach the view", codes == [401] * 3)
+    rejected = login(client, "member@example.com")
+    check("4th attempt per email is 429", rejected.status_code == 429)
+    retry_after = int(rejected.headers.get("Retry-After", 0))
+    check("Retry-After is within the window", 1 <= retry_after <= WINDOW)
+
+    check("other email from the same IP is allowed", login(client, "other@example.com").status_code == 401)
+    check("per-IP window fills at 5 allowed hits", login(client, "third@example.com").status_code == 429)
+    check("a different IP is unaffected", login(client, "fourth@example.com", ip="10.0.0.2").status_code == 401)
+
+    app.config["RATE_LIMIT_LOGIN_PER_IP"] = "100/60"
+    time.sleep(WINDOW + 0.1)
+    check("per-email window slides open again", login(client, "member@example.com").status_code == 401)
+
+    spoofed = {"X-Forwarded-For": "203.0.113.9"}
+    app.config["RATE_LIMIT_LOGIN_PER_IP"] = "1/60"
+    check("X-Forwarded-For ignored without trust", login(client, "a@example.com", headers=spoofed).status_code == 429)
+    app.config["RATE_LIMIT_TRUST_PROXY"] = True
+    check("X-Forwarded-For honoured with trust", login(client, "b@example.com", headers=spoofed).status_code == 401)
+
+    app.config.update(RATE_LIMIT_SIGNUP_PER_IP="100/60", RATE_LIMIT_SIGNUP_PER_EMAIL="1/60")
+    payload = {"name": "New", "email": f"new-{backend}@example.com", "password": "secret"}
+    first = client.post("/auth/signup", json=payload)
+    second = client.post("/auth/signup", json=payload)
+    check("signup per-email window applies", first.status_code == 201 and second.status_code == 429)
+
+    app.config["RATE_LIMIT_LOGIN_PER_IP"] = "100/60"
+    codes = [client.post(path, json=body, environ_base={"REMOTE_ADDR": "10.0.0.3"}).status_code
+             for path in ("/auth/login", "/auth/signup", "/auth/refresh") for body in (["a@example.com"], "a", 1)]
+    check(f"non-object JSON bodies are 400 ({set(codes)})", set(codes) == {400})
+
+
+def check_memory_bounds():
+    print("in-process key bounds")
+    backend = InMemoryRateLimitBackend(max_keys=1000)
+    started = time.perf_counter()
+    for i in range(20_000):
+        backend.hit(f"login:email:user{i}@example.com", 3, 60)
+    elapsed = time.perf_counter() - started
+    check(f"20,000 distinct keys keep {len(backend._hits)} in memory ({elapsed * 1000:.0f} ms)",
+          len(backend._hits) == 1000)
+
+    # At the cap, an idle short-window key must go before a long window that is still blocking
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    backend.hit("login:email:idle@example.com", 5, 0.2)
+    blocked = [backend.hit("signup:ip:10.0.0.9", 1, 3)[0] for _ in range(2)]
+    time.sleep(0.5)
+    backend.hit("login:email:a@example.com", 5, 0.2)
+    backend.hit("login:email:b@example.com", 5, 0.2)
+    check("a blocked long-window key outlives short-window traffic",
+          blocked == [True, False] and backend.hit("signup:ip:10.0.0.9", 1, 3)[0] is False)
+
+
+def main():
+    app = create_app()
+    app.config.update(REDIS_URL="fakeredis://", PASSWORD_POOL_WORKERS=0, RATE_LIMIT_ENABLED=True)
+    with app.app_context():
+        db.create_all()
+        member = User(name="Member", email="member@example.com", role="user")
+        member.set_password("secret")
+        db.session.add(member)
+        db.session.commit()
+
+    for backend in ("memory", "redis"):
+        run(app, backend)
+    check_memory_bounds()
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
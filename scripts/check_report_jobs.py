@@ -0,0 +1,246 @@
+"""
+Background report job check: submit, dedupe, run_job and download.
+
+Queues attendance PDF reports through the API on a SQLite broker that no worker
+consumes, runs them with ReportJobService.run_job, and checks that:
+
+* identical requests share one job while it is queued, running or fresh, and
+  each new job is published exactly once,
+* a job left queued or running past REPORT_JOB_TIMEOUT_MINUTES is failed on the
+  next identical submit, which queues a fresh job; a late delivery of the old
+  one does nothing,
+* failed jobs and expired artifacts are not reused,
+* the download serves the finished PDF to the gym's owner only,
+* two workers handed the same job render it once,
+* finished files older than REPORT_RESULT_TTL_MINUTES are swept, and a
+  resubmit past the TTL deletes the old file.
+
+Exits with status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points at a throwaway database.
+
+    python scripts/check_report_jobs.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "jobs.db")
+# A broker nobody consumes: jobs run only when the check calls run_job
+os.environ["JOB_BROKER"] = "sqlite"
+os.environ["JOB_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "queue.sqlite3")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.attendance import Attendance  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.report_job import ReportJob  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.report_job_service import JOB_HANDLERS, ReportJobService  # noqa: E402
+
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def make_owner(name, email):
+    owner = User(name=name, email=email, role="gym_owner", is_subscription_active=True)
+    owner.set_password("secret")
+    db.session.add(owner)
+    db.session.flush()
+    return owner
+
+
+def seed():
+    owner = make_owner("Olga Owner", "owner@example.com")
+    make_owner("Oscar Other", "other@example.com")
+    gym = Gym(name="Report Gym", location="Somewhere", owner_id=owner.id)
+    db.session.add(gym)
+    db.session.flush()
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "password": "x", "role": "user"}
+        for i in range(50)
+    ])
+    now = datetime.utcnow()
+    db.session.execute(Attendance.__table__.insert(), [
+        {"user_id": user_id, "gym_id": gym.id, "date": (now - timedelta(days=d)).date(),
+         "timestamp": now - timedelta(days=d)}
+        for (user_id,) in db.session.query(User.id).filter(User.email.like("member%"))
+        for d in range(3)
+    ])
+    db.session.commit()
+    return gym.id
+
+
+def published():
+    with sqlite3.connect(os.environ["JOB_SQLITE_PATH"]) as conn:
+        return [job_id for (job_id,) in conn.execute("SELECT job_id FROM job_queue ORDER BY id")]
+
+
+def age(job_id, **columns):
+    """Move a job's timestamps back by the given timedeltas (and set other columns)."""
+    job = db.session.get(ReportJob, job_id)
+    for name, value in columns.items():
+        setattr(job, name, getattr(job, name) - value if isinstance(value, timedelta) else value)
+    db.session.commit()
+
+
+def main():
+    app = create_app()
+    app.config.update(RATE_LIMIT_ENABLED=False, REPORT_DIR=tempfile.mkdtemp())
+    client = app.test_client()
+    timeout = timedelta(minutes=app.config["REPORT_JOB_TIMEOUT_MINUTES"])
+
+    with app.app_context():
+        db.create_all()
+        gym_id = seed()
+
+    def login(email):
+        token = client.post("/auth/login", json={"email": email, "password": "secret"}).json["token"]
+        return {"Authorization": "Bearer " + token}
+
+    owner, other = login("owner@example.com"), login("other@example.com")
+    url = f"/attendance/gym/{gym_id}/attendance/pdf/jobs"
+
+    def submit(query="", headers=owner):
+        return client.post(url + query, headers=headers)
+
+    # ---- submit and dedupe
+    first = submit()
+    job_id = first.json["job_id"]
+    check("submit answers 202 with a queued job", first.status_code == 202 and first.json["status"] == "queued")
+    check("an identical submit shares the queued job", submit().json["job_id"] == job_id)
+    narrowed = submit("?start_date=2020-01-01").json["job_id"]
+    check("different params get their own job", narrowed != job_id)
+    check("each new job is published once", published() == [job_id, narrowed])
+    check("other owners are refused", submit(headers=other).status_code == 403)
+    check("missing gym is 404", client.post("/attendance/gym/999999/attendance/pdf/jobs",
+                                            headers=owner).status_code == 404)
+    status = client.get(f"/attendance/jobs/{job_id}", headers=owner)
+    check("status is visible to the owner", status.status_code == 200 and status.json["status"] == "queued")
+    check("status is hidden from other owners", client.get(f"/attendance/jobs/{job_id}", headers=other).status_code == 404)
+    check("download before the job ran is refused",
+          client.get(f"/attendance/jobs/{job_id}/download", headers=owner).status_code == 404)
+
+    # ---- run_job and download
+    with app.app_context():
+        ReportJobService.run_job(job_id)
+        job = db.session.get(ReportJob, job_id)
+        check("run_job finishes the job", job.status == "done" and os.path.exists(job.artifact_path))
+        artifact = job.artifact_path
+    download = client.get(f"/attendance/jobs/{job_id}/download", headers=owner)
+    check("the owner downloads the PDF", download.status_code == 200 and download.data.startswith(b"%PDF"))
+    check("other owners can't download it",
+          client.get(f"/attendance/jobs/{job_id}/download", headers=other).status_code == 404)
+    check("a fresh artifact is reused", submit().json["job_id"] == job_id)
+    with app.app_context():
+        ReportJobService.run_job(job_id)  # redelivered message
+        check("a redelivered finished job is left alone", db.session.get(ReportJob, job_id).artifact_path == artifact)
+
+    os.remove(artifact)
+    expired = submit().json["job_id"]
+    check("an expired artifact is not reused", expired != job_id)
+    check("its download says so", "expired" in client.get(f"/attendance/jobs/{job_id}/download",
+                                                          headers=owner).json["error"])
+
+    # ---- stale queued / running jobs
+    with app.app_context():
+        age(expired, created_at=timeout - timedelta(minutes=1))
+    check("a queued job inside the timeout is still shared", submit().json["job_id"] == expired)
+    with app.app_context():
+        age(expired, created_at=timedelta(minutes=2))
+    replacement = submit().json["job_id"]
+    with app.app_context():
+        lost = db.session.get(ReportJob, expired)
+        check("a job queued past the timeout is failed and replaced",
+              replacement != expired and lost.status == "failed" and lost.dedupe_key is None)
+        ReportJobService.run_job(expired)
+        check("a late delivery of the failed job does nothing", db.session.get(ReportJob, expired).status == "failed")
+        check("the replacement is published", published()[-1] == replacement)
+
+        age(replacement, status="running", started_at=datetime.utcnow(), created_at=timeout * 2)
+    check("a running job is timed from started_at, not created_at", submit().json["job_id"] == replacement)
+    with app.app_context():
+        age(replacement, started_at=timeout + timedelta(minutes=1))
+    again = submit().json["job_id"]
+    with app.app_context():
+        check("a job running past the timeout is failed and replaced",
+              again != replacement and db.session.get(ReportJob, replacement).status == "failed")
+
+        # ---- failed jobs
+        broken, _ = ReportJobService.submit("attendance_pdf", {"gym_id": 999999})
+        ReportJobService.run_job(broken["job_id"])
+        failed = db.session.get(ReportJob, broken["job_id"])
+        check("a job whose handler errors is failed with the reason",
+              failed.status == "failed" and failed.error == "Gym not found")
+        retry, _ = ReportJobService.submit("attendance_pdf", {"gym_id": 999999})
+        check("a failed job is not reused", retry["job_id"] != broken["job_id"])
+
+    # ---- concurrent claims
+    renders = []
+
+    def slow_render(params, path):
+        renders.append(params["n"])
+        time.sleep(0.05)
+        with open(path, "wb") as f:
+            f.write(b"report")
+
+    def work(job_id):
+        with app.app_context():
+            ReportJobService.run_job(job_id)
+
+    with mock.patch.dict(JOB_HANDLERS, {"attendance_pdf": (slow_render, "pdf")}):
+        with app.app_context():
+            ids = [ReportJobService.submit("attendance_pdf", {"gym_id": gym_id, "n": n})[0]["job_id"]
+                   for n in range(10)]
+        for job_id in ids:
+            workers = [threading.Thread(target=work, args=(job_id,)) for _ in range(3)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+    with app.app_context():
+        done = all(db.session.get(ReportJob, job_id).status == "done" for job_id in ids)
+    check(f"3 workers per job: each of 10 jobs rendered once ({len(renders)} renders)",
+          sorted(renders) == list(range(10)) and done)
+
+    # ---- retention
+    ttl = timedelta(minutes=app.config["REPORT_RESULT_TTL_MINUTES"])
+    with app.app_context():
+        old, fresh = ids[:2], ids[2:]
+        paths = {job_id: db.session.get(ReportJob, job_id).artifact_path for job_id in ids}
+        for job_id in old:
+            age(job_id, finished_at=ttl + timedelta(minutes=1))
+        removed = ReportJobService.sweep_artifacts()
+        check(f"sweep removes only expired files ({removed})", removed == 2
+              and not any(os.path.exists(paths[j]) for j in old) and all(os.path.exists(paths[j]) for j in fresh))
+        check("swept jobs forget their file", all(db.session.get(ReportJob, j).artifact_path is None for j in old))
+    check("download of a swept report says it expired",
+          "expired" in client.get(f"/attendance/jobs/{old[0]}/download", headers=owner).json["error"])
+
+    last = submit("?start_date=2021-01-01").json["job_id"]
+    with app.app_context():
+        ReportJobService.run_job(last)
+        path = db.session.get(ReportJob, last).artifact_path
+        age(last, finished_at=ttl + timedelta(minutes=1))
+    check("a resubmit past the TTL deletes the old file",
+          submit("?start_date=2021-01-01").json["job_id"] != last and not os.path.exists(path))
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Response cache check: hits, write-through invalidation, stampede protection.
+
+For each backend (in-process LRU, and Redis on the FakeRedis store) checks that:
+
+* repeated gym listing/detail and profile reads are served without querying
+  gyms/users, keyed by their arguments and principal,
+* gym create/update/delete, owner renames, profile edits, trial expiry and
+  user deletion invalidate exactly the affected entries once committed, and a
+  rolled-back write invalidates nothing,
+* concurrent misses on one key compute it once (the others wait for it),
+* only successful results are cached, and stats report the hit ratio.
+
+Also reports the cost of a cached read next to an uncached one. Exits with
+status 1 on any failure. Runs against a temporary SQLite file unless
+DATABASE_URL points at a throwaway database.
+
+    python scripts/check_response_cache.py [gyms]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "response_cache.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.gym import Gym  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.gym_service import GymService  # noqa: E402
+from app.services.version_service import VersionService, GYMS  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+from app.utils.response_cache import (  # noqa: E402
+    InMemoryCacheBackend, ResponseCache, get_response_cache, reset_response_caches
+)
+
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def reads(counter, table):
+    return sum(1 for s in counter.statements if f"FROM {table}" in s)
+
+
+def login(client, email):
+    token = client.post("/auth/login", json={"email": email, "password": "secret"}).json["token"]
+    return {"Authorization": "Bearer " + token}
+
+
+def seed(count):
+    users = {}
+    for name, email, role in (("Olga Owner", "owner@example.com", "gym_owner"),
+                              ("Mia Member", "member@example.com", "user"),
+                              ("Ada Admin", "admin@example.com", "admin")):
+        user = User(name=name, email=email, role=role, is_subscription_active=True)
+        user.set_password("secret")
+        db.session.add(user)
+        users[role] = user
+    db.session.flush()
+    db.session.execute(Gym.__table__.insert(), [
+        {"name": f"Gym {i}", "location": "Somewhere", "owner_id": users["gym_owner"].id} for i in range(count)
+    ])
+    db.session.commit()
+    return {role: user.id for role, user in users.items()}
+
+
+def run(app, backend, ids, engine):
+    print(f"backend={backend}")
+    app.config["RESPONSE_CACHE_BACKEND"] = backend
+    reset_response_caches()
+    client = app.test_client()
+    owner, member, admin = (login(client, e) for e in ("owner@example.com", "member@example.com", "admin@example.com"))
+
+    client.get("/gym/all?per_page=5")
+    with count_queries(engine) as counter:
+        again = client.get("/gym/all?per_page=5")
+    check("listing: repeat served from cache", again.status_code == 200 and reads(counter, "gyms") == 0)
+    with count_queries(engine) as counter:
+        client.get("/gym/all?per_page=6")
+    check("listing: other arguments are another entry", reads(counter, "gyms") > 0)
+
+    client.get("/gym/1")
+    with count_queries(engine) as counter:
+        client.get("/gym/1")
+    check("detail: repeat served from cache", reads(counter, "gyms") == 0)
+
+    client.get("/user/profile", headers=member)
+    with count_queries(engine) as counter:
+        profile = client.get("/user/profile", headers=member).json["profile"]
+    check("profile: repeat served from cache, for its own principal",
+          reads(counter, "users") == 0 and profile["email"] == "member@example.com")
+    check("profile: keyed by principal", client.get("/user/profile", headers=owner).json["profile"]["email"]
+          == "owner@example.com")
+    client.get(f"/user/{ids['user']}/profile", headers=owner)
+    with count_queries(engine) as counter:
+        client.get(f"/user/{ids['user']}/profile", headers=owner)
+    check("user by id: repeat served from cache", reads(counter, "users") == 0)
+
+    # Writes
+    client.put("/gym/1", json={"name": f"Renamed {backend}"}, headers=owner)
+    check("gym update: detail invalidated", client.get("/gym/1").json["name"] == f"Renamed {backend}")
+    check("gym update: listing invalidated",
+          client.get("/gym/all?per_page=5").json["gyms"][0]["name"] == f"Renamed {backend}")
+    client.get("/gym/2")
+    with count_queries(engine) as counter:
+        client.get("/gym/2")
+    check("gym update: other gyms stay cached", reads(counter, "gyms") == 0)
+
+    before = client.get("/gym/all?per_page=5&count=exact").json["total"]
+    created = client.post("/gym/", json={"name": "Brand New", "location": "Here"}, headers=owner).json["gym_id"]
+    check("gym create: listing invalidated", client.get("/gym/all?per_page=5&count=exact").json["total"] == before + 1)
+    client.get(f"/gym/{created}")
+    client.delete(f"/gym/{created}", headers=owner)
+    check("gym delete: detail invalidated", client.get(f"/gym/{created}").status_code == 404)
+
+    client.put("/user/profile", json={"name": f"Olga {backend}"}, headers=owner)
+    owner = login(client, "owner@example.com")  # the edit revoked the old tokens
+    check("owner rename: cached gyms show the new owner name",
+          client.get("/gym/2").json["owner_name"] == f"Olga {backend}")
+    check("profile edit: profile invalidated",
+          client.get("/user/profile", headers=owner).json["profile"]["name"] == f"Olga {backend}")
+    check("profile edit: user by id invalidated",
+          client.get(f"/user/{ids['gym_owner']}/profile", headers=owner).json["profile"]["name"] == f"Olga {backend}")
+
+    lapsed = User(name="Trial Owner", email=f"trial-{backend}@example.com", role="gym_owner",
+                  is_subscription_active=True, trial_ends_at=datetime.utcnow() - timedelta(minutes=1))
+    lapsed.set_password("secret")
+    db.session.add(lapsed)
+    db.session.commit()
+    trial = login(client, lapsed.email)
+    client.get("/user/profile", headers=trial)
+    client.get(f"/user/{lapsed.id}/profile", headers=owner)
+    expired = client.get("/gym/dashboard", headers=trial)
+    trial = login(client, lapsed.email)  # expiry revoked the old tokens
+    check("trial expiry: refused and profile invalidated", expired.status_code == 403 and
+          client.get("/user/profile", headers=trial).json["profile"]["is_subscription_active"] is False)
+    check("trial expiry: user by id invalidated",
+          client.get(f"/user/{lapsed.id}/profile", headers=owner).json["profile"]["is_subscription_active"] is False)
+
+    client.get("/gym/all?per_page=5")
+    VersionService.bump(GYMS)
+    db.session.rollback()
+    with count_queries(engine) as counter:
+        client.get("/gym/all?per_page=5")
+    check("rolled-back write invalidates nothing", reads(counter, "gyms") == 0)
+
+    client.get("/gym/999999")
+    with count_queries(engine) as counter:
+        missing = client.get("/gym/999999")
+    check("errors are not cached", missing.status_code == 404 and reads(counter, "gyms") > 0)
+
+    victim = User(name="Temp User", email=f"temp-{backend}@example.com", role="user")
+    victim.set_password("secret")
+    db.session.add(victim)
+    db.session.commit()
+    client.get(f"/user/{victim.id}/profile", headers=owner)
+    client.delete(f"/user/{victim.id}", headers=admin)
+    check("user delete: user by id invalidated",
+          client.get(f"/user/{victim.id}/profile", headers=owner).status_code == 404)
+
+    stats = client.get("/user/cache-stats", headers=admin).json
+    check(f"stats report a hit ratio ({stats['resources'].get('gyms')})",
+          stats["backend"] == backend and stats["resources"]["gyms"]["hit_ratio"] > 0)
+
+    cache = get_response_cache(app.config)
+    started = time.perf_counter()
+    for _ in range(500):
+        GymService.get_all_gyms(1, 50)
+    hit = (time.perf_counter() - started) / 500 * 1000
+    started = time.perf_counter()
+    for _ in range(100):
+        GymService._load_all_gyms(1, 50, None, True, None)
+    miss = (time.perf_counter() - started) / 100 * 1000
+    print(f"  get_all_gyms(per_page=50): {hit:.3f} ms cached, {miss:.2f} ms uncached; {cache.stats()['gyms']}")
+
+
+def check_stampede():
+    print("stampede")
+    cache = ResponseCache(InMemoryCacheBackend(100), ttl=30, lock_seconds=5)
+    calls = []
+    barrier = threading.Barrier(16)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}, None
+
+    results = []
+
+    def reader():
+        barrier.wait()
+        results.append(cache.get_or_compute("gym:1", None, compute))
+
+    threads = [threading.Thread(target=reader) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()["gym"]
+    check(f"16 concurrent misses computed once ({len(calls)} call(s), {stats['waits']} waited)",
+          len(calls) == 1 and stats["waits"] == 15 and all(r == ({"value": 42}, None) for r in results))
+
+    cache = ResponseCache(InMemoryCacheBackend(100), ttl=30, lock_seconds=0.1)
+    cache.backend.add(cache._key("gym:2", None) + ":lock", b"1", 30)  # a holder that never finishes
+    started = time.perf_counter()
+    result = cache.get_or_compute("gym:2", None, lambda: ({"value": 1}, None))
+    check("a stuck lock holder delays others by lock_seconds at most",
+          result == ({"value": 1}, None) and time.perf_counter() - started < 1)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = create_app()
+    app.config["RATE_LIMIT_ENABLED"] = False
+    app.config["REDIS_URL"] = "fakeredis://"
+
+    with app.app_context():
+        db.create_all()
+        ids = seed(count)
+        engine = db.engine
+        for backend in ("memory", "redis"):
+            run(app, backend, ids, engine)
+    check_stampede()
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Access/refresh token check: stateless access claims, rotation and revocation.
+
+Logs in through POST /auth/login and checks that:
+
+* requests with the access token read nothing from the users table,
+* /auth/refresh returns a new pair, and a refresh token works only once,
+* a refresh token is not accepted as an access token,
+* deactivating a user voids their live access tokens at once and refresh
+  refuses them (re-checked against the DB),
+* a token issued after a revocation is accepted,
+* tokens without a typ (the old user_id/role-only format) are refused.
+
+Runs each check for both revocation backends (in-process, and Redis on the
+FakeRedis store). Exits with status 1 on any failure. Runs against a temporary
+SQLite file unless DATABASE_URL points elsewhere.
+
+    python scripts/check_token_refresh.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tokens.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.jwt_service import JWTService  # noqa: E402
+from app.services.principal_service import PrincipalService  # noqa: E402
+from app.utils.query_counter import count_queries  # noqa: E402
+from app.utils.token_revocation import reset_revocations  # noqa: E402
+from jose import jwt  # noqa: E402
+
+FAILURES = []
+
+
+def check(label, condition):
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    if not condition:
+        FAILURES.append(label)
+
+
+def bearer(token):
+    return {"Authorization": "Bearer " + token}
+
+
+def user_lookups(counter):
+    return sum(1 for s in counter.statements if "FROM users" in s and s.lstrip().upper().startswith("SELECT"))
+
+
+def run(app, backend, member, admin):
+    print(f"backend={backend}")
+    reset_revocations()
+    PrincipalService.clear()
+    app.config["TOKEN_REVOCATION_BACKEND"] = backend
+    client = app.test_client()
+
+    with app.app_context():
+        db.session.query(User).update({User.is_active: True})
+        db.session.commit()
+        engine = db.engine
+
+    pair = client.post("/auth/login", json={"email": member, "password": "secret"}).json
+    check("login returns an access/refresh pair", {"token", "refresh_token", "expires_in"} <= set(pair))
+
+    with count_queries(engine) as counter:
+        status = client.get("/gym/my-gyms", headers=bearer(pair["token"])).status_code
+    check(f"access token needs no user lookup (status={status})", status == 200 and user_lookups(counter) == 0)
+
+    check("refresh token rejected as access token",
+          client.get("/gym/my-gyms", headers=bearer(pair["refresh_token"])).status_code == 401)
+
+    refreshed = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    check("refresh returns a new pair", refreshed.status_code == 200 and refreshed.json["token"] != pair["token"])
+    replay = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+    check("a refresh token works only once", replay.status_code == 401)
+    pair = refreshed.json
+
+    admin_token = client.post("/auth/login", json={"email": admin, "password": "secret"}).json["token"]
+    with app.app_context():
+        member_id = User.query.filter_by(email=member).first().id
+    client.post(f"/user/{member_id}/status", json={"is_active": False}, headers=bearer(admin_token))
+    check("deactivation voids live access tokens",
+          client.get("/gym/my-gyms", headers=bearer(pair["token"])).status_code == 401)
+    check("refresh refuses a deactivated user",
+          client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401)
+
+    client.post(f"/user/{member_id}/status", json={"is_active": True}, headers=bearer(admin_token))
+    fresh = client.post("/auth/login", json={"email": member, "password": "secret"}).json
+    check("token issued after the revocation is accepted",
+          client.get("/gym/my-gyms", headers=bearer(fresh["token"])).status_code == 200)
+
+    legacy = jwt.encode({"user_id": member_id, "role": "user", "exp": int(time.time()) + 3600},
+                        JWTService.SECRET_KEY, algorithm=JWTService.ALGORITHM)
+    check("a token without a typ is refused", client.get("/gym/my-gyms", headers=bearer(legacy)).status_code == 401)
+
+
+def main():
+    app = create_app()
+    app.config.update(REDIS_URL="fakeredis://", PASSWORD_POOL_WORKERS=0, RATE_LIMIT_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        for email, role in (("member@example.com", "user"), ("admin@example.com", "admin")):
+            user = User(name=role.title(), email=email, role=role)
+            user.set_password("secret")
+            db.session.add(user)
+        db.session.commit()
+
+    for backend in ("memory", "redis"):
+        run(app, backend, "member@example.com", "admin@example.com")
+
+    if FAILURES:
+        print(f"\n{len(FAILURES)} check(s) failed")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == "__main__":
+    main()